@@ -6,10 +6,51 @@
 """
 # pylint: disable=wildcard-import
 
-from . import exceptions, header, message
+import importlib
+import sys
+
+from . import exceptions
 from .exceptions import *
-from .header import Header
-from .message import Message
 
 __all__ = exceptions.__all__ + ['header', 'message', 'Header', 'Message']
 __version__ = '0.0.1'
+
+
+#: Mapping of package attributes that are only imported on first access to the name of the submodule that
+#: provides them and the name of the attribute within it, or :data:`None` for the submodule itself.
+LAZY_ATTRIBUTES = {
+    'header': ('header', None),
+    'message': ('message', None),
+    'Header': ('header', 'Header'),
+    'Message': ('message', 'Message')
+}
+
+
+def __getattr__(name):
+    """
+    Import the submodule that provides the given package attribute on first access.
+    """
+    try:
+        module_name, attribute = LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name)) from None
+
+    value = importlib.import_module('.' + module_name, __name__)
+    if attribute is not None:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """
+    List the package attributes, including the ones not yet imported.
+    """
+    return sorted(set(globals()) | set(LAZY_ATTRIBUTES))
+
+
+if sys.version_info < (3, 7):  # pragma: no cover
+    # Module level __getattr__ (PEP 562) requires Python 3.7; import everything eagerly on older versions.
+    from . import header, message
+    from .header import Header
+    from .message import Message
@@ -0,0 +1,178 @@
+"""
+    adbwp.aio
+    ~~~~~~~~~
+
+    Helpers for reading and writing messages with :mod:`asyncio` streams.
+"""
+import asyncio
+import typing
+
+from . import consts, header, hints, limits, message
+
+#: Indicates whether or not :class:`~asyncio.BufferedProtocol` is available; it was added in Python 3.7 and
+#: :class:`~adbwp.aio.MessageProtocol` is only defined when it is.
+BUFFERED_PROTOCOL_AVAILABLE = hasattr(asyncio, 'BufferedProtocol')
+
+
+__all__ = ['read_message', 'write_message', 'write_messages']
+if BUFFERED_PROTOCOL_AVAILABLE:
+    __all__.insert(0, 'MessageProtocol')
+
+
+#: Default size of the receive buffer of a :class:`~adbwp.aio.MessageProtocol`; large enough to hold
+#: several messages with maximum size data payloads.
+BUFFER_SIZE = 4 * (header.BYTES + consts.MAXDATA)
+
+
+if BUFFERED_PROTOCOL_AVAILABLE:
+    class MessageProtocol(asyncio.BufferedProtocol):
+        """
+        Protocol that receives bytes directly into a preallocated buffer, decodes messages in place and
+        passes each :class:`~adbwp.message.Message` to a callback.
+
+        When `copy` is false, data payloads are :class:`~memoryview` slices of the receive buffer that are
+        only valid until the callback returns; callbacks that keep a payload must copy it. Errors decoding a
+        message propagate to the transport, which closes the connection.
+
+        The :attr:`~adbwp.aio.MessageProtocol.limits` attribute can be replaced once limits are negotiated.
+        """
+
+        def __init__(self, callback: typing.Callable[[message.Message], typing.Any], size: hints.Int = BUFFER_SIZE,
+                     copy: hints.Bool = True,
+                     limits: typing.Optional[limits.Limits] = None) -> None:  # pylint: disable=redefined-outer-name
+            self.callback = callback
+            self.copy = copy
+            self.limits = limits
+            self._buffer = bytearray(size)
+            self._start = 0
+            self._end = 0
+            self._required = header.BYTES
+
+        def get_buffer(self, sizehint: hints.Int) -> memoryview:
+            """
+            Get the free space at the end of the receive buffer, making room when it is full.
+
+            :param sizehint: Recommended minimum size of the buffer; ignored
+            :type sizehint: :class:`~int`
+            :return: Writable view of the free space in the receive buffer
+            :rtype: :class:`~memoryview`
+            """
+            if self._end == len(self._buffer) or self._start + self._required > len(self._buffer):
+                self._reserve()
+            return memoryview(self._buffer)[self._end:]
+
+        def buffer_updated(self, nbytes: hints.Int) -> None:
+            """
+            Decode all complete messages after `nbytes` were written into the receive buffer.
+
+            :param nbytes: Number of bytes written into the receive buffer
+            :type nbytes: :class:`~int`
+            :return: Nothing
+            :rtype: :class:`~NoneType`
+            :raises UnpackError: When a header is invalid or its data length exceeds the maximum allowed
+            :raises ChecksumError: When data payload checksum doesn't match header checksum
+            """
+            self._end += nbytes
+            view, start, end = memoryview(self._buffer), self._start, self._end
+            max_data = message.max_data(self.limits)
+
+            while end - start >= header.BYTES:
+                data_start = start + header.BYTES
+                instance = header.from_buffer(view, start, max_data)
+
+                data_end = data_start + instance.data_length
+                if data_end > end:
+                    self._required = data_end - start
+                    break
+
+                data = view[data_start:data_end]
+                self._start = start = data_end
+                self.callback(_message(instance, data.tobytes() if self.copy else data, self.limits))
+            else:
+                self._required = header.BYTES
+
+            if start == end:
+                self._start = self._end = 0
+
+        def _reserve(self) -> None:
+            """
+            Move unconsumed bytes to the front of the receive buffer, replacing it with a larger one when
+            the message being received does not fit.
+            """
+            buffered = self._end - self._start
+            if self._required > len(self._buffer):
+                buffer = bytearray(max(self._required, len(self._buffer) * 2))
+                buffer[:buffered] = self._buffer[self._start:self._end]
+                self._buffer = buffer
+            else:
+                self._buffer[:buffered] = self._buffer[self._start:self._end]
+            self._start, self._end = 0, buffered
+
+
+# pylint: disable=redefined-outer-name
+async def read_message(reader: asyncio.StreamReader, limits: typing.Optional[limits.Limits] = None) -> message.Message:
+    """
+    Read a single :class:`~adbwp.message.Message` from the given stream.
+
+    The header and data payload are each read with :meth:`~asyncio.StreamReader.readexactly`, which does not
+    wait when they are already buffered by the reader, and the data payload is a :class:`~memoryview` of the
+    bytes read.
+
+    :param reader: Stream to read from
+    :type reader: :class:`~asyncio.StreamReader`
+    :param limits: (Optional) Limits negotiated for the connection
+    :type limits: :class:`~adbwp.limits.Limits`
+    :return: Message read from the stream
+    :rtype: :class:`~adbwp.message.Message`
+    :raises UnpackError: When the header is invalid or its data length exceeds the maximum allowed
+    :raises ChecksumError: When data payload checksum doesn't match header checksum
+    :raises IncompleteReadError: When the stream ends before a complete message is read
+    """
+    instance = header.from_buffer(await reader.readexactly(header.BYTES), 0, message.max_data(limits))
+    data = memoryview(await reader.readexactly(instance.data_length)) if instance.data_length else b''
+    return _message(instance, data, limits)
+# pylint: enable=redefined-outer-name
+
+
+async def write_message(writer: asyncio.StreamWriter, msg: message.Message) -> None:
+    """
+    Write a single :class:`~adbwp.message.Message` to the given stream and wait for it to drain.
+
+    :param writer: Stream to write to
+    :type writer: :class:`~asyncio.StreamWriter`
+    :param msg: Message to write
+    :type msg: :class:`~adbwp.message.Message`
+    :return: Nothing
+    :rtype: :class:`~NoneType`
+    :raises PackError: When unable to pack the message header into bytes
+    """
+    writer.writelines(message.to_buffers(msg))
+    await writer.drain()
+
+
+async def write_messages(writer: asyncio.StreamWriter, messages: typing.Iterable[message.Message]) -> None:
+    """
+    Write all given :class:`~adbwp.message.Message` instances to the given stream in a single call and
+    wait for them to drain once.
+
+    :param writer: Stream to write to
+    :type writer: :class:`~asyncio.StreamWriter`
+    :param messages: Messages to write
+    :type messages: :class:`~collections.abc.Iterable`
+    :return: Nothing
+    :rtype: :class:`~NoneType`
+    :raises PackError: When unable to pack a message header into bytes
+    """
+    buffers = []  # type: typing.List[hints.Buffer]
+    for msg in messages:
+        buffers.extend(message.to_buffers(msg))
+    writer.writelines(buffers)
+    await writer.drain()
+
+
+def _message(instance: header.Header, data: hints.Buffer,
+             limits: typing.Optional[limits.Limits]) -> message.Message:  # pylint: disable=redefined-outer-name
+    """
+    Create a :class:`~adbwp.message.Message` from the given header and bytes-like data payload without copying it.
+    """
+    return message._from_header(instance, data, limits)  # pylint: disable=protected-access
@@ -0,0 +1,246 @@
+"""
+    adbwp.cache
+    ~~~~~~~~~~~
+
+    Cache of pre-serialized control messages.
+"""
+import collections
+import struct
+import typing
+
+from . import enums, exceptions, hints, message, payload
+
+__all__ = ['CacheInfo', 'MessageCache']
+
+
+#: Default maximum number of messages and templates held by a :class:`~adbwp.cache.MessageCache`.
+MAXSIZE = 1024
+
+
+#: Struct pack string for the "arg0" and "arg1" words of a header.
+ARGS_STRUCT = struct.Struct('<2I')
+
+
+#: Offset of the "arg0" word within a serialized header.
+ARGS_OFFSET = 4
+
+
+class CacheInfo(typing.NamedTuple('CacheInfo', [('hits', hints.Int),  # pylint: disable=inherit-non-class
+                                                ('misses', hints.Int),
+                                                ('maxsize', hints.Int),
+                                                ('currsize', hints.Int)])):
+    """
+    Represents the usage statistics of a :class:`~adbwp.cache.MessageCache`.
+    """
+
+
+class MessageCache:
+    """
+    Bounded least-recently-used cache of control messages and their serialized bytes keyed by
+    command, arguments and data payload.
+
+    Messages that differ only in their arguments, e.g. OKAY for thousands of streams, can instead be
+    rendered from a per (command, data payload) template by patching the two argument words of a
+    cached header.
+
+    Messages and templates share a single least-recently-used order, so the `maxsize` bound applies to
+    both of them together.
+    """
+
+    __slots__ = ('maxsize', 'hits', 'misses', '_entries')
+
+    def __init__(self, maxsize: hints.Int = MAXSIZE) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # Messages are keyed by (command, arg0, arg1, data) and templates by (command, data).
+        self._entries = collections.OrderedDict()  # type: collections.OrderedDict
+
+    def __len__(self) -> hints.Int:
+        return len(self._entries)
+
+    def info(self) -> CacheInfo:
+        """
+        Get the usage statistics of the cache.
+
+        :return: Hit/miss counters and sizes
+        :rtype: :class:`~adbwp.cache.CacheInfo`
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self))
+
+    def clear(self) -> None:
+        """
+        Remove all cached entries and reset the hit/miss counters.
+
+        :return: Nothing
+        :rtype: :class:`~NoneType`
+        """
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def get(self, command: hints.Command, arg0: hints.Int = 0, arg1: hints.Int = 0,
+            data: hints.Buffer = b'') -> message.Message:
+        """
+        Get a cached :class:`~adbwp.message.Message`, creating it with :func:`~adbwp.message.new` on a miss.
+
+        :param command: Command identifier
+        :type command: :class:`~adbwp.enums.Command` or :class:`~int`
+        :param arg0: (Optional) First argument of the command
+        :type arg0: :class:`~int`
+        :param arg1: (Optional) Second argument of the command
+        :type arg1: :class:`~int`
+        :param data: (Optional) Message payload
+        :type data: :class:`~bytes`, :class:`~bytearray`, :class:`~str`, or :class:`~memoryview`
+        :return: Message instance from given values
+        :rtype: :class:`~adbwp.message.Message`
+        :raises ValueError: When data payload is greater than :attr:`~adbwp.consts.MAXDATA`
+        """
+        data = _key_bytes(data)
+        return self._entry((command, arg0, arg1, data), lambda: message.new(command, arg0, arg1, data))[0]
+
+    def to_bytes(self, command: hints.Command, arg0: hints.Int = 0, arg1: hints.Int = 0,
+                 data: hints.Buffer = b'') -> hints.Bytes:
+        """
+        Get the cached serialized bytes of a message, creating it with :func:`~adbwp.message.new` on a miss.
+
+        :param command: Command identifier
+        :type command: :class:`~adbwp.enums.Command` or :class:`~int`
+        :param arg0: (Optional) First argument of the command
+        :type arg0: :class:`~int`
+        :param arg1: (Optional) Second argument of the command
+        :type arg1: :class:`~int`
+        :param data: (Optional) Message payload
+        :type data: :class:`~bytes`, :class:`~bytearray`, :class:`~str`, or :class:`~memoryview`
+        :return: Message represented as bytes
+        :rtype: :class:`~bytes`
+        :raises ValueError: When data payload is greater than :attr:`~adbwp.consts.MAXDATA`
+        :raises PackError: When unable to pack the message header into bytes
+        """
+        data = _key_bytes(data)
+        return self._entry((command, arg0, arg1, data), lambda: message.new(command, arg0, arg1, data))[1]
+
+    def template(self, command: hints.Command, arg0: hints.Int = 0, arg1: hints.Int = 0,
+                 data: hints.Buffer = b'') -> bytearray:
+        """
+        Render the serialized bytes of a message from a cached template of the command and data payload,
+        patching only the argument words of the header.
+
+        :param command: Command identifier
+        :type command: :class:`~adbwp.enums.Command` or :class:`~int`
+        :param arg0: (Optional) First argument of the command
+        :type arg0: :class:`~int`
+        :param arg1: (Optional) Second argument of the command
+        :type arg1: :class:`~int`
+        :param data: (Optional) Message payload
+        :type data: :class:`~bytes`, :class:`~bytearray`, :class:`~str`, or :class:`~memoryview`
+        :return: Message represented as bytes
+        :rtype: :class:`~bytearray`
+        :raises ValueError: When local id is zero for an open or ready message
+        :raises ValueError: When remote id is zero for a ready or close message
+        :raises ValueError: When data payload is greater than :attr:`~adbwp.consts.MAXDATA`
+        :raises PackError: When unable to pack the arguments into the header
+        """
+        _validate_ids(command, arg0, arg1)
+        data = _key_bytes(data)
+        buffer = bytearray(self._lookup((command, data), lambda: message.to_bytes(message.new(command, 0, 0, data))))
+        try:
+            ARGS_STRUCT.pack_into(buffer, ARGS_OFFSET, arg0, arg1)
+        except struct.error as ex:
+            raise exceptions.PackError('Failed to pack arguments into header') from ex
+        return buffer
+
+    def open(self, local_id: hints.Int, destination: hints.Str) -> message.Message:
+        """
+        Get a cached :class:`~adbwp.message.Message` that represents a open message.
+
+        :param local_id: Stream id on remote system to connect with
+        :type local_id: :class:`~int`
+        :param destination: Stream destination
+        :type destination: :class:`~str`
+        :return: Message used to open a stream by id on a remote system
+        :rtype: :class:`~adbwp.message.Message`
+        :raises ValueError: When local id is zero
+        :raises ValueError: When data payload is greater than :attr:`~adbwp.consts.MAXDATA`
+        """
+        key = (enums.Command.OPEN, local_id, 0, destination)
+        return self._entry(key, lambda: message.open(local_id, destination))[0]
+
+    def ready(self, local_id: hints.Int, remote_id: hints.Int) -> message.Message:
+        """
+        Get a cached :class:`~adbwp.message.Message` that represents a ready message.
+
+        :param local_id: Identifier for the stream on the local end
+        :type local_id: :class:`~int`
+        :param remote_id: Identifier for the stream on the remote system
+        :type remote_id: :class:`~int`
+        :return: Message used to inform remote system it's ready for write messages
+        :rtype: :class:`~adbwp.message.Message`
+        :raises ValueError: When local id is zero
+        :raises ValueError: When remote id is zero
+        """
+        key = (enums.Command.OKAY, local_id, remote_id, b'')
+        return self._entry(key, lambda: message.ready(local_id, remote_id))[0]
+
+    def close(self, local_id: hints.Int, remote_id: hints.Int) -> message.Message:
+        """
+        Get a cached :class:`~adbwp.message.Message` that represents a close message.
+
+        :param local_id: Identifier for the stream on the local end
+        :type local_id: :class:`~int`
+        :param remote_id: Identifier for the stream on the remote system
+        :type remote_id: :class:`~int`
+        :return: Message used to inform the remote system of stream closing
+        :rtype: :class:`~adbwp.message.Message`
+        :raises ValueError: When remote id is zero
+        """
+        key = (enums.Command.CLSE, local_id, remote_id, b'')
+        return self._entry(key, lambda: message.close(local_id, remote_id))[0]
+
+    def _entry(self, key: typing.Hashable,
+               factory: typing.Callable[[], message.Message]) -> typing.Tuple[message.Message, hints.Bytes]:
+        """
+        Get the cached message and its serialized bytes for the given key.
+        """
+        def create():
+            instance = factory()
+            return instance, message.to_bytes(instance)
+        return self._lookup(key, create)
+
+    def _lookup(self, key: typing.Hashable, factory: typing.Callable[[], typing.Any]) -> typing.Any:
+        """
+        Get the value for the given key, creating it on a miss and evicting the least recently used entry
+        when the cache is full.
+        """
+        entries = self._entries
+        try:
+            value = entries[key]
+        except KeyError:
+            self.misses += 1
+            value = factory()
+            if self.maxsize > 0:
+                entries[key] = value
+                if len(entries) > self.maxsize:
+                    entries.popitem(last=False)
+        else:
+            self.hits += 1
+            entries.move_to_end(key)
+        return value
+
+
+def _validate_ids(command: hints.Command, arg0: hints.Int, arg1: hints.Int) -> None:
+    """
+    Validate the stream identifiers of a message the same way as the builders of the :mod:`~adbwp.message`
+    module.
+    """
+    if command in (enums.Command.OPEN, enums.Command.OKAY) and not arg0:
+        raise ValueError('Local id cannot be zero')
+    if command in (enums.Command.OKAY, enums.Command.CLSE) and not arg1:
+        raise ValueError('Remote id cannot be zero')
+
+
+def _key_bytes(data: hints.Buffer) -> hints.Bytes:
+    """
+    Convert the given data payload into hashable :class:`~bytes` usable as part of a cache key.
+    """
+    data = payload.as_bytes(data)
+    return data if isinstance(data, bytes) else bytes(data)
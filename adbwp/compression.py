@@ -0,0 +1,341 @@
+"""
+    adbwp.compression
+    ~~~~~~~~~~~~~~~~~
+
+    Registry of streaming compression codecs used by compressed file sync transfers.
+"""
+import abc
+import importlib
+import importlib.util
+import typing
+import zlib
+
+from . import enums, hints, identity
+
+__all__ = ['Codec', 'ZlibCodec', 'BrotliCodec', 'LZ4Codec', 'ZstdCodec', 'register', 'get', 'from_flags',
+           'available', 'negotiate', 'compress', 'decompress']
+
+
+class Codec(abc.ABC):
+    """
+    Abstract base class of compression codecs.
+
+    Compressors have the interface of :func:`~zlib.compressobj` objects, with ``compress(data)`` and
+    ``flush()`` methods, and decompressors that of :func:`~zlib.decompressobj` objects, with a
+    ``decompress(data)`` method. Subclasses adapt the interface of their compression library.
+    """
+
+    #: Name of the codec in the registry.
+    name = None  # type: str
+
+    #: Flag that selects the codec in SEND_V2 and RECV_V2 requests, or :data:`None` when it has none.
+    flag = None  # type: typing.Optional[enums.SyncFlag]
+
+    #: Feature the remote system advertises when it supports the codec, or :data:`None` when it has none.
+    feature = None  # type: typing.Optional[str]
+
+    #: Name of the third-party module required by the codec, or :data:`None` when it only uses the standard library.
+    module = None  # type: typing.Optional[str]
+
+    @property
+    def available(self) -> hints.Bool:
+        """
+        Indicates whether or not the module required by the codec is installed. It is only imported when a
+        compressor or decompressor is first created.
+
+        :return: Bool indicating if the codec can be used or not.
+        :rtype: :class:`~bool`
+        """
+        return self.module is None or importlib.util.find_spec(self.module) is not None
+
+    @abc.abstractmethod
+    def compressor(self) -> typing.Any:
+        """
+        Create a new object that compresses a single stream.
+
+        :return: Compressor with ``compress(data)`` and ``flush()`` methods
+        :rtype: :class:`~object`
+        """
+
+    @abc.abstractmethod
+    def decompressor(self) -> typing.Any:
+        """
+        Create a new object that decompresses a single stream.
+
+        :return: Decompressor with a ``decompress(data)`` method
+        :rtype: :class:`~object`
+        """
+
+    def _import(self) -> typing.Any:
+        """
+        Import the module required by the codec.
+        """
+        return importlib.import_module(self.module)
+
+
+class ZlibCodec(Codec):
+    """
+    Reference codec using :mod:`zlib` from the standard library.
+
+    ADB has no flag for zlib, so it cannot be negotiated with adbd; it is meant for testing and for ends
+    that agree to use it out of band.
+    """
+
+    name = 'zlib'
+
+    def __init__(self, level: hints.Int = zlib.Z_DEFAULT_COMPRESSION) -> None:
+        self.level = level
+
+    def compressor(self) -> typing.Any:
+        return zlib.compressobj(self.level)
+
+    def decompressor(self) -> typing.Any:
+        return zlib.decompressobj()
+
+
+class BrotliCodec(Codec):
+    """
+    Codec using the third-party "brotli" package.
+    """
+
+    name = 'brotli'
+    flag = enums.SyncFlag.BROTLI
+    feature = identity.FEATURE_SENDRECV_V2_BROTLI
+    module = 'brotli'
+
+    def compressor(self) -> typing.Any:
+        return _BrotliCompressor(self._import().Compressor())
+
+    def decompressor(self) -> typing.Any:
+        return _BrotliDecompressor(self._import().Decompressor())
+
+
+class LZ4Codec(Codec):
+    """
+    Codec using the LZ4 frame format of the third-party "lz4" package.
+    """
+
+    name = 'lz4'
+    flag = enums.SyncFlag.LZ4
+    feature = identity.FEATURE_SENDRECV_V2_LZ4
+    module = 'lz4'
+
+    def compressor(self) -> typing.Any:
+        return _LZ4Compressor(importlib.import_module('lz4.frame').LZ4FrameCompressor())
+
+    def decompressor(self) -> typing.Any:
+        return importlib.import_module('lz4.frame').LZ4FrameDecompressor()
+
+
+class ZstdCodec(Codec):
+    """
+    Codec using the third-party "zstandard" package.
+    """
+
+    name = 'zstd'
+    flag = enums.SyncFlag.ZSTD
+    feature = identity.FEATURE_SENDRECV_V2_ZSTD
+    module = 'zstandard'
+
+    def compressor(self) -> typing.Any:
+        return self._import().ZstdCompressor().compressobj()
+
+    def decompressor(self) -> typing.Any:
+        return self._import().ZstdDecompressor().decompressobj()
+
+
+class _BrotliCompressor:
+    """
+    Adapt a :class:`brotli.Compressor` to the interface of :func:`~zlib.compressobj` objects.
+    """
+
+    __slots__ = ('_compressor',)
+
+    def __init__(self, compressor: typing.Any) -> None:
+        self._compressor = compressor
+
+    def compress(self, data: hints.Buffer) -> hints.Bytes:
+        """
+        Compress the given data, returning any compressed bytes that are ready.
+        """
+        return self._compressor.process(bytes(data))
+
+    def flush(self) -> hints.Bytes:
+        """
+        Finish the stream, returning the remaining compressed bytes.
+        """
+        return self._compressor.finish()
+
+
+class _BrotliDecompressor:
+    """
+    Adapt a :class:`brotli.Decompressor` to the interface of :func:`~zlib.decompressobj` objects.
+    """
+
+    __slots__ = ('_decompressor',)
+
+    def __init__(self, decompressor: typing.Any) -> None:
+        self._decompressor = decompressor
+
+    def decompress(self, data: hints.Buffer) -> hints.Bytes:
+        """
+        Decompress the given data, returning the decompressed bytes that are ready.
+        """
+        return self._decompressor.process(bytes(data))
+
+
+class _LZ4Compressor:
+    """
+    Adapt a :class:`lz4.frame.LZ4FrameCompressor` to the interface of :func:`~zlib.compressobj` objects by
+    beginning the frame before the first output.
+    """
+
+    __slots__ = ('_compressor', '_header')
+
+    def __init__(self, compressor: typing.Any) -> None:
+        self._compressor = compressor
+        self._header = compressor.begin()
+
+    def compress(self, data: hints.Buffer) -> hints.Bytes:
+        """
+        Compress the given data, returning any compressed bytes that are ready after the frame header.
+        """
+        header, self._header = self._header, b''
+        return header + self._compressor.compress(data)
+
+    def flush(self) -> hints.Bytes:
+        """
+        End the frame, returning the remaining compressed bytes after the frame header.
+        """
+        header, self._header = self._header, b''
+        return header + self._compressor.flush()
+
+
+#: Registered codecs by name.
+CODECS = {}  # type: typing.Dict[str, Codec]
+
+
+def register(codec: Codec) -> None:
+    """
+    Register the given codec, replacing any registered with the same name.
+
+    :param codec: Codec to register
+    :type codec: :class:`~adbwp.compression.Codec`
+    :return: Nothing
+    :rtype: :class:`~NoneType`
+    """
+    CODECS[codec.name] = codec
+
+
+def get(name: hints.Str) -> Codec:
+    """
+    Get the registered codec with the given name.
+
+    :param name: Name of the codec
+    :type name: :class:`~str`
+    :return: Registered codec
+    :rtype: :class:`~adbwp.compression.Codec`
+    :raises ValueError: When no codec is registered with the name
+    """
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError('Unknown codec {!r}; expected one of {}'.format(name, ', '.join(sorted(CODECS)))) from None
+
+
+def from_flags(flags: hints.Int) -> typing.Optional[Codec]:
+    """
+    Get the registered codec selected by the flags of a SEND_V2 or RECV_V2 request.
+
+    :param flags: Flags of the request
+    :type flags: :class:`~int`
+    :return: Codec selected by the flags, or :data:`None` when the data is not compressed
+    :rtype: :class:`~adbwp.compression.Codec`
+    :raises ValueError: When the flags select an unknown codec or more than one
+    """
+    flag = flags & ~enums.SyncFlag.DRY_RUN
+    if not flag:
+        return None
+
+    for codec in CODECS.values():
+        if codec.flag == flag:
+            return codec
+    raise ValueError('No codec registered for sync flags {:#x}'.format(flags))
+
+
+def available() -> typing.List[Codec]:
+    """
+    Get the registered codecs whose required module is installed.
+
+    :return: Usable codecs in the order they were registered
+    :rtype: :class:`~list`
+    """
+    return [codec for codec in CODECS.values() if codec.available]
+
+
+def negotiate(features: typing.AbstractSet[str],
+              preferred: typing.Sequence[str] = ('zstd', 'lz4', 'brotli')) -> typing.Optional[Codec]:
+    """
+    Choose the codec to use with a remote system from the features it advertises. Compression requires
+    support for SEND_V2 and RECV_V2 requests as well as for the codec.
+
+    :param features: Features advertised by the remote system, e.g. :attr:`~adbwp.identity.SystemIdentity.features`
+    :type features: :class:`~collections.abc.Set`
+    :param preferred: (Optional) Names of the codecs to consider, in order of preference
+    :type preferred: :class:`~collections.abc.Sequence`
+    :return: First preferred codec that is registered, installed, and supported, if any
+    :rtype: :class:`~adbwp.compression.Codec`
+    """
+    if identity.FEATURE_SENDRECV_V2 not in features:
+        return None
+
+    for name in preferred:
+        codec = CODECS.get(name)
+        if codec is not None and codec.flag is not None and codec.feature in features and codec.available:
+            return codec
+    return None
+
+
+def compress(chunks: typing.Iterable[hints.Buffer], codec: Codec) -> typing.Iterator[hints.Bytes]:
+    """
+    Compress a stream given as chunks, holding at most one chunk and the compressor state in memory.
+
+    :param chunks: Uncompressed data, e.g. blocks read from a file
+    :type chunks: :class:`~collections.abc.Iterable`
+    :param codec: Codec to compress with
+    :type codec: :class:`~adbwp.compression.Codec`
+    :return: Iterator of non-empty compressed chunks
+    :rtype: :class:`~collections.abc.Iterator`
+    """
+    compressor = codec.compressor()
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    compressed = compressor.flush()
+    if compressed:
+        yield compressed
+
+
+def decompress(chunks: typing.Iterable[hints.Buffer], codec: Codec) -> typing.Iterator[hints.Bytes]:
+    """
+    Decompress a stream given as chunks, e.g. the data of DATA records of a RECV_V2 response.
+
+    :param chunks: Compressed data
+    :type chunks: :class:`~collections.abc.Iterable`
+    :param codec: Codec to decompress with
+    :type codec: :class:`~adbwp.compression.Codec`
+    :return: Iterator of non-empty decompressed chunks
+    :rtype: :class:`~collections.abc.Iterator`
+    """
+    decompressor = codec.decompressor()
+    for chunk in chunks:
+        decompressed = decompressor.decompress(chunk)
+        if decompressed:
+            yield decompressed
+
+
+register(ZlibCodec())
+register(BrotliCodec())
+register(LZ4Codec())
+register(ZstdCodec())
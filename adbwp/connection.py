@@ -0,0 +1,438 @@
+"""
+    adbwp.connection
+    ~~~~~~~~~~~~~~~~
+
+    Sans-IO multiplexing of streams over a single connection.
+"""
+import collections
+import heapq
+import time
+import typing
+
+from . import consts, enums, hints, limits, message
+
+__all__ = ['Stream', 'Connection']
+
+
+#: Largest stream id that can be allocated; ids are unsigned 32-bit words and zero is reserved.
+MAX_STREAM_ID = 0xffffffff
+
+
+# Flow control and coalescing state are flat public attributes read directly by callers and by the hot
+# paths of the connection, instead of being grouped into helper objects.
+class Stream:  # pylint: disable=too-many-instance-attributes
+    """
+    State of a single stream multiplexed by a :class:`~adbwp.connection.Connection`.
+
+    Received data payloads are buffered until read. Data written to the stream is buffered until the remote
+    system is ready for it. Without delayed acks, only one write message is outstanding until the remote system
+    replies with OKAY. With delayed acks, :attr:`~adbwp.connection.Stream.window` is the number of bytes that
+    can be sent before the remote system acknowledges more and :attr:`~adbwp.connection.Stream.in_flight` the
+    number of bytes sent but not yet acknowledged.
+
+    When written data is coalesced, :attr:`~adbwp.connection.Stream.deadline` is the time by which pending data
+    is sent even if it does not fill a data payload, or :data:`None` when there is no pending data.
+    """
+
+    __slots__ = ('local_id', 'remote_id', 'destination', 'state', 'writable', 'window', 'in_flight', 'deadline',
+                 '_received', '_pending')
+
+    def __init__(self, local_id: hints.Int, remote_id: hints.Int, destination: hints.Str,
+                 state: enums.StreamState) -> None:
+        self.local_id = local_id
+        self.remote_id = remote_id
+        self.destination = destination
+        self.state = state
+        self.writable = False
+        self.window = None  # type: typing.Optional[int]
+        self.in_flight = 0
+        self.deadline = None  # type: typing.Optional[float]
+        self._received = bytearray()
+        self._pending = bytearray()
+
+    def __repr__(self) -> hints.Str:
+        return '<{} {}:{} {!r} {}>'.format(type(self).__name__, self.local_id, self.remote_id,
+                                           self.destination, self.state)
+
+    @property
+    def received(self) -> hints.Int:
+        """
+        Number of received bytes that have not been read.
+
+        :return: Number of buffered received bytes
+        :rtype: :class:`~int`
+        """
+        return len(self._received)
+
+    @property
+    def pending(self) -> hints.Int:
+        """
+        Number of written bytes that have not been sent to the remote system.
+
+        :return: Number of buffered bytes to send
+        :rtype: :class:`~int`
+        """
+        return len(self._pending)
+
+    def read(self) -> hints.Bytes:
+        """
+        Read all received data payloads that have not been read.
+
+        :return: Received bytes
+        :rtype: :class:`~bytes`
+        """
+        data = bytes(self._received)
+        del self._received[:]
+        return data
+
+
+# The coalescing delay, clock and deadline heap are kept alongside the stream table because every write and
+# poll uses them together; the count exceeds the default limit by design.
+class Connection:  # pylint: disable=too-many-instance-attributes
+    """
+    Sans-IO multiplexer that tracks the state of all streams over a single connection.
+
+    Received messages are passed to :meth:`~adbwp.connection.Connection.receive`, which routes them to their
+    stream with a single dict lookup by local id. Messages that need to be sent in response to received ones
+    or to local calls are queued and retrieved with :meth:`~adbwp.connection.Connection.outgoing`.
+
+    When `window` is given, delayed acks are enabled for streams the remote system supports them on: the
+    window is advertised as the receive window of each stream and received data is only acknowledged once it
+    is read with :meth:`~adbwp.connection.Connection.read`, so the remote system cannot send more than the
+    window ahead of the reader. When `delayed_ack` is true and no `window` is given, the window is
+    :attr:`~adbwp.consts.DELAYED_ACK_WINDOW`. Only enable them when the remote system advertises the
+    "delayed_ack" feature.
+
+    When `delay` is given, small writes are coalesced: data written to a stream is held until it fills a data
+    payload of the negotiated max data, or until `delay` seconds after the first held write, and then sent in
+    as few write messages as possible. The connection does no I/O or timing of its own; `clock` is called
+    to get the current time, :meth:`~adbwp.connection.Connection.next_deadline` tells when the caller should
+    next call :meth:`~adbwp.connection.Connection.poll` and :meth:`~adbwp.connection.Connection.flush` sends
+    held data immediately.
+
+    The CONNECT and AUTH handshake is left to the caller. The :attr:`~adbwp.connection.Connection.limits`
+    attribute can be replaced once limits are negotiated.
+    """
+
+    __slots__ = ('limits', 'window', 'delay', 'clock', '_streams', '_next_id', '_outgoing', '_deadlines')
+
+    def __init__(self, limits: typing.Optional[limits.Limits] = None,  # pylint: disable=redefined-outer-name
+                 window: typing.Optional[hints.Int] = None, delay: typing.Optional[hints.Float] = None,
+                 clock: typing.Callable[[], hints.Float] = time.monotonic, delayed_ack: hints.Bool = False) -> None:
+        if delay is not None and delay < 0:
+            raise ValueError('Delay must not be negative; got {}'.format(delay))
+        if window is None and delayed_ack:
+            window = consts.DELAYED_ACK_WINDOW
+
+        self.limits = limits
+        self.window = window
+        self.delay = delay
+        self.clock = clock
+        self._streams = {}  # type: typing.Dict[int, Stream]
+        self._next_id = 1
+        self._outgoing = collections.deque()  # type: typing.Deque[message.Message]
+        self._deadlines = []  # type: typing.List[typing.Tuple[float, int]]
+
+    def __len__(self) -> hints.Int:
+        return len(self._streams)
+
+    def __contains__(self, local_id: hints.Int) -> hints.Bool:
+        return local_id in self._streams
+
+    def stream(self, local_id: hints.Int) -> Stream:
+        """
+        Get the stream with the given local id.
+
+        :param local_id: Identifier for the stream on the local end
+        :type local_id: :class:`~int`
+        :return: Stream with the local id
+        :rtype: :class:`~adbwp.connection.Stream`
+        :raises ValueError: When there is no stream with the local id
+        """
+        try:
+            return self._streams[local_id]
+        except KeyError:
+            raise ValueError('Unknown local id {}'.format(local_id)) from None
+
+    def outgoing(self) -> typing.List[message.Message]:
+        """
+        Get all messages queued to be sent to the remote system, removing them from the queue.
+
+        :return: Messages in the order they must be sent
+        :rtype: :class:`~list`
+        """
+        messages = list(self._outgoing)
+        self._outgoing.clear()
+        return messages
+
+    def open(self, destination: hints.Str) -> Stream:
+        """
+        Open a new stream to the given destination on the remote system.
+
+        :param destination: Stream destination
+        :type destination: :class:`~str`
+        :return: Stream in the :attr:`~adbwp.enums.StreamState.OPENING` state
+        :rtype: :class:`~adbwp.connection.Stream`
+        :raises ValueError: When all stream ids are in use
+        :raises ValueError: When data payload is greater than the negotiated max data
+        """
+        local_id = self._allocate_id()
+        self._outgoing.append(message.open(local_id, destination, self.limits, self.window or 0))
+        stream = self._streams[local_id] = Stream(local_id, 0, destination, enums.StreamState.OPENING)
+        return stream
+
+    def accept(self, local_id: hints.Int) -> Stream:
+        """
+        Accept a stream opened by the remote system.
+
+        :param local_id: Identifier for the stream on the local end
+        :type local_id: :class:`~int`
+        :return: Stream in the :attr:`~adbwp.enums.StreamState.OPEN` state
+        :rtype: :class:`~adbwp.connection.Stream`
+        :raises ValueError: When there is no stream with the local id
+        :raises ValueError: When the stream is not waiting to be accepted
+        """
+        stream = self.stream(local_id)
+        if stream.state != enums.StreamState.PENDING:
+            raise ValueError('Stream {} cannot be accepted when {}'.format(local_id, stream.state))
+
+        acked = self.window if stream.window is not None else None
+        self._outgoing.append(message.ready(local_id, stream.remote_id, acked))
+        stream.state = enums.StreamState.OPEN
+        stream.writable = True
+        self._send_pending(stream)
+        return stream
+
+    def write(self, local_id: hints.Int, data: hints.Buffer) -> Stream:
+        """
+        Write data to a stream. The data is sent as soon as the remote system is ready for it, split into data
+        payloads of at most the negotiated max data. When writes are coalesced, data that does not fill a data
+        payload is held until the deadline of the stream or an explicit flush.
+
+        :param local_id: Identifier for the stream on the local end
+        :type local_id: :class:`~int`
+        :param data: Data sent to the stream
+        :type data: :class:`~bytes`, :class:`~bytearray`, :class:`~str`, or :class:`~memoryview`
+        :return: Stream written to
+        :rtype: :class:`~adbwp.connection.Stream`
+        :raises ValueError: When there is no stream with the local id
+        :raises ValueError: When the stream is closed
+        """
+        stream = self.stream(local_id)
+        if stream.state == enums.StreamState.CLOSED:
+            raise ValueError('Stream {} is closed'.format(local_id))
+
+        with memoryview(data.encode('utf-8') if isinstance(data, str) else data) as view:
+            stream._pending += view.cast('B')  # pylint: disable=protected-access
+        if self.delay is not None and stream.deadline is None and stream.pending:
+            stream.deadline = self.clock() + self.delay
+            heapq.heappush(self._deadlines, (stream.deadline, local_id))
+        self._send_pending(stream)
+        return stream
+
+    def flush(self, local_id: typing.Optional[hints.Int] = None) -> None:
+        """
+        Send the data held by a stream, or by all streams, without waiting for their deadline. Data the remote
+        system is not ready for is sent as soon as it is.
+
+        :param local_id: (Optional) Identifier for the stream on the local end; all streams when omitted
+        :type local_id: :class:`~int`
+        :return: Nothing
+        :rtype: :class:`~NoneType`
+        :raises ValueError: When there is no stream with the local id
+        """
+        streams = self._streams.values() if local_id is None else (self.stream(local_id),)
+        now = None
+        for stream in streams:
+            if stream.deadline is not None:
+                now = self.clock() if now is None else now
+                stream.deadline = min(stream.deadline, now)
+                self._send_pending(stream)
+
+    def poll(self) -> None:
+        """
+        Send the data held by all streams whose deadline has passed.
+
+        :return: Nothing
+        :rtype: :class:`~NoneType`
+        """
+        deadlines = self._deadlines
+        now = self.clock()
+        while deadlines and deadlines[0][0] <= now:
+            deadline, local_id = heapq.heappop(deadlines)
+            stream = self._streams.get(local_id)
+            if stream is not None and stream.deadline == deadline:
+                self._send_pending(stream)
+
+    def next_deadline(self) -> typing.Optional[hints.Float]:
+        """
+        Get the earliest time at which a stream holds data that is not yet due, i.e. when
+        :meth:`~adbwp.connection.Connection.poll` should next be called.
+
+        :return: Earliest deadline of held data, or :data:`None` when no data is held
+        :rtype: :class:`~float`
+        """
+        deadlines = self._deadlines
+        while deadlines:
+            deadline, local_id = deadlines[0]
+            stream = self._streams.get(local_id)
+            if stream is not None and stream.deadline == deadline:
+                return deadline
+            heapq.heappop(deadlines)
+        return None
+
+    def read(self, local_id: hints.Int) -> hints.Bytes:
+        """
+        Read all data received by a stream that has not been read. With delayed acks, the read bytes are
+        acknowledged so the remote system can send more.
+
+        :param local_id: Identifier for the stream on the local end
+        :type local_id: :class:`~int`
+        :return: Received bytes
+        :rtype: :class:`~bytes`
+        :raises ValueError: When there is no stream with the local id
+        """
+        stream = self.stream(local_id)
+        data = stream.read()
+        if data and stream.window is not None and stream.state == enums.StreamState.OPEN:
+            self._outgoing.append(message.ready(local_id, stream.remote_id, len(data)))
+        return data
+
+    def close(self, local_id: hints.Int) -> Stream:
+        """
+        Close a stream, discarding any written data that has not been sent.
+
+        :param local_id: Identifier for the stream on the local end
+        :type local_id: :class:`~int`
+        :return: Stream in the :attr:`~adbwp.enums.StreamState.CLOSED` state
+        :rtype: :class:`~adbwp.connection.Stream`
+        :raises ValueError: When there is no stream with the local id
+        """
+        stream = self.stream(local_id)
+        del self._streams[local_id]
+        if stream.remote_id:
+            self._outgoing.append(message.close(local_id, stream.remote_id))
+        self._closed(stream)
+        return stream
+
+    def receive(self, msg: message.Message) -> typing.Optional[Stream]:
+        """
+        Update the state of the stream the given received message is addressed to, queueing any messages
+        that must be sent in response.
+
+        Messages for unknown streams are answered with CLSE. CONNECT and AUTH messages are ignored.
+
+        :param msg: Message received from the remote system
+        :type msg: :class:`~adbwp.message.Message`
+        :return: Stream the message was routed to, if any
+        :rtype: :class:`~adbwp.connection.Stream`
+        """
+        command, remote_id, local_id = msg.header.command, msg.header.arg0, msg.header.arg1
+
+        if command == enums.Command.OPEN:
+            return self._receive_open(remote_id, msg.header.arg1, msg.data)
+        if command not in (enums.Command.OKAY, enums.Command.WRTE, enums.Command.CLSE):
+            return None
+
+        stream = self._streams.get(local_id)
+        if stream is None or (stream.remote_id and stream.remote_id != remote_id):
+            if command != enums.Command.CLSE and remote_id:
+                self._outgoing.append(message.close(local_id, remote_id))
+            return None
+
+        if command == enums.Command.OKAY:
+            self._receive_ready(stream, remote_id, message.acked_bytes(msg))
+        elif command == enums.Command.WRTE:
+            stream._received += msg.data  # pylint: disable=protected-access
+            if stream.window is None:
+                self._outgoing.append(message.ready(local_id, remote_id))
+        else:
+            del self._streams[local_id]
+            self._closed(stream)
+        return stream
+
+    def _receive_open(self, remote_id: hints.Int, window: hints.Int, data: hints.Buffer) -> typing.Optional[Stream]:
+        """
+        Create a stream in the :attr:`~adbwp.enums.StreamState.PENDING` state for an OPEN from the remote system.
+        """
+        if not remote_id:
+            return None
+
+        local_id = self._allocate_id()
+        destination = bytes(data).rstrip(b'\0').decode('utf-8', 'replace')
+        stream = self._streams[local_id] = Stream(local_id, remote_id, destination, enums.StreamState.PENDING)
+        if self.window is not None and window:
+            stream.window = window
+        return stream
+
+    def _receive_ready(self, stream: Stream, remote_id: hints.Int, acked: typing.Optional[hints.Int]) -> None:
+        """
+        Update a stream for an OKAY from the remote system, sending the next data payloads if any.
+        """
+        if stream.state == enums.StreamState.OPENING:
+            stream.remote_id = remote_id
+            stream.state = enums.StreamState.OPEN
+            if self.window is not None and acked is not None:
+                stream.window = 0
+
+        if stream.window is not None and acked is not None:
+            stream.window += acked
+            stream.in_flight = max(0, stream.in_flight - acked)
+        stream.writable = True
+        self._send_pending(stream)
+
+    def _send_pending(self, stream: Stream) -> None:
+        """
+        Queue write messages with the next data payloads of a stream for as much as the remote system is
+        ready for: a single one without delayed acks, or up to the window with them. Before the deadline of
+        coalesced data, only full data payloads are sent.
+        """
+        pending = stream._pending  # pylint: disable=protected-access
+        if not (stream.writable and pending and stream.state == enums.StreamState.OPEN):
+            return
+
+        max_data = message.max_data(self.limits)
+        minimum = max_data if stream.deadline is not None and stream.deadline > self.clock() else 1
+        if len(pending) < minimum:
+            return
+
+        if stream.window is None:
+            data = bytes(pending[:max_data])
+            del pending[:max_data]
+            self._outgoing.append(message.write(stream.local_id, stream.remote_id, data, self.limits))
+            stream.writable = False
+        else:
+            while len(pending) >= minimum and stream.window > 0:
+                size = min(max_data, stream.window)
+                data = bytes(pending[:size])
+                del pending[:size]
+                self._outgoing.append(message.write(stream.local_id, stream.remote_id, data, self.limits))
+                stream.window -= len(data)
+                stream.in_flight += len(data)
+
+        if not pending:
+            stream.deadline = None
+
+    def _allocate_id(self) -> hints.Int:
+        """
+        Allocate the next local id that is not in use, wrapping around after :attr:`~adbwp.connection.MAX_STREAM_ID`.
+        """
+        streams = self._streams
+        if len(streams) >= MAX_STREAM_ID:
+            raise ValueError('All {} stream ids are in use'.format(MAX_STREAM_ID))
+
+        local_id = self._next_id
+        while local_id in streams:
+            local_id = local_id % MAX_STREAM_ID + 1
+        self._next_id = local_id % MAX_STREAM_ID + 1
+        return local_id
+
+    @staticmethod
+    def _closed(stream: Stream) -> None:
+        """
+        Mark a stream as closed, discarding data that has not been sent.
+        """
+        stream.state = enums.StreamState.CLOSED
+        stream.writable = False
+        stream.deadline = None
+        del stream._pending[:]  # pylint: disable=protected-access
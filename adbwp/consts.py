@@ -8,12 +8,24 @@
 #: Protocol version.
 VERSION = 0x01000000
 
+#: Protocol version from which data payload checksums are no longer computed or verified.
+VERSION_SKIP_CHECKSUM = 0x01000001
+
 #: Maximum message body size.
 MAXDATA = 256 * 1024
 
+#: Maximum message body size supported by newer ADB versions; advertised by them in CONNECT messages.
+MAX_PAYLOAD = 1024 * 1024
+
 #: Older ADB version max data size limit; required max for CONNECT and AUTH messages.
 CONNECT_AUTH_MAXDATA = 4096
 
+#: Default receive window, in bytes, advertised for each stream when delayed acks are enabled.
+DELAYED_ACK_WINDOW = 4 * MAX_PAYLOAD
+
+#: Maximum size of the data of a single sync service DATA record, and of a path or failure message.
+SYNC_DATA_MAX = 64 * 1024
+
 #: Size of a serialized ADB message in bytes.
 MESSAGE_SIZE = 24
 
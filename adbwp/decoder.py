@@ -0,0 +1,127 @@
+"""
+    adbwp.decoder
+    ~~~~~~~~~~~~~
+
+    Incremental decoding of a byte stream into messages.
+"""
+import typing
+
+from . import consts, header, hints, limits, message
+
+__all__ = ['Decoder']
+
+
+#: Default initial size of the receive buffer of a :class:`~adbwp.decoder.Decoder`; large enough
+#: to hold a single message with a maximum size data payload.
+BUFFER_SIZE = header.BYTES + consts.MAXDATA
+
+
+class Decoder:
+    """
+    Sans-IO decoder that consumes arbitrarily sized chunks of bytes and produces
+    :class:`~adbwp.message.Message` instances as soon as they are complete.
+
+    Received bytes are written into a single growable buffer and consumed by advancing an offset,
+    so the buffer is only compacted when it runs out of space at the end and only reallocated
+    when a single message does not fit.
+
+    The :attr:`~adbwp.decoder.Decoder.limits` attribute can be replaced once limits are negotiated.
+    """
+
+    __slots__ = ('limits', '_buffer', '_start', '_end', '_header')
+
+    def __init__(self, size: hints.Int = BUFFER_SIZE,
+                 limits: typing.Optional[limits.Limits] = None) -> None:  # pylint: disable=redefined-outer-name
+        self.limits = limits
+        self._buffer = bytearray(size)
+        self._start = 0
+        self._end = 0
+        self._header = None  # type: typing.Optional[header.Header]
+
+    def __len__(self) -> hints.Int:
+        """
+        Number of bytes that have been received but not yet consumed by a complete message.
+
+        :return: Number of buffered bytes
+        :rtype: :class:`~int`
+        """
+        return self._end - self._start
+
+    def feed(self, data: hints.Buffer) -> typing.Iterator[message.Message]:
+        """
+        Consume the given chunk of bytes and return an iterator of all messages that are now complete.
+
+        The chunk is buffered immediately; messages are decoded lazily as the returned iterator is consumed.
+        Messages not consumed from the iterator are yielded by the iterator returned from the next call.
+
+        :param data: Chunk of bytes received from the remote system
+        :type data: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+        :return: Iterator of complete messages
+        :rtype: :class:`~collections.abc.Iterator`
+        :raises UnpackError: When a header is invalid or its data length exceeds the maximum allowed
+        :raises ChecksumError: When data payload checksum doesn't match header checksum
+        """
+        self._write(data)
+        return self._messages()
+
+    def _write(self, data: hints.Buffer) -> None:
+        """
+        Copy the given chunk of bytes into the receive buffer, making room for it when necessary.
+        """
+        with memoryview(data) as view:
+            size = view.nbytes
+            if not size:
+                return
+
+            end = self._end + size
+            if end > len(self._buffer):
+                self._reserve(size)
+                end = self._end + size
+
+            self._buffer[self._end:end] = view.cast('B')
+            self._end = end
+
+    def _reserve(self, size: hints.Int) -> None:
+        """
+        Compact the receive buffer, growing it if necessary, so it can hold `size` more bytes.
+        """
+        buffered = self._end - self._start
+        required = buffered + size
+        capacity = len(self._buffer)
+
+        if required > capacity:
+            buffer = bytearray(max(required, capacity * 2))
+            buffer[:buffered] = self._buffer[self._start:self._end]
+            self._buffer = buffer
+        elif buffered:
+            self._buffer[:buffered] = self._buffer[self._start:self._end]
+
+        self._start = 0
+        self._end = buffered
+
+    def _messages(self) -> typing.Iterator[message.Message]:
+        """
+        Decode and yield all complete messages in the receive buffer.
+        """
+        while True:
+            if self._header is None:
+                if self._end - self._start < header.BYTES:
+                    break
+
+                self._header = header.from_buffer(self._buffer, self._start, message.max_data(self.limits))
+                self._start += header.BYTES
+
+            data_length = self._header.data_length
+            if self._end - self._start < data_length:
+                break
+
+            start = self._start
+            with memoryview(self._buffer) as view:
+                data = view[start:start + data_length].tobytes()
+
+            instance, self._header = self._header, None
+            self._start = start + data_length
+            if self._start == self._end:
+                self._start = self._end = 0
+
+            yield message.from_header(instance, data, self.limits)
@@ -20,6 +20,49 @@ class Command(enum.IntEnum):
     WRTE = 0x45545257
 
 
+class SyncId(enum.IntEnum):
+    """
+    Enumeration for record identifiers used by the file sync service protocol.
+    """
+    STAT = 0x54415453
+    LIST = 0x5453494c
+    SEND = 0x444e4553
+    RECV = 0x56434552
+    DENT = 0x544e4544
+    DONE = 0x454e4f44
+    DATA = 0x41544144
+    OKAY = 0x59414b4f
+    FAIL = 0x4c494146
+    QUIT = 0x54495551
+    SND2 = 0x32444e53
+    RCV2 = 0x32564352
+
+
+class SyncFlag(enum.IntEnum):
+    """
+    Enumeration for the flags of file sync service SEND_V2 and RECV_V2 requests; a compression codec
+    optionally combined with :attr:`~adbwp.enums.SyncFlag.DRY_RUN`.
+    """
+    NONE = 0
+    BROTLI = 0x01
+    LZ4 = 0x02
+    ZSTD = 0x04
+    DRY_RUN = 0x80000000  # Decompress and discard the sent data without writing the file.
+
+
+class ShellId(enum.IntEnum):
+    """
+    Enumeration for packet identifiers used by the shell protocol of the "shell_v2" feature.
+    """
+    STDIN = 0
+    STDOUT = 1
+    STDERR = 2
+    EXIT = 3
+    CLOSE_STDIN = 4
+    WINDOW_SIZE_CHANGE = 5
+    INVALID = 255
+
+
 class CommandResponse(enum.Enum):
     """
     Enumeration for response message types from ADB connection requests.
@@ -31,6 +74,31 @@ class CommandResponse(enum.Enum):
         return str(self.value)
 
 
+class HostResponseType(enum.Enum):
+    """
+    Enumeration for the forms of responses to requests made to the ADB server over its host protocol.
+    """
+    STATUS = 'status'  # OKAY, e.g. for "host:transport:<serial>".
+    DATA = 'data'  # OKAY followed by one length prefixed data payload, e.g. for "host:version".
+    STREAM = 'stream'  # OKAY followed by length prefixed data payloads until closed, e.g. for "host:track-devices".
+
+    def __str__(self):
+        return str(self.value)
+
+
+class StreamState(enum.Enum):
+    """
+    Enumeration for the states of a stream multiplexed over a connection.
+    """
+    OPENING = 'opening'  # OPEN sent, waiting for the remote system to reply with OKAY.
+    PENDING = 'pending'  # OPEN received, waiting for the local end to accept or reject it.
+    OPEN = 'open'
+    CLOSED = 'closed'
+
+    def __str__(self):
+        return str(self.value)
+
+
 class AuthType(enum.IntEnum):
     """
     Enumeration for authentication types used by the ADB protocol.
@@ -7,19 +7,32 @@
 import struct
 import typing
 
-from . import consts, enums, exceptions, hints
+from . import consts, enums, exceptions, hints, metrics
 
-__all__ = ['Header', 'new', 'to_bytes', 'from_bytes']
+__all__ = ['Header', 'new', 'to_bytes', 'from_bytes', 'to_buffer', 'from_buffer', 'unpack_from', 'iter_from_buffer']
 
 
 #: Struct pack/unpack string for handling six unsigned integers that represent a header.
 HEADER_FORMAT = '<6I'
 
 
+#: Precompiled :class:`~struct.Struct` for :attr:`~adbwp.header.HEADER_FORMAT`.
+HEADER_STRUCT = struct.Struct(HEADER_FORMAT)
+
+
 #: Size of header in bytes.
 BYTES = 24
 
 
+#: Mapping of :class:`~adbwp.enums.Command` int values to their members; a plain dict lookup is several
+#: times faster than calling :class:`~adbwp.enums.Command` with the value.
+COMMAND_BY_VALUE = {command.value: command for command in enums.Command}
+
+
+#: Command values whose data payloads are always limited to :attr:`~adbwp.consts.CONNECT_AUTH_MAXDATA`.
+CONNECT_AUTH_COMMANDS = frozenset((enums.Command.CNXN.value, enums.Command.AUTH.value))
+
+
 class Header(typing.NamedTuple('Header', [('command', hints.Command),  # pylint: disable=inherit-non-class
                                           ('arg0', hints.Int), ('arg1', hints.Int),
                                           ('data_length', hints.Int), ('data_checksum', hints.Int),
@@ -168,10 +181,13 @@ def to_bytes(header: Header) -> hints.Bytes:
     :rtype: :class:`~bytes`
     :raises PackError: when unable to pack instance into 6 bytes
     """
-    try:
-        return struct.pack(HEADER_FORMAT, *header)
-    except struct.error as ex:
-        raise exceptions.PackError('Failed to pack header into bytes') from ex
+    if metrics.SINK is None:
+        return _to_bytes(header)
+
+    started = metrics.start()
+    data = _to_bytes(header)
+    metrics.record(metrics.HEADER_TO_BYTES, header.command, BYTES, started)
+    return data
 
 
 def from_bytes(header: hints.Bytes) -> Header:
@@ -183,10 +199,162 @@ def from_bytes(header: hints.Bytes) -> Header:
     :return: Bytes converted to a header
     :rtype: :class:`~adbwp.header.Header`
     :raises UnpackError: When unable to unpack instance from bytes
+    :raises UnpackError: When the command is unknown
+    """
+    if metrics.SINK is None:
+        return _from_bytes(header)
+
+    started = metrics.start()
+    instance = _from_bytes(header)
+    metrics.record(metrics.HEADER_FROM_BYTES, instance.command, BYTES, started)
+    return instance
+
+
+def to_buffer(headers: typing.Iterable[Header], buffer: hints.Buffer, offset: hints.Int = 0) -> hints.Int:
+    """
+    Pack the given :class:`~adbwp.header.Header` instances back to back into a writable buffer.
+
+    No intermediate :class:`~bytes` are created; each header is packed in place at consecutive offsets.
+
+    :param headers: Message headers
+    :type headers: :class:`~collections.abc.Iterable`
+    :param buffer: Writable buffer, e.g. a preallocated :class:`~bytearray`
+    :type buffer: :class:`~bytearray` or :class:`~memoryview`
+    :param offset: (Optional) Offset in the buffer of the first header
+    :type offset: :class:`~int`
+    :return: Offset in the buffer immediately after the last header
+    :rtype: :class:`~int`
+    :raises PackError: when unable to pack a header or the buffer is too small
+    """
+    pack_into = HEADER_STRUCT.pack_into
+    try:
+        for header in headers:
+            pack_into(buffer, offset, *header)
+            offset += BYTES
+    except struct.error as ex:
+        raise exceptions.PackError('Failed to pack header into buffer at offset {}'.format(offset)) from ex
+    return offset
+
+
+def iter_from_buffer(buffer: hints.Buffer) -> typing.Iterator[Header]:
+    """
+    Create an iterator of :class:`~adbwp.header.Header` from a buffer of contiguous headers.
+
+    :param buffer: Buffer containing headers packed back to back
+    :type buffer: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+    :return: Iterator of headers converted from the buffer
+    :rtype: :class:`~collections.abc.Iterator`
+    :raises UnpackError: When the buffer length is not a multiple of the header size
+    :raises UnpackError: When a command is unknown
     """
     try:
-        command, *args = struct.unpack(HEADER_FORMAT, header)
+        values = HEADER_STRUCT.iter_unpack(buffer)
+    except struct.error as ex:
+        raise exceptions.UnpackError('Failed to unpack headers from buffer') from ex
+    return (new(_command(command), *args) for command, *args in values)
+
+
+def from_buffer(buffer: hints.Buffer, offset: hints.Int = 0, max_data: hints.Int = consts.MAXDATA) -> Header:
+    """
+    Create a :class:`~adbwp.header.Header` from the bytes at the given offset of a buffer, validating it
+    before any of its data payload is read.
+
+    Unlike :func:`~adbwp.header.from_bytes`, the magic value and data length are checked in the same pass so
+    invalid headers are rejected as soon as they are received.
+
+    :param buffer: Buffer containing a header
+    :type buffer: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+    :param offset: (Optional) Offset of the header in the buffer
+    :type offset: :class:`~int`
+    :param max_data: (Optional) Maximum data payload size for commands other than CONNECT and AUTH
+    :type max_data: :class:`~int`
+    :return: Header converted from the buffer
+    :rtype: :class:`~adbwp.header.Header`
+    :raises UnpackError: When unable to unpack the header, its command is unknown, its magic does not
+        match its command or its data length exceeds the maximum allowed
+    """
+    if metrics.SINK is None:
+        return _from_buffer(buffer, offset, max_data)
+
+    started = metrics.start()
+    instance = _from_buffer(buffer, offset, max_data)
+    metrics.record(metrics.HEADER_FROM_BUFFER, instance.command, BYTES, started)
+    return instance
+
+
+def unpack_from(buffer: hints.Buffer, offset: hints.Int = 0,
+                max_data: hints.Int = consts.MAXDATA) -> typing.Tuple[hints.Int, ...]:
+    """
+    Unpack and validate the six words of a header at the given offset of a buffer as plain :class:`~int`
+    values, without creating a :class:`~adbwp.header.Header`.
+
+    :param buffer: Buffer containing a header
+    :type buffer: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+    :param offset: (Optional) Offset of the header in the buffer
+    :type offset: :class:`~int`
+    :param max_data: (Optional) Maximum data payload size for commands other than CONNECT and AUTH
+    :type max_data: :class:`~int`
+    :return: Command, arg0, arg1, data length, data checksum and magic values
+    :rtype: :class:`~tuple`
+    :raises UnpackError: When unable to unpack the header, its command is unknown, its magic does not
+        match its command or its data length exceeds the maximum allowed
+    """
+    try:
+        values = HEADER_STRUCT.unpack_from(buffer, offset)
+    except struct.error as ex:
+        raise exceptions.UnpackError('Failed to unpack header from buffer at offset {}'.format(offset)) from ex
+
+    command, _, _, data_length, _, magic_value = values
+    if command not in COMMAND_BY_VALUE:
+        raise exceptions.UnpackError('Unknown command {:#010x} in header at offset {}'.format(command, offset))
+    if magic_value != command ^ consts.COMMAND_MASK:
+        raise exceptions.UnpackError('Expected magic {:#010x} for {} header at offset {}; got {:#010x}'.format(
+            command ^ consts.COMMAND_MASK, COMMAND_BY_VALUE[command], offset, magic_value))
+
+    max_length = consts.CONNECT_AUTH_MAXDATA if command in CONNECT_AUTH_COMMANDS else max_data
+    if data_length > max_length:
+        raise exceptions.UnpackError('Data length for {} message at offset {} cannot be more than {}; got {}'.format(
+            COMMAND_BY_VALUE[command], offset, max_length, data_length))
+
+    return values
+
+
+def _to_bytes(header: Header) -> hints.Bytes:
+    """
+    Pack the given :class:`~adbwp.header.Header` into :class:`~bytes`.
+    """
+    try:
+        return HEADER_STRUCT.pack(*header)
+    except struct.error as ex:
+        raise exceptions.PackError('Failed to pack header into bytes') from ex
+
+
+def _from_bytes(header: hints.Bytes) -> Header:
+    """
+    Unpack a :class:`~adbwp.header.Header` from the given :class:`~bytes`.
+    """
+    try:
+        command, *args = HEADER_STRUCT.unpack(header)
     except struct.error as ex:
         raise exceptions.UnpackError('Failed to unpack header from bytes') from ex
     else:
-        return new(enums.Command(command), *args)
+        return new(_command(command), *args)
+
+
+def _from_buffer(buffer: hints.Buffer, offset: hints.Int, max_data: hints.Int) -> Header:
+    """
+    Unpack and validate a :class:`~adbwp.header.Header` at the given offset of a buffer.
+    """
+    command, arg0, arg1, data_length, data_checksum, magic_value = unpack_from(buffer, offset, max_data)
+    return Header(COMMAND_BY_VALUE[command], arg0, arg1,  # pylint: disable=too-many-function-args
+                  data_length, data_checksum, magic_value)
+
+
+def _command(value: hints.Int) -> enums.Command:
+    """
+    Get the :class:`~adbwp.enums.Command` member for the given int value.
+    """
+    try:
+        return COMMAND_BY_VALUE[value]
+    except KeyError:
+        raise exceptions.UnpackError('Unknown command {:#010x}'.format(value)) from None
@@ -20,6 +20,10 @@ Bool = bool
 Int = int  # pylint: disable=invalid-name
 
 
+#: Type hint that is an alias for the built-in :class:`~float` type.
+Float = float  # pylint: disable=invalid-name
+
+
 #: Type hint that is an alias for the built-in :class:`~str` type.
 Str = str  # pylint: disable=invalid-name
 
@@ -0,0 +1,249 @@
+"""
+    adbwp.host
+    ~~~~~~~~~~
+
+    Sans-IO encoding and decoding of the host protocol spoken by the ADB server on its smart socket.
+"""
+import collections
+import typing
+
+from . import enums, exceptions, hints, payload
+
+__all__ = ['Response', 'Decoder', 'request', 'transport', 'okay', 'fail']
+
+
+#: Number of hexadecimal digits of the length prefix of requests and data payloads.
+LENGTH_DIGITS = 4
+
+
+#: Largest length that fits in the length prefix.
+MAX_LENGTH = 0xffff
+
+
+#: Size of the OKAY and FAIL status of responses.
+STATUS_SIZE = 4
+
+
+#: Bytes that are valid in a length prefix.
+HEX_DIGITS = frozenset(b'0123456789abcdefABCDEF')
+
+
+#: Response status by their bytes on the wire.
+STATUS_BY_BYTES = {status.value.encode('ascii'): status for status in enums.CommandResponse}
+
+
+class Response(typing.NamedTuple('Response', [  # pylint: disable=inherit-non-class
+        ('service', hints.Str),
+        ('status', enums.CommandResponse),
+        ('data', typing.Optional[bytes])])):
+    """
+    Represents a response of the ADB server to the request for a service.
+
+    The data is the length prefixed data payload of DATA and STREAM responses, or the reason of FAIL
+    responses, and :data:`None` for responses without one. STREAM responses produce a response without
+    data for their OKAY followed by one for each data payload.
+    """
+
+
+class Decoder:
+    """
+    Sans-IO decoder that consumes the bytes received from the ADB server and produces responses as soon as
+    they are complete, so that requests can be pipelined over a single socket.
+
+    Responses are not self-describing; whether an OKAY is followed by a data payload depends on the service.
+    Each request sent is registered in order with :meth:`~adbwp.host.Decoder.expect`.
+
+    The stock ADB server closes the socket after responding to most "host:" requests; pipelining requires a
+    server that keeps it open. Requests for a device, e.g. after "host:transport:<serial>", switch the socket
+    to the device and end the host protocol.
+    """
+
+    __slots__ = ('_expected', '_buffer', '_streaming')
+
+    def __init__(self) -> None:
+        self._expected = collections.deque()  # type: typing.Deque[typing.Tuple[str, enums.HostResponseType]]
+        self._buffer = bytearray()
+        self._streaming = False
+
+    def __len__(self) -> hints.Int:
+        """
+        Number of bytes that have been received but not yet consumed by a complete response.
+
+        :return: Number of buffered bytes
+        :rtype: :class:`~int`
+        """
+        return len(self._buffer)
+
+    @property
+    def expected(self) -> typing.List[typing.Tuple[str, enums.HostResponseType]]:
+        """
+        Services and response types of requests whose response has not been completely received, in order.
+
+        :return: Service and response type pairs
+        :rtype: :class:`~list`
+        """
+        return list(self._expected)
+
+    def expect(self, service: hints.Str,
+               response_type: enums.HostResponseType = enums.HostResponseType.DATA) -> None:
+        """
+        Register a request sent to the ADB server whose response should be decoded after the responses of the
+        previously registered ones.
+
+        :param service: Service of the request, e.g. "host:version"
+        :type service: :class:`~str`
+        :param response_type: (Optional) Form of the response of the service
+        :type response_type: :class:`~adbwp.enums.HostResponseType`
+        :return: Nothing
+        :rtype: :class:`~NoneType`
+        :raises ValueError: When a STREAM response is expected, which never ends
+        """
+        if self._expected and self._expected[-1][1] == enums.HostResponseType.STREAM:
+            raise ValueError('Cannot expect a response after the STREAM response of {!r}'.format(
+                self._expected[-1][0]))
+        self._expected.append((service, enums.HostResponseType(response_type)))
+
+    def feed(self, data: hints.Buffer) -> typing.List[Response]:
+        """
+        Consume the given bytes and return all responses that are now complete.
+
+        :param data: Bytes received from the ADB server
+        :type data: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+        :return: Complete responses in the order they were received
+        :rtype: :class:`~list`
+        :raises UnpackError: When a response is malformed or unexpected
+        """
+        buffer = self._buffer
+        buffer += data
+
+        responses = []
+        offset = 0
+        while True:
+            decoded = self._decode(buffer, offset)
+            if decoded is None:
+                break
+            response, offset = decoded
+            responses.append(response)
+
+        del buffer[:offset]
+        return responses
+
+    def _decode(self, buffer: bytearray, offset: hints.Int) -> typing.Optional[typing.Tuple[Response, int]]:
+        """
+        Decode the response at the given offset, returning it and the offset of the next one, or :data:`None`
+        when it is not complete.
+        """
+        available = len(buffer) - offset
+        if not available:
+            return None
+        if not self._expected:
+            raise exceptions.UnpackError('Unexpected response without a request')
+
+        service, response_type = self._expected[0]
+        if self._streaming:
+            decoded = _length_prefixed(buffer, offset)
+            if decoded is None:
+                return None
+            value, end = decoded
+            return Response(service, enums.CommandResponse.OKAY, value), end  # pylint: disable=too-many-function-args
+
+        if available < STATUS_SIZE:
+            return None
+        status = STATUS_BY_BYTES.get(bytes(buffer[offset:offset + STATUS_SIZE]))
+        if status is None:
+            raise exceptions.UnpackError('Expected OKAY or FAIL response to {!r}; got {!r}'.format(
+                service, bytes(buffer[offset:offset + STATUS_SIZE])))
+
+        value, end = None, offset + STATUS_SIZE
+        if status == enums.CommandResponse.FAIL or response_type == enums.HostResponseType.DATA:
+            decoded = _length_prefixed(buffer, end)
+            if decoded is None:
+                return None
+            value, end = decoded
+
+        if status == enums.CommandResponse.OKAY and response_type == enums.HostResponseType.STREAM:
+            self._streaming = True
+        else:
+            self._expected.popleft()
+        return Response(service, status, value), end  # pylint: disable=too-many-function-args
+
+
+def request(service: hints.Str) -> hints.Bytes:
+    """
+    Create a request for a service of the ADB server, e.g. "host:version", prefixed by its length.
+
+    :param service: Service to request
+    :type service: :class:`~str` or :class:`~bytes`
+    :return: Request
+    :rtype: :class:`~bytes`
+    :raises ValueError: When the service is longer than :attr:`~adbwp.host.MAX_LENGTH`
+    """
+    return _prefix(payload.as_bytes(service))
+
+
+def transport(serial: typing.Optional[hints.Str] = None) -> hints.Bytes:
+    """
+    Create a request that switches the socket to a device, after which requests are sent to its services.
+
+    :param serial: (Optional) Serial of the device; any single device when omitted
+    :type serial: :class:`~str`
+    :return: Request
+    :rtype: :class:`~bytes`
+    """
+    return request('host:transport-any' if serial is None else 'host:transport:{}'.format(serial))
+
+
+def okay(data: typing.Optional[hints.Buffer] = None) -> hints.Bytes:
+    """
+    Create an OKAY response, optionally followed by a length prefixed data payload.
+
+    :param data: (Optional) Data payload of a DATA response
+    :type data: :class:`~bytes`, :class:`~bytearray`, :class:`~str`, or :class:`~memoryview`
+    :return: Response
+    :rtype: :class:`~bytes`
+    :raises ValueError: When the data payload is longer than :attr:`~adbwp.host.MAX_LENGTH`
+    """
+    status = enums.CommandResponse.OKAY.value.encode('ascii')
+    return status if data is None else status + _prefix(payload.as_bytes(data))
+
+
+def fail(reason: hints.Str) -> hints.Bytes:
+    """
+    Create a FAIL response followed by the length prefixed reason.
+
+    :param reason: Reason of the failure
+    :type reason: :class:`~str`
+    :return: Response
+    :rtype: :class:`~bytes`
+    :raises ValueError: When the reason is longer than :attr:`~adbwp.host.MAX_LENGTH`
+    """
+    return enums.CommandResponse.FAIL.value.encode('ascii') + _prefix(payload.as_bytes(reason))
+
+
+def _prefix(data: hints.Bytes) -> hints.Bytes:
+    """
+    Prefix the given data with its length in hexadecimal.
+    """
+    if len(data) > MAX_LENGTH:
+        raise ValueError('Length must be at most {}; got {}'.format(MAX_LENGTH, len(data)))
+    return '{:04x}'.format(len(data)).encode('ascii') + data
+
+
+def _length_prefixed(buffer: bytearray, offset: hints.Int) -> typing.Optional[typing.Tuple[bytes, int]]:
+    """
+    Decode the length prefixed data at the given offset, returning it and the offset after it, or
+    :data:`None` when it is not complete.
+    """
+    start = offset + LENGTH_DIGITS
+    if len(buffer) < start:
+        return None
+
+    prefix = buffer[offset:start]
+    if not HEX_DIGITS.issuperset(prefix):
+        raise exceptions.UnpackError('Expected length prefix of {} hexadecimal digits; got {!r}'.format(
+            LENGTH_DIGITS, bytes(prefix)))
+
+    end = start + int(prefix, 16)
+    if len(buffer) < end:
+        return None
+    return bytes(buffer[start:end]), end
@@ -0,0 +1,190 @@
+"""
+    adbwp.identity
+    ~~~~~~~~~~~~~~
+
+    Object representation of the system identity advertised in a connect message.
+"""
+import functools
+import types
+import typing
+
+from . import enums, hints, payload
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from . import message  # pylint: disable=cyclic-import
+
+__all__ = ['SystemIdentity', 'from_bytes', 'from_message', 'banner']
+
+
+#: Feature advertised when the "shell" service supports the shell protocol with separate output streams.
+FEATURE_SHELL_V2 = 'shell_v2'
+
+
+#: Feature advertised when the "cmd" service is available.
+FEATURE_CMD = 'cmd'
+
+
+#: Feature advertised when the sync STAT request has a version with 64-bit sizes and full stat fields.
+FEATURE_STAT_V2 = 'stat_v2'
+
+
+#: Feature advertised when the sync LIST request has a version with 64-bit sizes and full stat fields.
+FEATURE_LS_V2 = 'ls_v2'
+
+
+#: Feature advertised when streams support delayed acks, i.e. windowed flow control.
+FEATURE_DELAYED_ACK = 'delayed_ack'
+
+
+#: Feature advertised when the sync SEND and RECV requests have a version with compression.
+FEATURE_SENDRECV_V2 = 'sendrecv_v2'
+
+
+#: Feature advertised when sync SEND and RECV requests support brotli compression.
+FEATURE_SENDRECV_V2_BROTLI = 'sendrecv_v2_brotli'
+
+
+#: Feature advertised when sync SEND and RECV requests support LZ4 compression.
+FEATURE_SENDRECV_V2_LZ4 = 'sendrecv_v2_lz4'
+
+
+#: Feature advertised when sync SEND and RECV requests support Zstandard compression.
+FEATURE_SENDRECV_V2_ZSTD = 'sendrecv_v2_zstd'
+
+
+#: Feature advertised when sync SEND requests support dry runs.
+FEATURE_SENDRECV_V2_DRY_RUN_SEND = 'sendrecv_v2_dry_run_send'
+
+
+#: Feature advertised when the "abb" service is available.
+FEATURE_ABB = 'abb'
+
+
+#: Feature advertised when the "abb_exec" service is available.
+FEATURE_ABB_EXEC = 'abb_exec'
+
+
+#: Property of the banner that holds the comma separated features.
+FEATURES_PROPERTY = 'features'
+
+
+#: Maximum number of distinct system identity strings whose parsed identities are cached.
+CACHE_SIZE = 256
+
+
+class SystemIdentity(typing.NamedTuple('SystemIdentity', [  # pylint: disable=inherit-non-class
+        ('system_type', hints.SystemType),
+        ('serial', hints.Str),
+        ('banner', hints.Str),
+        ('property_items', typing.Tuple[typing.Tuple[str, str], ...]),
+        ('features', typing.FrozenSet[str])])):
+    """
+    Represents the "system-identity-string" data payload of a connect message.
+
+    The string is "systemtype:serial:banner", where the banner of modern systems is a list of "key=value"
+    properties separated by semicolons, e.g. "ro.product.name=x;features=shell_v2,cmd". Properties are kept
+    as a tuple of key and value pairs, in order, so identities are hashable and can be used as keys, and the
+    "features" property is split into :attr:`~adbwp.identity.SystemIdentity.features`. System types that are
+    not a known :class:`~adbwp.enums.SystemType` are kept as :class:`~str`.
+    """
+
+    @property
+    def properties(self) -> typing.Mapping[str, str]:
+        """
+        Read-only mapping of the properties of the banner.
+
+        :return: Property values by key
+        :rtype: :class:`~types.MappingProxyType`
+        """
+        return types.MappingProxyType(dict(self.property_items))
+
+    def supports(self, *features: hints.Str) -> hints.Bool:
+        """
+        Check if the system advertised all given features.
+
+        :param features: Feature names, e.g. :attr:`~adbwp.identity.FEATURE_SHELL_V2`
+        :type features: :class:`~str`
+        :return: Bool indicating if all features are advertised or not.
+        :rtype: :class:`~bool`
+        """
+        return self.features.issuperset(features)
+
+
+def from_bytes(data: hints.Buffer) -> SystemIdentity:
+    """
+    Create a :class:`~adbwp.identity.SystemIdentity` from a system identity string.
+
+    Parsed identities are cached per string, so identical systems reconnecting share the same instance.
+
+    :param data: System identity string, optionally null terminated
+    :type data: :class:`~bytes`, :class:`~bytearray`, :class:`~str`, or :class:`~memoryview`
+    :return: Parsed system identity
+    :rtype: :class:`~adbwp.identity.SystemIdentity`
+    """
+    if not isinstance(data, (bytes, str)):
+        data = bytes(data)
+    return _from_bytes(data)
+
+
+def from_message(message: 'message.Message') -> SystemIdentity:
+    """
+    Create a :class:`~adbwp.identity.SystemIdentity` from a connect message received from the remote system.
+
+    :param message: Received connect message
+    :type message: :class:`~adbwp.message.Message`
+    :return: Parsed system identity
+    :rtype: :class:`~adbwp.identity.SystemIdentity`
+    :raises ValueError: When the message is not a connect message
+    """
+    if message.header.command != enums.Command.CNXN:
+        raise ValueError('Expected {} message; got {}'.format(enums.Command.CNXN, message.header.command))
+
+    return from_bytes(message.data)
+
+
+def banner(properties: typing.Optional[typing.Mapping[str, str]] = None,
+           features: typing.Iterable[str] = ()) -> hints.Str:
+    """
+    Create a banner of properties and features for a connect message, e.g. to advertise the features
+    supported by the local end.
+
+    :param properties: (Optional) Properties to advertise, in order
+    :type properties: :class:`~collections.abc.Mapping`
+    :param features: (Optional) Features to advertise, sorted by name
+    :type features: :class:`~collections.abc.Iterable`
+    :return: Banner of "key=value" properties separated by semicolons
+    :rtype: :class:`~str`
+    :raises ValueError: When a property key is empty or a property key or value contains a separator
+    """
+    items = list((properties or {}).items())
+    features = sorted(features)
+    if features:
+        items.append((FEATURES_PROPERTY, ','.join(features)))
+
+    for key, value in items:
+        if not key or '=' in key or ';' in key or ';' in value:
+            raise ValueError('Property {!r} with value {!r} contains a separator'.format(key, value))
+    return ';'.join('{}={}'.format(key, value) for key, value in items)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _from_bytes(data: typing.Union[bytes, str]) -> SystemIdentity:
+    """
+    Parse a system identity string; see :func:`~adbwp.identity.from_bytes`.
+    """
+    string = payload.as_bytes(data).rstrip(b'\0').decode('utf-8', 'replace')
+    system_type, serial, banner_ = (string.split(':', 2) + ['', ''])[:3]
+
+    properties = {}
+    for prop in banner_.split(';'):
+        key, sep, value = prop.partition('=')
+        if sep and key:
+            properties[key] = value
+
+    features = frozenset(filter(None, properties.get(FEATURES_PROPERTY, '').split(',')))
+    try:
+        system_type = enums.SystemType(system_type)
+    except ValueError:
+        pass
+    return SystemIdentity(system_type, serial, banner_,  # pylint: disable=too-many-function-args
+                          tuple(properties.items()), features)
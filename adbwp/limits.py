@@ -0,0 +1,110 @@
+"""
+    adbwp.limits
+    ~~~~~~~~~~~~
+
+    Object representation of the limits negotiated for a connection.
+"""
+import typing
+
+from . import consts, enums, header, hints
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from . import message  # pylint: disable=cyclic-import
+
+__all__ = ['Limits', 'new', 'from_header', 'from_message', 'DEFAULT']
+
+
+class Limits(typing.NamedTuple('Limits', [('version', hints.Int),  # pylint: disable=inherit-non-class
+                                          ('max_data', hints.Int)])):
+    """
+    Represents the protocol version and maximum data payload size used by a connection.
+
+    Both ends advertise their values in a CONNECT message; the connection uses the lower of each.
+    """
+
+    @property
+    def checksum(self) -> hints.Bool:
+        """
+        Indicates whether or not data payload checksums are computed and verified. Checksums are skipped
+        only when both ends advertise at least :attr:`~adbwp.consts.VERSION_SKIP_CHECKSUM`.
+
+        :return: Bool indicating if checksums are used or not.
+        :rtype: :class:`~bool`
+        """
+        return self.version < consts.VERSION_SKIP_CHECKSUM
+
+    def max_data_length(self, command: hints.Command) -> hints.Int:
+        """
+        Get the maximum size of the data payload for a message of the given command.
+
+        CONNECT and AUTH messages are exchanged before limits are negotiated, so they are always
+        limited to :attr:`~adbwp.consts.CONNECT_AUTH_MAXDATA`.
+
+        :param command: Command identifier
+        :type command: :class:`~adbwp.enums.Command` or :class:`~int`
+        :return: Maximum data payload size
+        :rtype: :class:`~int`
+        """
+        if command in (enums.Command.CNXN, enums.Command.AUTH):
+            return consts.CONNECT_AUTH_MAXDATA
+        return self.max_data
+
+
+def new(version: hints.Int = consts.VERSION, max_data: hints.Int = consts.MAXDATA) -> Limits:
+    """
+    Create a new :class:`~adbwp.limits.Limits` instance with optional default values.
+
+    :param version: (Optional) Protocol version
+    :type version: :class:`~int`
+    :param max_data: (Optional) Maximum data payload size
+    :type max_data: :class:`~int`
+    :return: Limits instance created from values
+    :rtype: :class:`~adbwp.limits.Limits`
+    :raises ValueError: When max data is not positive
+    """
+    if max_data <= 0:
+        raise ValueError('Max data must be greater than zero; got {}'.format(max_data))
+
+    return Limits(version, max_data)  # pylint: disable=too-many-function-args
+
+
+# pylint: disable=redefined-outer-name
+def from_header(header: header.Header, local: typing.Optional[Limits] = None) -> Limits:
+    """
+    Create a :class:`~adbwp.limits.Limits` negotiated from the header of a CONNECT message received from
+    the remote system and the limits of the local end.
+
+    :param header: Header of a received connect message
+    :type header: :class:`~adbwp.header.Header`
+    :param local: (Optional) Limits advertised by the local end; defaults to :attr:`~adbwp.limits.DEFAULT`
+    :type local: :class:`~adbwp.limits.Limits`
+    :return: Lower of the local and remote version and max data
+    :rtype: :class:`~adbwp.limits.Limits`
+    :raises ValueError: When the header is not for a connect message
+    """
+    if header.command != enums.Command.CNXN:
+        raise ValueError('Expected {} message; got {}'.format(enums.Command.CNXN, header.command))
+
+    local = local or DEFAULT
+    return new(min(local.version, header.arg0), min(local.max_data, header.arg1))
+
+
+def from_message(message: 'message.Message', local: typing.Optional[Limits] = None) -> Limits:
+    """
+    Create a :class:`~adbwp.limits.Limits` negotiated from a CONNECT message received from the remote system
+    and the limits of the local end.
+
+    :param message: Received connect message
+    :type message: :class:`~adbwp.message.Message`
+    :param local: (Optional) Limits advertised by the local end; defaults to :attr:`~adbwp.limits.DEFAULT`
+    :type local: :class:`~adbwp.limits.Limits`
+    :return: Lower of the local and remote version and max data
+    :rtype: :class:`~adbwp.limits.Limits`
+    :raises ValueError: When the message is not a connect message
+    """
+    return from_header(message.header, local)
+# pylint: enable=redefined-outer-name
+
+
+#: Limits used when none are given; matches :attr:`~adbwp.consts.VERSION` and :attr:`~adbwp.consts.MAXDATA`.
+DEFAULT = new()
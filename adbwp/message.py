@@ -5,12 +5,14 @@
     Object representation of a message.
 """
 import collections
+import struct
 import typing
 
-from . import consts, enums, exceptions, header, hints, payload
+from . import consts, enums, exceptions, header, hints, limits, metrics, payload
 
-__all__ = ['Message', 'new', 'from_header', 'connect', 'auth_signature', 'auth_rsa_public_key',
-           'open', 'ready', 'write', 'close']
+__all__ = ['Message', 'BufferIterator', 'new', 'from_header', 'iter_from_buffer', 'to_buffers', 'to_bytes',
+           'max_data', 'max_data_length', 'connect', 'auth_signature', 'auth_rsa_public_key', 'open', 'ready',
+           'acked_bytes', 'write', 'write_stream', 'close']
 
 
 #: Mapping of thee :class:`~adbwp.enums.Command` int value to an :class:`~int` that represents
@@ -21,6 +23,11 @@ MAX_DATA_LENGTH_BY_COMMAND = collections.defaultdict(lambda: consts.MAXDATA, {
 })
 
 
+#: Struct pack/unpack string for the data payload of a ready message that acknowledges a number of bytes
+#: when delayed acks are enabled.
+ACKED_BYTES_STRUCT = struct.Struct('<I')
+
+
 class Message(typing.NamedTuple('Message', [('header', header.Header),  # pylint: disable=inherit-non-class
                                             ('data', hints.Buffer)])):
     """
@@ -30,7 +37,48 @@ class Message(typing.NamedTuple('Message', [('header', header.Header),  # pylint
     """
 
 
-def new(command: hints.Command, arg0: hints.Int = 0, arg1: hints.Int = 0, data: hints.Buffer = b'') -> Message:
+class BufferIterator:
+    """
+    Iterator of :class:`~adbwp.message.Message` instances decoded from a buffer of contiguous messages.
+
+    Data payloads of yielded messages are :class:`~memoryview` slices of the buffer, so no payload bytes
+    are copied and memory use does not depend on the size of the buffer.
+
+    The :attr:`~adbwp.message.BufferIterator.offset` attribute is the offset of the first byte not yet
+    consumed. Once the iterator is exhausted, it is the offset of a trailing partial message, or the length
+    of the buffer when there is none, and can be used to resume once more bytes are available.
+    """
+
+    __slots__ = ('_view', 'offset', 'limits')
+
+    def __init__(self, buffer: hints.Buffer, offset: hints.Int = 0,
+                 limits: typing.Optional[limits.Limits] = None) -> None:  # pylint: disable=redefined-outer-name
+        self._view = memoryview(buffer).cast('B')
+        self.offset = offset
+        self.limits = limits
+
+    def __iter__(self) -> 'BufferIterator':
+        return self
+
+    def __next__(self) -> Message:
+        view, offset = self._view, self.offset
+
+        start = offset + header.BYTES
+        if start > len(view):
+            raise StopIteration
+
+        instance = header.from_buffer(view, offset, max_data(self.limits))
+        end = start + instance.data_length
+        if end > len(view):
+            raise StopIteration
+
+        self.offset = end
+        return _from_header(instance, view[start:end], self.limits)
+
+
+# pylint: disable=redefined-outer-name
+def new(command: hints.Command, arg0: hints.Int = 0, arg1: hints.Int = 0, data: hints.Buffer = b'',
+        limits: typing.Optional[limits.Limits] = None) -> Message:
     """
     Create a new :class:`~adbwp.message.Message` instance with optional default values.
 
@@ -42,15 +90,42 @@ def new(command: hints.Command, arg0: hints.Int = 0, arg1: hints.Int = 0, data:
     :type arg1: :class:`~int`
     :param data: (Optional) Message payload
     :type data: :class:`~bytes`, :class:`~bytearray`, :class:`~str`, or :class:`~memoryview`
+    :param limits: (Optional) Limits negotiated for the connection
+    :type limits: :class:`~adbwp.limits.Limits`
     :return: Message instance from given values
     :rtype: :class:`~adbwp.message.Message`
-    :raises ValueError: When data payload is greater than :attr:`~adbwp.consts.MAXDATA`
+    :raises ValueError: When data payload is greater than the maximum for the command
+    """
+    return _new(command, arg0, arg1, payload.as_bytes(data), limits)
+
+
+def _new(command: hints.Command, arg0: hints.Int, arg1: hints.Int, data: hints.Buffer,
+         limits: typing.Optional[limits.Limits] = None) -> Message:
+    """
+    Create a new :class:`~adbwp.message.Message` instance from a data payload that is already bytes-like,
+    without copying it.
+
+    :param command: Command identifier
+    :type command: :class:`~adbwp.enums.Command` or :class:`~int`
+    :param arg0: First argument of the command
+    :type arg0: :class:`~int`
+    :param arg1: Second argument of the command
+    :type arg1: :class:`~int`
+    :param data: Message payload
+    :type data: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+    :param limits: (Optional) Limits negotiated for the connection
+    :type limits: :class:`~adbwp.limits.Limits`
+    :return: Message instance from given values
+    :rtype: :class:`~adbwp.message.Message`
+    :raises ValueError: When data payload is greater than the maximum for the command
     """
-    data = payload.as_bytes(data)
-    return from_header(header.new(command, arg0, arg1, len(data), payload.checksum(data), header.magic(command)), data)
+    _validate_data_length(command, data, limits)
+    checksum = payload.checksum(data) if limits is None or limits.checksum else 0
+    return Message(header.new(command, arg0, arg1, len(data), checksum, header.magic(command)), data)
 
 
-def from_header(header: header.Header, data: hints.Buffer = b'') -> Message:  # pylint: disable=redefined-outer-name
+def from_header(header: header.Header, data: hints.Buffer = b'',
+                limits: typing.Optional[limits.Limits] = None) -> Message:
     """
     Create a new :class:`~adbwp.message.Message` instance from an existing :class:`~adbwp.header.Header`.
 
@@ -58,25 +133,163 @@ def from_header(header: header.Header, data: hints.Buffer = b'') -> Message:  #
     :type header: :class:`~adbwp.header.Header`
     :param data: (Optional) Message payload
     :type data: :class:`~bytes`, :class:`~bytearray`, :class:`~str`, or :class:`~memoryview`
+    :param limits: (Optional) Limits negotiated for the connection
+    :type limits: :class:`~adbwp.limits.Limits`
     :return: Message instance from given values
     :rtype: :class:`~adbwp.message.Message`
-    :raises ValueError: When data payload is greater than :attr:`~adbwp.consts.MAXDATA`
+    :raises ValueError: When data payload is greater than the maximum for the command
+    :raises ChecksumError: When data payload checksum doesn't match header checksum
+    """
+    return _from_header(header, payload.as_bytes(data), limits)
+
+
+def _from_header(header: header.Header, data: hints.Buffer, limits: typing.Optional[limits.Limits] = None) -> Message:
+    """
+    Create a new :class:`~adbwp.message.Message` instance from an existing :class:`~adbwp.header.Header`
+    and a data payload that is already bytes-like, without copying it.
+
+    :param header: Message header
+    :type header: :class:`~adbwp.header.Header`
+    :param data: Message payload
+    :type data: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+    :param limits: (Optional) Limits negotiated for the connection
+    :type limits: :class:`~adbwp.limits.Limits`
+    :return: Message instance from given values
+    :rtype: :class:`~adbwp.message.Message`
+    :raises ValueError: When data payload is greater than the maximum for the command
     :raises ChecksumError: When data payload checksum doesn't match header checksum
     """
-    data = payload.as_bytes(data)
+    if metrics.SINK is None:
+        return _verified(header, data, limits)
 
-    max_data_length = MAX_DATA_LENGTH_BY_COMMAND[header.command]
-    if len(data) > max_data_length:
-        raise ValueError('Data length for {} message cannot be more than {}'.format(header.command, max_data_length))
+    started = metrics.start()
+    instance = _verified(header, data, limits)
+    metrics.record(metrics.MESSAGE_FROM_HEADER, header.command, len(data), started)
+    return instance
 
-    checksum = payload.checksum(data)
-    if header.data_checksum != checksum:
-        raise exceptions.ChecksumError('Expected data checksum {}; got {}'.format(header.data_checksum, checksum))
+
+def _verified(header: header.Header, data: hints.Buffer, limits: typing.Optional[limits.Limits]) -> Message:
+    """
+    Create a new :class:`~adbwp.message.Message` after validating the data payload length and checksum.
+    """
+    _validate_data_length(header.command, data, limits)
+
+    if limits is None or limits.checksum:
+        checksum = payload.checksum(data)
+        if header.data_checksum != checksum:
+            metrics.checksum_failure(header.command)
+            raise exceptions.ChecksumError('Expected data checksum {}; got {}'.format(header.data_checksum, checksum))
 
     return Message(header, data)
 
 
-def connect(serial: hints.Str, banner: hints.Str, system_type: hints.SystemType = enums.SystemType.HOST) -> Message:
+def iter_from_buffer(buffer: hints.Buffer, offset: hints.Int = 0,
+                     limits: typing.Optional[limits.Limits] = None) -> BufferIterator:
+    """
+    Create an iterator of :class:`~adbwp.message.Message` from a buffer of contiguous messages.
+
+    Any object that supports the buffer protocol can be used, including :class:`~mmap.mmap`. Data payloads
+    of the yielded messages are :class:`~memoryview` slices of the buffer.
+
+    :param buffer: Buffer containing messages back to back
+    :type buffer: :class:`~bytes`, :class:`~bytearray`, :class:`~memoryview`, or :class:`~mmap.mmap`
+    :param offset: (Optional) Offset in the buffer of the first message
+    :type offset: :class:`~int`
+    :param limits: (Optional) Limits negotiated for the connection
+    :type limits: :class:`~adbwp.limits.Limits`
+    :return: Iterator of messages whose `offset` attribute tracks the first unconsumed byte
+    :rtype: :class:`~adbwp.message.BufferIterator`
+    :raises UnpackError: When a header is invalid or its data length exceeds the maximum allowed
+    :raises ChecksumError: When data payload checksum doesn't match header checksum
+    """
+    return BufferIterator(buffer, offset, limits)
+
+
+def to_buffers(message: Message) -> typing.List[hints.Buffer]:
+    """
+    Create a scatter-gather sequence of buffers from the given :class:`~adbwp.message.Message`.
+
+    The sequence contains the serialized header followed by a zero-copy :class:`~memoryview` of the data
+    payload, if any, and is suitable for :meth:`~socket.socket.sendmsg` and :func:`~os.writev`.
+
+    :param message: Message to serialize
+    :type message: :class:`~adbwp.message.Message`
+    :return: List of buffers that represent the message
+    :rtype: :class:`~list` of :class:`~bytes` and :class:`~memoryview`
+    :raises PackError: When unable to pack the message header into bytes
+    """
+    buffers = [header.to_bytes(message.header)]  # type: typing.List[hints.Buffer]
+    if message.data:
+        buffers.append(memoryview(message.data))
+    return buffers
+
+
+def to_bytes(message: Message) -> hints.Bytes:
+    """
+    Create a :class:`~bytes` from the given :class:`~adbwp.message.Message`.
+
+    This copies the data payload; prefer :func:`~adbwp.message.to_buffers` for large payloads.
+
+    :param message: Message to serialize
+    :type message: :class:`~adbwp.message.Message`
+    :return: Message represented as bytes
+    :rtype: :class:`~bytes`
+    :raises PackError: When unable to pack the message header into bytes
+    """
+    return b''.join(to_buffers(message))
+
+
+def max_data_length(command: hints.Command, limits: typing.Optional[limits.Limits] = None) -> hints.Int:
+    """
+    Get the maximum size of the data payload for a message of the given command.
+
+    :param command: Command identifier
+    :type command: :class:`~adbwp.enums.Command` or :class:`~int`
+    :param limits: (Optional) Limits negotiated for the connection; defaults to
+        :attr:`~adbwp.message.MAX_DATA_LENGTH_BY_COMMAND`
+    :type limits: :class:`~adbwp.limits.Limits`
+    :return: Maximum data payload size
+    :rtype: :class:`~int`
+    """
+    if limits is None:
+        return MAX_DATA_LENGTH_BY_COMMAND[command]
+    return limits.max_data_length(command)
+
+
+def max_data(limits: typing.Optional[limits.Limits] = None) -> hints.Int:
+    """
+    Get the maximum data payload size for commands other than CONNECT and AUTH under the given limits.
+
+    :param limits: (Optional) Limits negotiated for the connection; defaults to :attr:`~adbwp.consts.MAXDATA`
+    :type limits: :class:`~adbwp.limits.Limits`
+    :return: Maximum data payload size
+    :rtype: :class:`~int`
+    """
+    return consts.MAXDATA if limits is None else limits.max_data
+
+
+def _validate_data_length(command: hints.Command, data: hints.Buffer,
+                          limits: typing.Optional[limits.Limits] = None) -> None:
+    """
+    Validate the length of the given data payload against the maximum allowed for the command.
+
+    :param command: Command identifier
+    :type command: :class:`~adbwp.enums.Command` or :class:`~int`
+    :param data: Message payload
+    :type data: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+    :param limits: (Optional) Limits negotiated for the connection
+    :type limits: :class:`~adbwp.limits.Limits`
+    :return: Nothing
+    :rtype: :class:`~NoneType`
+    :raises ValueError: When data payload is greater than the maximum for the command
+    """
+    max_length = max_data_length(command, limits)
+    if len(data) > max_length:
+        raise ValueError('Data length for {} message cannot be more than {}'.format(command, max_length))
+
+
+def connect(serial: hints.Str, banner: hints.Str, system_type: hints.SystemType = enums.SystemType.HOST,
+            limits: typing.Optional[limits.Limits] = None) -> Message:
     """
     Create a :class:`~adbwp.message.Message` instance that represents a connect message.
 
@@ -86,12 +299,16 @@ def connect(serial: hints.Str, banner: hints.Str, system_type: hints.SystemType
     :type banner: :class:`~str`
     :param system_type: System type creating the message
     :type system_type: :class:`~adbwp.enums.SystemType` or :class:`~str`
+    :param limits: (Optional) Version and max data to advertise; defaults to :attr:`~adbwp.consts.VERSION`
+        and :attr:`~adbwp.consts.CONNECT_AUTH_MAXDATA`
+    :type limits: :class:`~adbwp.limits.Limits`
     :return: Message used to connect to a remote system
     :rtype: :class:`~adbwp.message.Message`
     :raises ValueError: When data payload is greater than :attr:`~adbwp.consts.CONNECT_AUTH_MAXDATA`
     """
+    version, max_data = (consts.VERSION, consts.CONNECT_AUTH_MAXDATA) if limits is None else limits
     system_identity_string = payload.system_identity_string(system_type, serial, banner)
-    return new(enums.Command.CNXN, consts.VERSION, consts.CONNECT_AUTH_MAXDATA, system_identity_string)
+    return new(enums.Command.CNXN, version, max_data, system_identity_string)
 
 
 def auth_signature(signature: hints.Bytes) -> Message:
@@ -122,7 +339,8 @@ def auth_rsa_public_key(public_key: hints.Bytes) -> Message:
     return new(enums.Command.AUTH, enums.AuthType.RSAPUBLICKEY, 0, payload.null_terminate(public_key))
 
 
-def open(local_id: hints.Int, destination: hints.Str) -> Message:  # pylint: disable=redefined-builtin
+def open(local_id: hints.Int, destination: hints.Str,  # pylint: disable=redefined-builtin
+         limits: typing.Optional[limits.Limits] = None, window: hints.Int = 0) -> Message:
     """
     Create a :class:`~adbwp.message.Message` instance that represents a open message.
 
@@ -130,18 +348,25 @@ def open(local_id: hints.Int, destination: hints.Str) -> Message:  # pylint: dis
     :type local_id: :class:`~int`
     :param destination: Stream destination
     :type destination: :class:`~str`
+    :param limits: (Optional) Limits negotiated for the connection
+    :type limits: :class:`~adbwp.limits.Limits`
+    :param window: (Optional) Receive window of the stream when delayed acks are enabled; zero when not
+    :type window: :class:`~int`
     :return: Message used to open a stream by id on a remote system
     :rtype: :class:`~adbwp.message.Message`
     :raises ValueError: When local id is zero
+    :raises ValueError: When window is not an unsigned 32-bit integer
     :raises ValueError: When data payload is greater than :attr:`~adbwp.consts.MAXDATA`
     """
     if not local_id:
         raise ValueError('Local id cannot be zero')
+    if not 0 <= window <= consts.COMMAND_MASK:
+        raise ValueError('Window must be an unsigned 32-bit integer; got {}'.format(window))
 
-    return new(enums.Command.OPEN, local_id, 0, payload.null_terminate(destination))
+    return new(enums.Command.OPEN, local_id, window, payload.null_terminate(destination), limits)
 
 
-def ready(local_id: hints.Int, remote_id: hints.Int) -> Message:
+def ready(local_id: hints.Int, remote_id: hints.Int, acked: typing.Optional[hints.Int] = None) -> Message:
     """
     Create a :class:`~adbwp.message.Message` instance that represents a ready message.
 
@@ -149,21 +374,50 @@ def ready(local_id: hints.Int, remote_id: hints.Int) -> Message:
     :type local_id: :class:`~int`
     :param remote_id: Identifier for the stream on the remote system
     :type remote_id: :class:`~int`
+    :param acked: (Optional) Number of bytes acknowledged when delayed acks are enabled
+    :type acked: :class:`~int`
     :return: Message used to inform remote system it's ready for write messages
     :rtype: :class:`~adbwp.message.Message`
     :raises ValueError: When local id is zero
     :raises ValueError: When remote id is zero
-    :raises ValueError: When data payload is greater than :attr:`~adbwp.consts.MAXDATA`
+    :raises ValueError: When acked is not an unsigned 32-bit integer
     """
     if not local_id:
         raise ValueError('Local id cannot be zero')
     if not remote_id:
         raise ValueError('Remote id cannot be zero')
+    if acked is None:
+        return new(enums.Command.OKAY, local_id, remote_id)
+    if not 0 <= acked <= consts.COMMAND_MASK:
+        raise ValueError('Acked bytes must be an unsigned 32-bit integer; got {}'.format(acked))
 
-    return new(enums.Command.OKAY, local_id, remote_id)
+    return new(enums.Command.OKAY, local_id, remote_id, ACKED_BYTES_STRUCT.pack(acked))
 
 
-def write(local_id: hints.Int, remote_id: hints.Int, data: hints.Buffer) -> Message:
+def acked_bytes(message: Message) -> typing.Optional[hints.Int]:  # pylint: disable=redefined-outer-name
+    """
+    Get the number of bytes acknowledged by a ready message when delayed acks are enabled.
+
+    :param message: Received ready message
+    :type message: :class:`~adbwp.message.Message`
+    :return: Number of acknowledged bytes, or :data:`None` when the message has no data payload
+    :rtype: :class:`~int`
+    :raises ValueError: When the message is not a ready message
+    :raises UnpackError: When the data payload is not a 4-byte acked bytes count
+    """
+    if message.header.command != enums.Command.OKAY:
+        raise ValueError('Expected {} message; got {}'.format(enums.Command.OKAY, message.header.command))
+    if not message.data:
+        return None
+
+    try:
+        return ACKED_BYTES_STRUCT.unpack(message.data)[0]
+    except struct.error as ex:
+        raise exceptions.UnpackError('Failed to unpack acked bytes from {} bytes'.format(len(message.data))) from ex
+
+
+def write(local_id: hints.Int, remote_id: hints.Int, data: hints.Buffer,
+          limits: typing.Optional[limits.Limits] = None) -> Message:
     """
     Create a :class:`~adbwp.adb.Message` instance that represents a write message.
 
@@ -173,15 +427,103 @@ def write(local_id: hints.Int, remote_id: hints.Int, data: hints.Buffer) -> Mess
     :type remote_id: :class:`~int`
     :param data: Data payload sent to the stream
     :type data: :class:`~bytes`, :class:`~bytearray`, :class:`~str`, or :class:`~memoryview`
+    :param limits: (Optional) Limits negotiated for the connection
+    :type limits: :class:`~adbwp.limits.Limits`
     :return: Message used to write data to remote stream
     :rtype: :class:`~adbwp.message.Message`
     :raises ValueError: When data payload is empty
-    :raises ValueError: When data payload is greater than :attr:`~adbwp.consts.MAXDATA`
+    :raises ValueError: When data payload is greater than the negotiated max data
     """
     if not data:
         raise ValueError('Data cannot be empty')
 
-    return new(enums.Command.WRTE, local_id, remote_id, data)
+    return new(enums.Command.WRTE, local_id, remote_id, data, limits)
+
+
+def write_stream(local_id: hints.Int, remote_id: hints.Int, data: typing.Any,
+                 max_data: typing.Optional[hints.Int] = None,
+                 limits: typing.Optional[limits.Limits] = None) -> typing.Iterator[Message]:
+    """
+    Create an iterator of :class:`~adbwp.message.Message` instances that represent write messages for
+    the given data, split into data payloads of at most `max_data` bytes.
+
+    Messages are created lazily. Data payloads of buffers are :class:`~memoryview` slices of the buffer
+    and file objects are read one data payload at a time, so no more than a single data payload is held
+    in memory by the iterator.
+
+    :param local_id: Identifier for the stream on the local end
+    :type local_id: :class:`~int`
+    :param remote_id: Identifier for the stream on the remote system
+    :type remote_id: :class:`~int`
+    :param data: Data sent to the stream; a buffer, a binary file object or an iterable of buffers
+    :type data: :class:`~bytes`, :class:`~bytearray`, :class:`~str`, :class:`~memoryview`,
+        :class:`~io.BufferedIOBase`, or :class:`~collections.abc.Iterable`
+    :param max_data: (Optional) Maximum size of a data payload; defaults to the negotiated max data
+    :type max_data: :class:`~int`
+    :param limits: (Optional) Limits negotiated for the connection
+    :type limits: :class:`~adbwp.limits.Limits`
+    :return: Iterator of messages used to write data to remote stream
+    :rtype: :class:`~collections.abc.Iterator`
+    :raises ValueError: When max data is not positive
+    :raises ValueError: When max data is greater than the negotiated max data
+    """
+    max_length = max_data_length(enums.Command.WRTE, limits)
+    if max_data is None:
+        max_data = max_length
+    if max_data <= 0:
+        raise ValueError('Max data must be greater than zero; got {}'.format(max_data))
+    if max_data > max_length:
+        raise ValueError('Max data for {} message cannot be more than {}'.format(enums.Command.WRTE, max_length))
+
+    return (_new(enums.Command.WRTE, local_id, remote_id, chunk, limits) for chunk in _chunks(data, max_data))
+
+
+def _chunks(data: typing.Any, size: hints.Int) -> typing.Iterator[hints.Buffer]:
+    """
+    Split the given buffer, file object or iterable of buffers into non-empty chunks of at most `size` bytes.
+    """
+    if isinstance(data, str):
+        data = payload.as_bytes(data)
+
+    if hasattr(data, 'readinto'):
+        yield from _file_chunks(data, size)
+        return
+
+    try:
+        buffers = [memoryview(data)]
+    except TypeError:
+        buffers = data
+
+    for buffer in buffers:
+        with memoryview(payload.as_bytes(buffer) if isinstance(buffer, str) else buffer) as view:
+            view = view.cast('B')
+            for offset in range(0, len(view), size):
+                yield view[offset:offset + size]
+
+
+def _file_chunks(file: typing.BinaryIO, size: hints.Int) -> typing.Iterator[hints.Buffer]:
+    """
+    Read the given binary file object into non-empty chunks of at most `size` bytes.
+    """
+    while True:
+        chunk = bytearray(size)
+        with memoryview(chunk) as view:
+            filled = 0
+            while filled < size:
+                count = file.readinto(view[filled:])
+                if not count:
+                    break
+                filled += count
+        if not filled:
+            return
+        if filled < size:
+            del chunk[filled:]
+        yield chunk
+        if filled < size:
+            return
+
+
+# pylint: enable=redefined-outer-name
 
 
 def close(local_id: hints.Int, remote_id: hints.Int) -> Message:
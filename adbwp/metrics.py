@@ -0,0 +1,189 @@
+"""
+    adbwp.metrics
+    ~~~~~~~~~~~~~
+
+    Instrumentation of the encode/decode paths with a pluggable sink.
+"""
+import collections
+import time
+import typing
+
+from . import hints
+
+__all__ = ['Sink', 'Recorder', 'install', 'uninstall', 'HEADER_TO_BYTES', 'HEADER_FROM_BYTES',
+           'HEADER_FROM_BUFFER', 'MESSAGE_FROM_HEADER', 'PAYLOAD_CHECKSUM']
+
+
+#: Event recorded when a header is packed by :func:`~adbwp.header.to_bytes`.
+HEADER_TO_BYTES = 'header.to_bytes'
+
+
+#: Event recorded when a header is unpacked by :func:`~adbwp.header.from_bytes`.
+HEADER_FROM_BYTES = 'header.from_bytes'
+
+
+#: Event recorded when a header is unpacked by :func:`~adbwp.header.from_buffer`.
+HEADER_FROM_BUFFER = 'header.from_buffer'
+
+
+#: Event recorded when a message is created, and its checksum verified, by :func:`~adbwp.message.from_header`.
+MESSAGE_FROM_HEADER = 'message.from_header'
+
+
+#: Event recorded when a data payload is summed by :func:`~adbwp.payload.checksum`.
+PAYLOAD_CHECKSUM = 'payload.checksum'
+
+
+class Sink:
+    """
+    Base class of metrics sinks. Subclasses override the methods for the measurements they are interested in.
+
+    When :attr:`~adbwp.metrics.Sink.timed` is true, the duration of each observed operation is measured and
+    passed to :meth:`~adbwp.metrics.Sink.record`.
+    """
+
+    #: Indicates whether or not durations of observed operations are measured.
+    timed = False
+
+    def record(self, event: hints.Str, command: typing.Optional[hints.Command], nbytes: hints.Int,
+               duration: typing.Optional[hints.Float]) -> None:
+        """
+        Record a completed operation.
+
+        :param event: Name of the operation, e.g. :attr:`~adbwp.metrics.HEADER_TO_BYTES`
+        :type event: :class:`~str`
+        :param command: Command of the header or message, or :data:`None` for data payload operations
+        :type command: :class:`~adbwp.enums.Command` or :class:`~int`
+        :param nbytes: Number of bytes handled by the operation
+        :type nbytes: :class:`~int`
+        :param duration: Duration of the operation in seconds, or :data:`None` when not timed
+        :type duration: :class:`~float`
+        :return: Nothing
+        :rtype: :class:`~NoneType`
+        """
+
+    def checksum_failure(self, command: hints.Command) -> None:
+        """
+        Record a message whose data payload did not match its header checksum.
+
+        :param command: Command of the message
+        :type command: :class:`~adbwp.enums.Command` or :class:`~int`
+        :return: Nothing
+        :rtype: :class:`~NoneType`
+        """
+
+
+class Recorder(Sink):
+    """
+    Sink that keeps in-memory counters of operations and bytes per event and command, checksum failures per
+    command and, when timed, histograms of durations per event.
+
+    Histogram buckets are keyed by the upper bound of the duration in microseconds, in powers of two.
+    """
+
+    def __init__(self, timed: hints.Bool = False) -> None:
+        self.timed = timed
+        self.counts = collections.Counter()  # type: typing.Counter[typing.Tuple[str, typing.Any]]
+        self.bytes = collections.Counter()  # type: typing.Counter[typing.Tuple[str, typing.Any]]
+        self.checksum_failures = collections.Counter()  # type: typing.Counter[typing.Any]
+        self.histograms = collections.defaultdict(collections.Counter)  # type: typing.Dict[str, typing.Counter]
+
+    def record(self, event: hints.Str, command: typing.Optional[hints.Command], nbytes: hints.Int,
+               duration: typing.Optional[hints.Float]) -> None:
+        key = (event, command)
+        self.counts[key] += 1
+        self.bytes[key] += nbytes
+        if duration is not None:
+            self.histograms[event][1 << max(0, int(duration * 1e6)).bit_length()] += 1
+
+    def checksum_failure(self, command: hints.Command) -> None:
+        self.checksum_failures[command] += 1
+
+    def clear(self) -> None:
+        """
+        Reset all counters and histograms.
+
+        :return: Nothing
+        :rtype: :class:`~NoneType`
+        """
+        self.counts.clear()
+        self.bytes.clear()
+        self.checksum_failures.clear()
+        self.histograms.clear()
+
+
+#: Sink that receives all measurements, or :data:`None` when instrumentation is disabled. Instrumented
+#: functions check this once per call, so leaving it unset costs a single global lookup.
+SINK = None  # type: typing.Optional[Sink]
+
+
+def install(sink: Sink) -> typing.Optional[Sink]:
+    """
+    Install the given sink to receive all measurements, replacing the current one.
+
+    :param sink: Sink to install
+    :type sink: :class:`~adbwp.metrics.Sink`
+    :return: Previously installed sink, if any
+    :rtype: :class:`~adbwp.metrics.Sink`
+    """
+    global SINK  # pylint: disable=global-statement
+    previous, SINK = SINK, sink
+    return previous
+
+
+def uninstall() -> typing.Optional[Sink]:
+    """
+    Remove the installed sink, disabling instrumentation.
+
+    :return: Previously installed sink, if any
+    :rtype: :class:`~adbwp.metrics.Sink`
+    """
+    global SINK  # pylint: disable=global-statement
+    previous, SINK = SINK, None
+    return previous
+
+
+def start() -> typing.Optional[hints.Float]:
+    """
+    Get the start time of an operation to measure when the installed sink is timed.
+
+    :return: Value of :func:`~time.perf_counter`, or :data:`None` when no timed sink is installed
+    :rtype: :class:`~float`
+    """
+    sink = SINK
+    return time.perf_counter() if sink is not None and sink.timed else None
+
+
+def record(event: hints.Str, command: typing.Optional[hints.Command], nbytes: hints.Int,
+           started: typing.Optional[hints.Float] = None) -> None:
+    """
+    Record a completed operation with the installed sink, if any.
+
+    :param event: Name of the operation
+    :type event: :class:`~str`
+    :param command: Command of the header or message, or :data:`None` for data payload operations
+    :type command: :class:`~adbwp.enums.Command` or :class:`~int`
+    :param nbytes: Number of bytes handled by the operation
+    :type nbytes: :class:`~int`
+    :param started: (Optional) Start time returned by :func:`~adbwp.metrics.start`
+    :type started: :class:`~float`
+    :return: Nothing
+    :rtype: :class:`~NoneType`
+    """
+    sink = SINK
+    if sink is not None:
+        sink.record(event, command, nbytes, None if started is None else time.perf_counter() - started)
+
+
+def checksum_failure(command: hints.Command) -> None:
+    """
+    Record a checksum failure with the installed sink, if any.
+
+    :param command: Command of the message
+    :type command: :class:`~adbwp.enums.Command` or :class:`~int`
+    :return: Nothing
+    :rtype: :class:`~NoneType`
+    """
+    sink = SINK
+    if sink is not None:
+        sink.checksum_failure(command)
@@ -0,0 +1,122 @@
+"""
+    adbwp.numpy
+    ~~~~~~~~~~~
+
+    Bulk loading of message captures into :mod:`numpy` structured arrays.
+"""
+import array
+import struct
+
+from . import consts, header, hints
+
+try:
+    import numpy
+except ImportError as ex:  # pragma: no cover
+    raise ImportError('The adbwp.numpy module requires the numpy package to be installed') from ex
+
+__all__ = ['HEADER_DTYPE', 'DTYPE', 'from_buffer', 'checksums', 'verify_checksums']
+
+
+#: Structured dtype of a serialized header as described by :attr:`~adbwp.header.HEADER_FORMAT`.
+HEADER_DTYPE = numpy.dtype([('command', '<u4'), ('arg0', '<u4'), ('arg1', '<u4'),
+                            ('data_length', '<u4'), ('data_checksum', '<u4'), ('magic', '<u4')])
+
+
+#: Structured dtype of the arrays returned by :func:`~adbwp.numpy.from_buffer`; the header fields followed
+#: by the offset of the header within the buffer.
+DTYPE = numpy.dtype(HEADER_DTYPE.descr + [('offset', '<u8')])
+
+
+#: Offset of the data length within a serialized header.
+_LENGTH_OFFSET = HEADER_DTYPE.fields['data_length'][1]
+
+#: Precompiled :class:`~struct.Struct` for the data length of a serialized header.
+_LENGTH_STRUCT = struct.Struct('<I')
+
+
+def from_buffer(buffer: hints.Buffer, offset: hints.Int = 0) -> numpy.ndarray:
+    """
+    Load the headers of all messages stored back to back in a buffer, e.g. a capture of raw ADB frames,
+    into a structured array of :attr:`~adbwp.numpy.DTYPE`.
+
+    Headers are not validated. A trailing partial message is ignored; the offset of the first byte after
+    the last complete message is the `offset` plus :attr:`~adbwp.header.BYTES` plus `data_length` of the
+    last row.
+
+    :param buffer: Buffer containing messages back to back
+    :type buffer: :class:`~bytes`, :class:`~bytearray`, :class:`~memoryview`, or :class:`~mmap.mmap`
+    :param offset: (Optional) Offset in the buffer of the first message
+    :type offset: :class:`~int`
+    :return: Array with one row per complete message
+    :rtype: :class:`~numpy.ndarray`
+    """
+    view = memoryview(buffer).cast('B')
+    size = len(view)
+    unpack_from = _LENGTH_STRUCT.unpack_from
+
+    # Only the data length of each header is read while scanning; the headers are gathered from the
+    # buffer all at once afterwards.
+    offsets = array.array('Q')
+    while offset + header.BYTES <= size:
+        end = offset + header.BYTES + unpack_from(view, offset + _LENGTH_OFFSET)[0]
+        if end > size:
+            break
+        offsets.append(offset)
+        offset = end
+
+    starts = numpy.frombuffer(offsets, dtype=numpy.uint64).astype(numpy.intp)
+    indices = starts[:, numpy.newaxis] + numpy.arange(header.BYTES, dtype=numpy.intp)
+    rows = numpy.frombuffer(view, dtype=numpy.uint8)[indices].view(HEADER_DTYPE).reshape(-1)
+
+    headers = numpy.empty(len(offsets), dtype=DTYPE)
+    for name in HEADER_DTYPE.names:
+        headers[name] = rows[name]
+    headers['offset'] = starts
+    return headers
+
+
+def checksums(buffer: hints.Buffer, headers: numpy.ndarray) -> numpy.ndarray:
+    """
+    Compute the checksum of the data payload of each message of the given headers.
+
+    All payloads are summed by a single :data:`numpy.add.reduceat` call over the buffer.
+
+    :param buffer: Buffer the headers were loaded from by :func:`~adbwp.numpy.from_buffer`
+    :type buffer: :class:`~bytes`, :class:`~bytearray`, :class:`~memoryview`, or :class:`~mmap.mmap`
+    :param headers: Rows of :attr:`~adbwp.numpy.DTYPE` in increasing order of offset
+    :type headers: :class:`~numpy.ndarray`
+    :return: Array of data payload checksums, zero for messages without a data payload
+    :rtype: :class:`~numpy.ndarray`
+    """
+    data = numpy.frombuffer(buffer, dtype=numpy.uint8)
+    lengths = headers['data_length'].astype(numpy.uint64)
+    starts = headers['offset'] + header.BYTES
+
+    # reduceat sums from each index up to the next one, returns the element itself instead of zero for
+    # empty segments and cannot take an index at the end of the buffer. Only non-empty payloads are summed,
+    # with their start and end indices interleaved, and an end at the end of the buffer is left implicit.
+    nonempty = lengths > 0
+    indices = numpy.empty(2 * int(numpy.count_nonzero(nonempty)), dtype=numpy.intp)
+    indices[0::2] = starts[nonempty]
+    indices[1::2] = starts[nonempty] + lengths[nonempty]
+    if len(indices) and indices[-1] == len(data):
+        indices = indices[:-1]
+
+    sums = numpy.zeros(len(headers), dtype=numpy.uint64)
+    if len(indices):
+        sums[nonempty] = numpy.add.reduceat(data, indices, dtype=numpy.uint64)[0::2]
+    return (sums & consts.COMMAND_MASK).astype(numpy.uint32)
+
+
+def verify_checksums(buffer: hints.Buffer, headers: numpy.ndarray) -> numpy.ndarray:
+    """
+    Check the data payload of each message of the given headers against its header checksum.
+
+    :param buffer: Buffer the headers were loaded from by :func:`~adbwp.numpy.from_buffer`
+    :type buffer: :class:`~bytes`, :class:`~bytearray`, :class:`~memoryview`, or :class:`~mmap.mmap`
+    :param headers: Rows of :attr:`~adbwp.numpy.DTYPE` in increasing order of offset
+    :type headers: :class:`~numpy.ndarray`
+    :return: Boolean array that is true for each message whose data payload matches its checksum
+    :rtype: :class:`~numpy.ndarray`
+    """
+    return checksums(buffer, headers) == headers['data_checksum']
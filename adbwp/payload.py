@@ -4,19 +4,108 @@
 
     Contains functionality for message data payloads.
 """
-from . import consts, hints
+import importlib.util
+import itertools
+import operator
+import zlib
+
+from . import consts, hints, metrics
+
+#: Indicates whether or not :mod:`numpy` is installed. It is only imported by the first call to
+#: :func:`~adbwp.payload.checksum_numpy` as importing it takes longer than importing this entire package.
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+
+
+#: Data payloads smaller than this number of bytes are checksummed with the builtin :func:`~sum` as it
+#: outperforms the vectorized backends for small inputs.
+CHECKSUM_SMALL_PAYLOAD = 1024
+
+
+#: Number of bytes summed by a single :func:`~zlib.adler32` call. The "A" component of adler32 is the
+#: sum of all bytes modulo 65521, so it is the exact sum as long as 255 * size is less than 65521.
+ADLER32_CHUNK_SIZE = 256
 
 
 def checksum(data: hints.Buffer) -> hints.Int:
     """
     Compute the checksum value of a header that uses the given data payload.
 
+    Large data payloads are summed by :func:`~adbwp.payload.checksum_numpy` when :mod:`numpy` is installed
+    and :func:`~adbwp.payload.checksum_adler32` otherwise.
+
     :param data: Data payload
     :type data: :class:`~bytes`, :class:`~bytearray`, :class:`~str`, or :class:`~memoryview`
     :return: Data payload checksum
     :rtype: :class:`~int`
     """
-    return sum(as_bytes(data)) & consts.COMMAND_MASK
+    if isinstance(data, memoryview):
+        if not data.c_contiguous:
+            data = data.tobytes()
+        elif data.format != 'B':
+            data = data.cast('B')
+    else:
+        data = as_bytes(data)
+
+    if metrics.SINK is None:
+        return _checksum(data)
+
+    started = metrics.start()
+    value = _checksum(data)
+    metrics.record(metrics.PAYLOAD_CHECKSUM, None, len(data), started)
+    return value
+
+
+def _checksum(data: hints.Buffer) -> hints.Int:
+    """
+    Compute the checksum value of the given data payload that is bytes-like with one byte per item.
+    """
+    if len(data) < CHECKSUM_SMALL_PAYLOAD:
+        return sum(data) & consts.COMMAND_MASK
+    return _checksum_large(data)
+
+
+def checksum_adler32(data: hints.Buffer) -> hints.Int:
+    """
+    Compute the checksum value of the given data payload using only the standard library.
+
+    The payload is split into :attr:`~adbwp.payload.ADLER32_CHUNK_SIZE` byte slices, each summed by
+    :func:`~zlib.adler32`, with the entire loop running at C speed through :func:`~map`.
+
+    :param data: Data payload
+    :type data: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+    :return: Data payload checksum
+    :rtype: :class:`~int`
+    """
+    with memoryview(data) as view:
+        view = view.cast('B') if view.c_contiguous else memoryview(view.tobytes())
+        size = len(view)
+        slices = itertools.starmap(slice, zip(range(0, size, ADLER32_CHUNK_SIZE),
+                                              range(ADLER32_CHUNK_SIZE, size + ADLER32_CHUNK_SIZE,
+                                                    ADLER32_CHUNK_SIZE)))
+        adlers = map(zlib.adler32, map(view.__getitem__, slices), itertools.repeat(0))
+        return sum(map(operator.and_, adlers, itertools.repeat(0xffff))) & consts.COMMAND_MASK
+
+
+def checksum_numpy(data: hints.Buffer) -> hints.Int:
+    """
+    Compute the checksum value of the given data payload using :mod:`numpy`.
+
+    :param data: Data payload
+    :type data: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+    :return: Data payload checksum
+    :rtype: :class:`~int`
+    :raises RuntimeError: When :mod:`numpy` is not installed
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError('Checksum using numpy requires the numpy package to be installed')
+
+    import numpy  # pylint: disable=import-outside-toplevel
+    if isinstance(data, memoryview) and not data.c_contiguous:
+        data = data.tobytes()
+    return int(numpy.frombuffer(data, dtype=numpy.uint8).sum(dtype=numpy.uint64)) & consts.COMMAND_MASK
+
+
+_checksum_large = checksum_numpy if NUMPY_AVAILABLE else checksum_adler32
 
 
 def null_terminate(data: hints.Buffer) -> hints.Bytes:
@@ -0,0 +1,277 @@
+"""
+    adbwp.shell
+    ~~~~~~~~~~~
+
+    Sans-IO encoding and decoding of the shell protocol packets carried in stream data payloads.
+"""
+import struct
+import typing
+
+from . import consts, enums, exceptions, hints
+
+__all__ = ['Packet', 'Decoder', 'packet', 'stdin', 'close_stdin', 'window_size_change', 'exit_status',
+           'stdin_payloads']
+
+
+#: Struct of the header of each packet; identifier and data length.
+HEADER_STRUCT = struct.Struct('<BI')
+
+
+#: Packet identifiers by value; a dict lookup is much faster than calling :class:`~adbwp.enums.ShellId`.
+SHELL_ID_BY_VALUE = {shell_id.value: shell_id for shell_id in enums.ShellId}
+
+
+#: Value of the identifier of EXIT packets.
+EXIT = enums.ShellId.EXIT.value
+
+
+#: Identifiers of packets whose data is a byte stream that is produced in parts as it is received.
+STREAM_IDS = frozenset((enums.ShellId.STDIN, enums.ShellId.STDOUT, enums.ShellId.STDERR))
+
+
+#: Maximum data length of packets that are not part of a byte stream, e.g. EXIT, which are buffered until
+#: complete.
+CONTROL_DATA_MAX = 4096
+
+
+class Packet(typing.NamedTuple('Packet', [('shell_id', enums.ShellId),  # pylint: disable=inherit-non-class
+                                          ('data', memoryview)])):
+    """
+    Represents a shell protocol packet, or part of one for stdin, stdout, and stderr packets.
+
+    The data is a view over the buffer the packet was decoded from, so it is only copied when needed.
+    """
+
+
+class Decoder:
+    """
+    Sans-IO decoder that consumes the data payloads of a shell stream and produces packets as soon as their
+    data is received. Packets may span data payloads and data payloads may contain many packets.
+
+    Output is never copied or buffered: stdin, stdout, and stderr packets are views over the fed data
+    payloads, and a packet that spans data payloads is produced in parts, one for each of them. Other packets
+    are small and produced once complete. Only the start of a packet split between data payloads is buffered,
+    which is at most its header for stdin, stdout, and stderr packets, and it is completed from the start of
+    the next one. Fed data payloads must not be modified while packets decoded from them are in use.
+
+    The exit status of the shell command is kept in :attr:`~adbwp.shell.Decoder.exit_status` once received.
+    """
+
+    __slots__ = ('exit_status', '_buffer', '_shell_id', '_remaining')
+
+    def __init__(self) -> None:
+        self.exit_status = None  # type: typing.Optional[int]
+        self._buffer = bytearray()
+        self._shell_id = enums.ShellId.INVALID
+        self._remaining = 0
+
+    def __len__(self) -> hints.Int:
+        """
+        Number of bytes that have been received but not yet consumed by a packet.
+
+        :return: Number of buffered bytes
+        :rtype: :class:`~int`
+        """
+        return len(self._buffer)
+
+    def feed(self, data: hints.Buffer) -> typing.List[Packet]:
+        """
+        Consume the given data payload and return all packets, or parts of them, now received.
+
+        :param data: Data payload received on the shell stream, e.g. :attr:`~adbwp.message.Message.data`
+        :type data: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+        :return: Packets in the order they were received
+        :rtype: :class:`~list`
+        :raises UnpackError: When a packet identifier is unknown or a control packet is too long
+        """
+        view = memoryview(data).cast('B')
+        size = len(view)
+
+        packets = []  # type: typing.List[Packet]
+        offset = 0
+        if self._buffer:
+            offset = self._complete(view, packets)
+            if self._buffer:
+                return packets
+
+        if self._remaining and offset < size:
+            end = min(offset + self._remaining, size)
+            packets.append(Packet(self._shell_id, view[offset:end]))
+            self._remaining -= end - offset
+            offset = end
+
+        self._buffer = bytearray(view[self._decode(view, offset, packets):])
+        return packets
+
+    def _complete(self, view: memoryview, packets: typing.List[Packet]) -> hints.Int:
+        """
+        Complete the buffered start of a packet with only the bytes it needs from the start of the given view,
+        appending it to the packets, and return the offset of the rest of the view. The packet stays buffered
+        when the view does not complete it.
+        """
+        buffer = self._buffer
+        offset = 0
+        size = _size(buffer)
+        while len(buffer) < size:
+            if offset == len(view):
+                return offset
+            end = min(offset + size - len(buffer), len(view))
+            buffer += view[offset:end]
+            offset = end
+            size = _size(buffer)
+
+        self._buffer = bytearray()
+        self._decode(memoryview(buffer), 0, packets)
+        return offset
+
+    def _decode(self, view: memoryview, offset: hints.Int, packets: typing.List[Packet]) -> hints.Int:
+        """
+        Decode the packets from the given offset, appending them to the packets, and return the offset of the
+        first one that is not complete. The first part of a stdin, stdout, or stderr packet that is not complete
+        is appended and the end of the view returned.
+        """
+        size = len(view)
+
+        # Hot loop for floods of small packets: locals, a dict lookup of identifiers, and packets created
+        # without the Python level __new__ of the named tuple.
+        unpack_from = HEADER_STRUCT.unpack_from
+        header_size = HEADER_STRUCT.size
+        new_packet = tuple.__new__
+        last = size - header_size
+        while offset <= last:
+            value, length = unpack_from(view, offset)
+            shell_id = SHELL_ID_BY_VALUE.get(value)
+            if shell_id is None:
+                raise exceptions.UnpackError('Unknown shell packet identifier {}'.format(value))
+
+            start = offset + header_size
+            end = start + length
+            if end > size:
+                if shell_id not in STREAM_IDS:
+                    if length > CONTROL_DATA_MAX:
+                        raise exceptions.UnpackError('{} packet length must be at most {}; got {}'.format(
+                            shell_id.name, CONTROL_DATA_MAX, length))
+                    break
+                self._shell_id, self._remaining = shell_id, end - size
+                end = size
+                if start == end:
+                    offset = end
+                    break
+
+            if value == EXIT and length:
+                self.exit_status = view[start]
+            packets.append(new_packet(Packet, (shell_id, view[start:end])))
+            offset = end
+        return offset
+
+
+def _size(buffer: bytearray) -> hints.Int:
+    """
+    Get the number of bytes of the packet at the start of the given buffer needed to decode it, excluding the
+    data of stdin, stdout, and stderr packets, which are produced in parts.
+    """
+    if len(buffer) < HEADER_STRUCT.size:
+        return HEADER_STRUCT.size
+
+    value, length = HEADER_STRUCT.unpack_from(buffer)
+    shell_id = SHELL_ID_BY_VALUE.get(value)
+    if shell_id is None or shell_id in STREAM_IDS or length > CONTROL_DATA_MAX:
+        return HEADER_STRUCT.size
+    return HEADER_STRUCT.size + length
+
+
+def packet(shell_id: enums.ShellId, data: hints.Buffer = b'') -> hints.Bytes:
+    """
+    Create a shell protocol packet.
+
+    :param shell_id: Identifier of the packet
+    :type shell_id: :class:`~adbwp.enums.ShellId`
+    :param data: (Optional) Data of the packet
+    :type data: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+    :return: Packet
+    :rtype: :class:`~bytes`
+    :raises ValueError: When the data is longer than an unsigned 32-bit length
+    """
+    with memoryview(data) as view:
+        view = view.cast('B')
+        if len(view) > consts.COMMAND_MASK:
+            raise ValueError('Packet data length must be at most {}; got {}'.format(consts.COMMAND_MASK, len(view)))
+        return HEADER_STRUCT.pack(shell_id, len(view)) + view
+
+
+def stdin(data: hints.Buffer) -> hints.Bytes:
+    """
+    Create a packet of data for the stdin of the shell command.
+
+    :param data: Input data
+    :type data: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+    :return: Stdin packet
+    :rtype: :class:`~bytes`
+    """
+    return packet(enums.ShellId.STDIN, data)
+
+
+def close_stdin() -> hints.Bytes:
+    """
+    Create a packet that closes the stdin of the shell command.
+
+    :return: Close stdin packet
+    :rtype: :class:`~bytes`
+    """
+    return packet(enums.ShellId.CLOSE_STDIN)
+
+
+def window_size_change(rows: hints.Int, cols: hints.Int, x_pixels: hints.Int = 0,
+                       y_pixels: hints.Int = 0) -> hints.Bytes:
+    """
+    Create a packet that changes the terminal window size of an interactive shell.
+
+    :param rows: Number of rows
+    :type rows: :class:`~int`
+    :param cols: Number of columns
+    :type cols: :class:`~int`
+    :param x_pixels: (Optional) Width in pixels
+    :type x_pixels: :class:`~int`
+    :param y_pixels: (Optional) Height in pixels
+    :type y_pixels: :class:`~int`
+    :return: Window size change packet
+    :rtype: :class:`~bytes`
+    """
+    return packet(enums.ShellId.WINDOW_SIZE_CHANGE,
+                  '{}x{},{}x{}\0'.format(rows, cols, x_pixels, y_pixels).encode('ascii'))
+
+
+def exit_status(status: hints.Int) -> hints.Bytes:
+    """
+    Create a packet with the exit status of the shell command.
+
+    :param status: Exit status
+    :type status: :class:`~int`
+    :return: Exit packet
+    :rtype: :class:`~bytes`
+    :raises ValueError: When the status does not fit in an unsigned byte
+    """
+    if not 0 <= status <= 0xff:
+        raise ValueError('Exit status must be between 0 and 255; got {}'.format(status))
+    return packet(enums.ShellId.EXIT, bytes((status,)))
+
+
+def stdin_payloads(data: hints.Buffer, max_data: hints.Int = consts.MAXDATA) -> typing.Iterator[hints.Bytes]:
+    """
+    Split input data into data payloads of at most `max_data` bytes that each hold a single stdin packet.
+
+    :param data: Input data
+    :type data: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+    :param max_data: (Optional) Maximum size of each data payload
+    :type max_data: :class:`~int`
+    :return: Iterator of data payloads
+    :rtype: :class:`~collections.abc.Iterator`
+    :raises ValueError: When max data is too small to hold a packet with data
+    """
+    size = max_data - HEADER_STRUCT.size
+    if size <= 0:
+        raise ValueError('Max data must be greater than {}; got {}'.format(HEADER_STRUCT.size, max_data))
+
+    view = memoryview(data).cast('B')
+    for start in range(0, len(view), size):
+        yield stdin(view[start:start + size])
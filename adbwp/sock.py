@@ -0,0 +1,83 @@
+"""
+    adbwp.sock
+    ~~~~~~~~~~
+
+    Helpers for writing messages to blocking sockets.
+"""
+import os
+import typing
+
+from . import hints, message
+
+__all__ = ['send_message', 'send_messages']
+
+
+#: Maximum number of buffers passed to a single :meth:`~socket.socket.sendmsg` call.
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):  # pragma: no cover
+    IOV_MAX = 1024
+
+
+def send_message(sock, msg: message.Message) -> hints.Int:
+    """
+    Send the given :class:`~adbwp.message.Message` without copying its data payload.
+
+    :param sock: Connected socket
+    :type sock: :class:`~socket.socket`
+    :param msg: Message to send
+    :type msg: :class:`~adbwp.message.Message`
+    :return: Number of bytes sent
+    :rtype: :class:`~int`
+    :raises PackError: When unable to pack the message header into bytes
+    :raises OSError: When the socket fails to send
+    """
+    return send_messages(sock, (msg,))
+
+
+def send_messages(sock, messages: typing.Iterable[message.Message]) -> hints.Int:
+    """
+    Send all given :class:`~adbwp.message.Message` instances using as few :meth:`~socket.socket.sendmsg`
+    calls as possible, without copying their data payloads.
+
+    Falls back to a single :meth:`~socket.socket.sendall` of the joined messages when the socket does not
+    support :meth:`~socket.socket.sendmsg`.
+
+    :param sock: Connected socket
+    :type sock: :class:`~socket.socket`
+    :param messages: Messages to send
+    :type messages: :class:`~collections.abc.Iterable`
+    :return: Number of bytes sent
+    :rtype: :class:`~int`
+    :raises PackError: When unable to pack a message header into bytes
+    :raises OSError: When the socket fails to send
+    """
+    buffers = []  # type: typing.List[hints.Buffer]
+    for msg in messages:
+        buffers.extend(message.to_buffers(msg))
+
+    if not hasattr(sock, 'sendmsg'):
+        data = b''.join(buffers)
+        sock.sendall(data)
+        return len(data)
+
+    total = 0
+    while buffers:
+        sent = sock.sendmsg(buffers[:IOV_MAX])
+        total += sent
+        buffers = _advance(buffers, sent)
+    return total
+
+
+def _advance(buffers: typing.List[hints.Buffer], sent: hints.Int) -> typing.List[hints.Buffer]:
+    """
+    Drop the given number of sent bytes from the front of the list of buffers.
+
+    Buffers are sliced as bytes, so views with a multi-byte item format are advanced by bytes, not items.
+    """
+    for index, buffer in enumerate(buffers):
+        view = memoryview(buffer)
+        if sent < view.nbytes:
+            return [view.cast('B')[sent:]] + buffers[index + 1:]
+        sent -= view.nbytes
+    return []
@@ -0,0 +1,768 @@
+"""
+    adbwp.sync
+    ~~~~~~~~~~
+
+    Sans-IO encoding and decoding of the file sync service protocol carried in stream data payloads.
+"""
+import collections
+import itertools
+import struct
+import typing
+
+from . import compression, consts, enums, exceptions, hints, payload
+
+__all__ = ['Request', 'Setup', 'Stat', 'Dent', 'Data', 'Done', 'Okay', 'Fail', 'Decoder', 'request',
+           'send_request', 'send_v2_request', 'recv_v2_request', 'stat', 'dent', 'list_done', 'data', 'data_records',
+           'compressed_data_records', 'done', 'okay', 'fail', 'payloads', 'send_file', 'send_file_v2']
+
+
+#: Struct of records with an identifier and a length or value word: requests, DATA, DONE, OKAY, and FAIL.
+RECORD_STRUCT = struct.Struct('<2I')
+
+
+#: Struct of the setup record that follows a SEND_V2 request; identifier, mode, and flags. The setup record
+#: that follows a RECV_V2 request is an identifier and flags as in :attr:`~adbwp.sync.RECORD_STRUCT`.
+SEND_V2_SETUP_STRUCT = struct.Struct('<3I')
+
+
+#: Struct of STAT responses; identifier, mode, size, and modification time.
+STAT_STRUCT = struct.Struct('<4I')
+
+
+#: Struct of DENT records and the DONE record that ends a LIST response; identifier, mode, size, modification
+#: time, and name length.
+DENT_STRUCT = struct.Struct('<5I')
+
+
+#: Identifiers of records sent to start a request.
+REQUESTS = frozenset((enums.SyncId.STAT, enums.SyncId.LIST, enums.SyncId.SEND, enums.SyncId.RECV,
+                      enums.SyncId.QUIT, enums.SyncId.SND2, enums.SyncId.RCV2))
+
+
+#: Identifiers of requests the remote system sends a response to.
+RESPONDED_REQUESTS = frozenset((enums.SyncId.STAT, enums.SyncId.LIST, enums.SyncId.SEND, enums.SyncId.RECV,
+                                enums.SyncId.SND2, enums.SyncId.RCV2))
+
+
+#: Identifiers of requests followed by a setup record, mapped to the request whose responses theirs match.
+V2_REQUESTS = {enums.SyncId.SND2: enums.SyncId.SEND, enums.SyncId.RCV2: enums.SyncId.RECV}
+
+
+class Request(typing.NamedTuple('Request', [('sync_id', enums.SyncId),  # pylint: disable=inherit-non-class
+                                            ('path', hints.Str)])):
+    """
+    Represents a STAT, LIST, SEND, RECV, QUIT, SEND_V2, or RECV_V2 request. The path of SEND requests is
+    followed by a comma and the file mode in decimal.
+    """
+
+
+class Setup(typing.NamedTuple('Setup', [('sync_id', enums.SyncId),  # pylint: disable=inherit-non-class
+                                        ('mode', hints.Int),
+                                        ('flags', hints.Int)])):
+    """
+    Represents the setup record that follows a SEND_V2 or RECV_V2 request with the
+    :class:`~adbwp.enums.SyncFlag` values of the transfer. The mode is zero for RECV_V2 requests.
+    """
+
+
+class Stat(typing.NamedTuple('Stat', [('mode', hints.Int),  # pylint: disable=inherit-non-class
+                                      ('size', hints.Int),
+                                      ('mtime', hints.Int)])):
+    """
+    Represents the response to a STAT request. All values are zero when the path does not exist.
+    """
+
+
+class Dent(typing.NamedTuple('Dent', [('mode', hints.Int),  # pylint: disable=inherit-non-class
+                                      ('size', hints.Int),
+                                      ('mtime', hints.Int),
+                                      ('name', hints.Str)])):
+    """
+    Represents a directory entry in the response to a LIST request.
+    """
+
+
+class Data(typing.NamedTuple('Data', [('data', memoryview)])):  # pylint: disable=inherit-non-class
+    """
+    Represents a chunk of file contents.
+
+    The data is a view over the buffer the record was decoded from, so it is only copied when needed.
+    """
+
+
+class Done(typing.NamedTuple('Done', [('mtime', hints.Int)])):  # pylint: disable=inherit-non-class
+    """
+    Represents the end of a SEND request, with the modification time of the file, or the end of the
+    response to a LIST or RECV request, with a modification time of zero.
+    """
+
+
+class Okay(typing.NamedTuple('Okay', [])):  # pylint: disable=inherit-non-class
+    """
+    Represents the successful response to a SEND request.
+    """
+
+
+class Fail(typing.NamedTuple('Fail', [('message', hints.Str)])):  # pylint: disable=inherit-non-class
+    """
+    Represents the failed response to a request.
+    """
+
+
+#: Type hint of all decoded records.
+Record = typing.Union[Request, Setup, Stat, Dent, Data, Done, Okay, Fail]  # pylint: disable=invalid-name
+
+
+class Decoder:
+    """
+    Sans-IO decoder that consumes the data payloads of a sync stream and produces records as soon as they
+    are complete. Records may span data payloads and data payloads may contain many records.
+
+    The meaning of records depends on the request they respond to, e.g. DONE ends both LIST and RECV
+    responses but with a different size. The requests sent are registered in order with
+    :meth:`~adbwp.sync.Decoder.expect`; records received while no response is expected are decoded as
+    requests and the setup, DATA, and DONE records that follow them, as received by the remote end.
+
+    File contents are never copied or buffered: DATA records are views over the fed data payloads, and a
+    DATA record that spans data payloads is produced in parts, one for each of them. Only the start of a record
+    split between data payloads is buffered, which is at most its header for DATA records, and it is completed
+    from the start of the next one. Fed data payloads must not be modified while records decoded from them are
+    in use.
+    """
+
+    __slots__ = ('_expected', '_buffer', '_remaining', '_setup')
+
+    def __init__(self) -> None:
+        self._expected = collections.deque()  # type: typing.Deque[enums.SyncId]
+        self._buffer = bytearray()
+        self._remaining = 0
+        self._setup = None  # type: typing.Optional[enums.SyncId]
+
+    def __len__(self) -> hints.Int:
+        """
+        Number of bytes that have been received but not yet consumed by a complete record.
+
+        :return: Number of buffered bytes
+        :rtype: :class:`~int`
+        """
+        return len(self._buffer)
+
+    @property
+    def expected(self) -> typing.List[enums.SyncId]:
+        """
+        Requests whose response has not been completely received, in order.
+
+        :return: Identifiers of requests
+        :rtype: :class:`~list`
+        """
+        return list(self._expected)
+
+    def expect(self, sync_id: enums.SyncId) -> None:
+        """
+        Register a request sent to the remote system whose response should be decoded after the responses
+        of the previously registered ones.
+
+        :param sync_id: Identifier of the sent request
+        :type sync_id: :class:`~adbwp.enums.SyncId`
+        :return: Nothing
+        :rtype: :class:`~NoneType`
+        :raises ValueError: When the identifier is not of a request with a response
+        """
+        if sync_id not in RESPONDED_REQUESTS:
+            raise ValueError('Expected one of {}; got {}'.format(
+                ', '.join(s.name for s in sorted(RESPONDED_REQUESTS)), sync_id))
+        self._expected.append(enums.SyncId(sync_id))
+
+    def feed(self, data: hints.Buffer) -> typing.List[Record]:  # pylint: disable=redefined-outer-name
+        """
+        Consume the given data payload and return all records that are now complete.
+
+        :param data: Data payload received on the sync stream
+        :type data: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+        :return: Complete records in the order they were received
+        :rtype: :class:`~list`
+        :raises UnpackError: When a record is malformed or unexpected
+        """
+        view = memoryview(data).cast('B')
+
+        records = []  # type: typing.List[Record]
+        offset = 0
+        if self._buffer:
+            offset = self._complete(view, records)
+            if self._buffer:
+                return records
+
+        if self._remaining and offset < len(view):
+            end = min(offset + self._remaining, len(view))
+            records.append(Data(view[offset:end]))
+            self._remaining -= end - offset
+            offset = end
+
+        while True:
+            decoded = self._decode(view, offset)
+            if decoded is None:
+                break
+            record, offset = decoded
+            if record is not None:
+                records.append(record)
+
+        self._buffer = bytearray(view[offset:])
+        return records
+
+    def _complete(self, view: memoryview, records: typing.List[Record]) -> hints.Int:
+        """
+        Complete the buffered start of a record with only the bytes it needs from the start of the given view,
+        appending it to the records, and return the offset of the rest of the view. The record stays buffered
+        when the view does not complete it.
+        """
+        buffer = self._buffer
+        offset = 0
+        size = self._size(buffer)
+        while len(buffer) < size:
+            if offset == len(view):
+                return offset
+            end = min(offset + size - len(buffer), len(view))
+            buffer += view[offset:end]
+            offset = end
+            size = self._size(buffer)
+
+        self._buffer = bytearray()
+        record, _ = self._decode(memoryview(buffer), 0)
+        if record is not None:
+            records.append(record)
+        return offset
+
+    def _size(self, buffer: bytearray) -> hints.Int:
+        """
+        Get the number of bytes of the record at the start of the given buffer needed to decode it, excluding
+        the contents of DATA records, which are produced in parts. The size grows as more of the record is
+        available, e.g. once the name length of a DENT record is.
+        """
+        if len(buffer) < RECORD_STRUCT.size:
+            return RECORD_STRUCT.size
+        if self._setup is not None:
+            return SEND_V2_SETUP_STRUCT.size if self._setup == enums.SyncId.SND2 else RECORD_STRUCT.size
+
+        value, length = RECORD_STRUCT.unpack_from(buffer)
+        expected = self._expected[0] if self._expected else None
+        context = V2_REQUESTS.get(expected, expected)
+
+        size = RECORD_STRUCT.size
+        if context == enums.SyncId.STAT and value == enums.SyncId.STAT:
+            size = STAT_STRUCT.size
+        elif context == enums.SyncId.LIST and value in (enums.SyncId.DENT, enums.SyncId.DONE):
+            size = DENT_STRUCT.size
+            if value == enums.SyncId.DENT and len(buffer) >= size:
+                name_length = DENT_STRUCT.unpack_from(buffer)[-1]
+                _check_length(enums.SyncId.DENT, name_length)
+                size += name_length
+        elif value == enums.SyncId.FAIL or (value in REQUESTS and expected is None):
+            _check_length(enums.SyncId(value), length)
+            size += length
+        return size
+
+    def _decode(self, view: memoryview,
+                offset: hints.Int) -> typing.Optional[typing.Tuple[typing.Optional[Record], int]]:
+        """
+        Decode the record at the given offset, returning it and the offset of the next one, or :data:`None`
+        when it is not complete. The first part of a DATA record that is not complete is returned with the
+        offset of the end of the view.
+
+        Records are decoded by the handler of the response context, i.e. the request they respond to, or of
+        requests when no response is expected.
+        """
+        if len(view) - offset < RECORD_STRUCT.size:
+            return None
+
+        value, length = RECORD_STRUCT.unpack_from(view, offset)
+        try:
+            sync_id = enums.SyncId(value)
+        except ValueError:
+            raise exceptions.UnpackError('Unknown sync record identifier {:#x}'.format(value)) from None
+
+        if self._setup is not None:
+            return self._decode_setup(view, offset, sync_id)
+        if sync_id == enums.SyncId.FAIL:
+            return self._decode_fail(view, offset, length)
+
+        expected = self._expected[0] if self._expected else None
+        return self._DECODERS[V2_REQUESTS.get(expected, expected)](self, view, offset, sync_id, length)
+
+    def _decode_stat(self, view: memoryview, offset: hints.Int, sync_id: enums.SyncId,
+                     _length: hints.Int) -> typing.Optional[typing.Tuple[Stat, int]]:
+        """
+        Decode the response to a STAT request.
+        """
+        if sync_id != enums.SyncId.STAT:
+            raise self._unexpected(sync_id)
+        if len(view) - offset < STAT_STRUCT.size:
+            return None
+
+        self._expected.popleft()
+        return Stat(*STAT_STRUCT.unpack_from(view, offset)[1:]), offset + STAT_STRUCT.size
+
+    def _decode_list(self, view: memoryview, offset: hints.Int, sync_id: enums.SyncId,
+                     _length: hints.Int) -> typing.Optional[typing.Tuple[typing.Union[Dent, Done], int]]:
+        """
+        Decode a DENT record or the DONE record that ends the response to a LIST request.
+        """
+        if sync_id not in (enums.SyncId.DENT, enums.SyncId.DONE):
+            raise self._unexpected(sync_id)
+        available = len(view) - offset - DENT_STRUCT.size
+        if available < 0:
+            return None
+
+        _, mode, size, mtime, length = DENT_STRUCT.unpack_from(view, offset)
+        start = offset + DENT_STRUCT.size
+        if sync_id == enums.SyncId.DONE:
+            self._expected.popleft()
+            return Done(0), start
+        if not _check_length(sync_id, length, available):
+            return None
+        return Dent(mode, size, mtime, _decode_str(view[start:start + length])), start + length
+
+    def _decode_send(self, _view: memoryview, offset: hints.Int, sync_id: enums.SyncId,
+                     _length: hints.Int) -> typing.Tuple[Okay, int]:
+        """
+        Decode the OKAY response to a SEND request.
+        """
+        if sync_id != enums.SyncId.OKAY:
+            raise self._unexpected(sync_id)
+
+        self._expected.popleft()
+        return Okay(), offset + RECORD_STRUCT.size
+
+    def _decode_recv(self, view: memoryview, offset: hints.Int, sync_id: enums.SyncId,
+                     length: hints.Int) -> typing.Tuple[typing.Optional[typing.Union[Data, Done]], int]:
+        """
+        Decode a DATA record or the DONE record that ends the response to a RECV request.
+        """
+        if sync_id == enums.SyncId.DATA:
+            return self._decode_data(view, offset, length)
+        if sync_id != enums.SyncId.DONE:
+            raise self._unexpected(sync_id)
+
+        self._expected.popleft()
+        return Done(length), offset + RECORD_STRUCT.size
+
+    def _decode_request(self, view: memoryview, offset: hints.Int, sync_id: enums.SyncId,
+                        length: hints.Int) -> typing.Optional[typing.Tuple[typing.Optional[Record], int]]:
+        """
+        Decode a request, or a DATA or DONE record that follows a SEND request, received while no response
+        is expected.
+        """
+        if sync_id == enums.SyncId.DATA:
+            return self._decode_data(view, offset, length)
+        if sync_id == enums.SyncId.DONE:
+            return Done(length), offset + RECORD_STRUCT.size
+        if sync_id not in REQUESTS:
+            raise self._unexpected(sync_id)
+
+        start = offset + RECORD_STRUCT.size
+        if not _check_length(sync_id, length, len(view) - start):
+            return None
+        if sync_id in V2_REQUESTS:
+            self._setup = sync_id
+        return Request(sync_id, _decode_str(view[start:start + length])), start + length
+
+    def _decode_data(self, view: memoryview, offset: hints.Int,
+                     length: hints.Int) -> typing.Tuple[typing.Optional[Data], int]:
+        """
+        Decode a DATA record, or the first part of one that is not complete, which is returned with the offset
+        of the end of the view.
+        """
+        start = offset + RECORD_STRUCT.size
+        end = start + length
+        if not _check_length(enums.SyncId.DATA, length, len(view) - start):
+            self._remaining = end - len(view)
+            end = len(view)
+            if start == end:
+                return None, end
+        return Data(view[start:end]), end
+
+    def _decode_fail(self, view: memoryview, offset: hints.Int,
+                     length: hints.Int) -> typing.Optional[typing.Tuple[Fail, int]]:
+        """
+        Decode the FAIL response to any request.
+        """
+        start = offset + RECORD_STRUCT.size
+        if not _check_length(enums.SyncId.FAIL, length, len(view) - start):
+            return None
+
+        if self._expected:
+            self._expected.popleft()
+        return Fail(_decode_str(view[start:start + length])), start + length
+
+    def _unexpected(self, sync_id: enums.SyncId) -> exceptions.UnpackError:
+        """
+        Create the error raised for a record that is not valid in the current response context.
+        """
+        expected = self._expected[0] if self._expected else None
+        return exceptions.UnpackError('Unexpected {} record {}'.format(
+            sync_id.name, 'without a request' if expected is None else 'in response to {}'.format(expected.name)))
+
+    #: Record decoders by the request whose response they decode, and for requests when none is expected.
+    _DECODERS = {
+        enums.SyncId.STAT: _decode_stat,
+        enums.SyncId.LIST: _decode_list,
+        enums.SyncId.SEND: _decode_send,
+        enums.SyncId.RECV: _decode_recv,
+        None: _decode_request
+    }  # type: typing.Dict[typing.Optional[enums.SyncId], typing.Callable[..., typing.Any]]
+
+    def _decode_setup(self, view: memoryview, offset: hints.Int,
+                      sync_id: enums.SyncId) -> typing.Optional[typing.Tuple[Setup, int]]:
+        """
+        Decode the setup record that follows a SEND_V2 or RECV_V2 request.
+        """
+        if sync_id != self._setup:
+            raise exceptions.UnpackError('Expected {} setup record; got {}'.format(self._setup.name, sync_id.name))
+
+        if sync_id == enums.SyncId.SND2:
+            if len(view) - offset < SEND_V2_SETUP_STRUCT.size:
+                return None
+            _, mode, flags = SEND_V2_SETUP_STRUCT.unpack_from(view, offset)
+            end = offset + SEND_V2_SETUP_STRUCT.size
+        else:
+            _, flags = RECORD_STRUCT.unpack_from(view, offset)
+            mode, end = 0, offset + RECORD_STRUCT.size
+        self._setup = None
+        return Setup(sync_id, mode, flags), end
+
+
+def request(sync_id: enums.SyncId, path: hints.Str) -> hints.Bytes:
+    """
+    Create a STAT, LIST, SEND, RECV, QUIT, SEND_V2, or RECV_V2 request record. SEND_V2 and RECV_V2 requests
+    must be followed by their setup record; see :func:`~adbwp.sync.send_v2_request` and
+    :func:`~adbwp.sync.recv_v2_request`.
+
+    :param sync_id: Identifier of the request
+    :type sync_id: :class:`~adbwp.enums.SyncId`
+    :param path: Path on the remote system
+    :type path: :class:`~str` or :class:`~bytes`
+    :return: Request record
+    :rtype: :class:`~bytes`
+    :raises ValueError: When the identifier is not of a request
+    :raises ValueError: When the path is longer than :attr:`~adbwp.consts.SYNC_DATA_MAX`
+    """
+    if sync_id not in REQUESTS:
+        raise ValueError('Expected one of {}; got {}'.format(', '.join(s.name for s in sorted(REQUESTS)), sync_id))
+    return _variable(sync_id, payload.as_bytes(path))
+
+
+def send_request(path: hints.Str, mode: hints.Int) -> hints.Bytes:
+    """
+    Create a SEND request record for a file to write on the remote system.
+
+    :param path: Path on the remote system
+    :type path: :class:`~str`
+    :param mode: File mode, e.g. 0o100644
+    :type mode: :class:`~int`
+    :return: Request record
+    :rtype: :class:`~bytes`
+    :raises ValueError: When the path is longer than :attr:`~adbwp.consts.SYNC_DATA_MAX`
+    """
+    return request(enums.SyncId.SEND, '{},{}'.format(path, mode))
+
+
+def send_v2_request(path: hints.Str, mode: hints.Int, flags: hints.Int = enums.SyncFlag.NONE) -> hints.Bytes:
+    """
+    Create a SEND_V2 request record and its setup record for a file to write on the remote system.
+
+    :param path: Path on the remote system
+    :type path: :class:`~str`
+    :param mode: File mode, e.g. 0o100644
+    :type mode: :class:`~int`
+    :param flags: (Optional) Compression codec and dry run flags
+    :type flags: :class:`~adbwp.enums.SyncFlag` or :class:`~int`
+    :return: Request and setup records
+    :rtype: :class:`~bytes`
+    :raises ValueError: When the path is longer than :attr:`~adbwp.consts.SYNC_DATA_MAX`
+    """
+    return request(enums.SyncId.SND2, path) + SEND_V2_SETUP_STRUCT.pack(enums.SyncId.SND2, mode, flags)
+
+
+def recv_v2_request(path: hints.Str, flags: hints.Int = enums.SyncFlag.NONE) -> hints.Bytes:
+    """
+    Create a RECV_V2 request record and its setup record for a file to read from the remote system.
+
+    :param path: Path on the remote system
+    :type path: :class:`~str`
+    :param flags: (Optional) Compression codec flag
+    :type flags: :class:`~adbwp.enums.SyncFlag` or :class:`~int`
+    :return: Request and setup records
+    :rtype: :class:`~bytes`
+    :raises ValueError: When the path is longer than :attr:`~adbwp.consts.SYNC_DATA_MAX`
+    """
+    return request(enums.SyncId.RCV2, path) + RECORD_STRUCT.pack(enums.SyncId.RCV2, flags)
+
+
+def stat(mode: hints.Int, size: hints.Int, mtime: hints.Int) -> hints.Bytes:
+    """
+    Create a STAT response record.
+
+    :param mode: File mode
+    :type mode: :class:`~int`
+    :param size: File size, truncated to 32 bits
+    :type size: :class:`~int`
+    :param mtime: Modification time in seconds since the epoch
+    :type mtime: :class:`~int`
+    :return: Response record
+    :rtype: :class:`~bytes`
+    """
+    return STAT_STRUCT.pack(enums.SyncId.STAT, mode, size & consts.COMMAND_MASK, mtime)
+
+
+def dent(mode: hints.Int, size: hints.Int, mtime: hints.Int, name: hints.Str) -> hints.Bytes:
+    """
+    Create a DENT record of a LIST response.
+
+    :param mode: File mode
+    :type mode: :class:`~int`
+    :param size: File size, truncated to 32 bits
+    :type size: :class:`~int`
+    :param mtime: Modification time in seconds since the epoch
+    :type mtime: :class:`~int`
+    :param name: Name of the directory entry
+    :type name: :class:`~str` or :class:`~bytes`
+    :return: Directory entry record
+    :rtype: :class:`~bytes`
+    :raises ValueError: When the name is longer than :attr:`~adbwp.consts.SYNC_DATA_MAX`
+    """
+    name = payload.as_bytes(name)
+    _check_length(enums.SyncId.DENT, len(name), error=ValueError)
+    return DENT_STRUCT.pack(enums.SyncId.DENT, mode, size & consts.COMMAND_MASK, mtime, len(name)) + name
+
+
+def list_done() -> hints.Bytes:
+    """
+    Create the DONE record that ends a LIST response.
+
+    :return: Done record
+    :rtype: :class:`~bytes`
+    """
+    return DENT_STRUCT.pack(enums.SyncId.DONE, 0, 0, 0, 0)
+
+
+def data(chunk: hints.Buffer) -> hints.Bytes:
+    """
+    Create a DATA record with a chunk of file contents.
+
+    :param chunk: File contents
+    :type chunk: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+    :return: Data record
+    :rtype: :class:`~bytes`
+    :raises ValueError: When the chunk is longer than :attr:`~adbwp.consts.SYNC_DATA_MAX`
+    """
+    return _variable(enums.SyncId.DATA, chunk)
+
+
+def data_records(contents: hints.Buffer, size: hints.Int = consts.SYNC_DATA_MAX) -> typing.Iterator[hints.Buffer]:
+    """
+    Split file contents into DATA records without copying them.
+
+    Records are yielded as the header of each record followed by a view of its chunk of the contents,
+    to be joined by :func:`~adbwp.sync.payloads`.
+
+    :param contents: File contents
+    :type contents: :class:`~bytes`, :class:`~bytearray`, :class:`~memoryview`, or :class:`~mmap.mmap`
+    :param size: (Optional) Maximum size of each chunk
+    :type size: :class:`~int`
+    :return: Iterator of record headers and chunks
+    :rtype: :class:`~collections.abc.Iterator`
+    :raises ValueError: When size is not positive or greater than :attr:`~adbwp.consts.SYNC_DATA_MAX`
+    """
+    if not 0 < size <= consts.SYNC_DATA_MAX:
+        raise ValueError('Size must be between 1 and {}; got {}'.format(consts.SYNC_DATA_MAX, size))
+
+    view = memoryview(contents).cast('B')
+    for start in range(0, len(view), size):
+        chunk = view[start:start + size]
+        yield RECORD_STRUCT.pack(enums.SyncId.DATA, len(chunk))
+        yield chunk
+
+
+def compressed_data_records(chunks: typing.Iterable[hints.Buffer],
+                            codec: compression.Codec) -> typing.Iterator[hints.Bytes]:
+    """
+    Compress file contents given as chunks into DATA records of a single compressed stream.
+
+    Compressed data is held until it fills a record of :attr:`~adbwp.consts.SYNC_DATA_MAX`, so memory stays
+    bounded by one record and one chunk regardless of the size of the file.
+
+    :param chunks: File contents, e.g. blocks read from a file
+    :type chunks: :class:`~collections.abc.Iterable`
+    :param codec: Codec to compress with
+    :type codec: :class:`~adbwp.compression.Codec`
+    :return: Iterator of data records
+    :rtype: :class:`~collections.abc.Iterator`
+    """
+    buffer = bytearray()
+    for compressed in compression.compress(chunks, codec):
+        buffer += compressed
+        while len(buffer) >= consts.SYNC_DATA_MAX:
+            with memoryview(buffer) as view:
+                record = data(view[:consts.SYNC_DATA_MAX])
+            del buffer[:consts.SYNC_DATA_MAX]
+            yield record
+    if buffer:
+        yield data(buffer)
+
+
+def done(mtime: hints.Int = 0) -> hints.Bytes:
+    """
+    Create the DONE record that ends a SEND request, or a RECV response when the modification time is zero.
+
+    :param mtime: (Optional) Modification time of the sent file in seconds since the epoch
+    :type mtime: :class:`~int`
+    :return: Done record
+    :rtype: :class:`~bytes`
+    """
+    return RECORD_STRUCT.pack(enums.SyncId.DONE, mtime)
+
+
+def okay() -> hints.Bytes:
+    """
+    Create the OKAY record of a successful SEND response.
+
+    :return: Okay record
+    :rtype: :class:`~bytes`
+    """
+    return RECORD_STRUCT.pack(enums.SyncId.OKAY, 0)
+
+
+def fail(message: hints.Str) -> hints.Bytes:
+    """
+    Create the FAIL record of a failed response.
+
+    :param message: Reason for the failure
+    :type message: :class:`~str`
+    :return: Fail record
+    :rtype: :class:`~bytes`
+    :raises ValueError: When the message is longer than :attr:`~adbwp.consts.SYNC_DATA_MAX`
+    """
+    return _variable(enums.SyncId.FAIL, payload.as_bytes(message))
+
+
+def payloads(records: typing.Iterable[hints.Buffer],
+             max_data: hints.Int = consts.MAXDATA) -> typing.Iterator[hints.Bytes]:
+    """
+    Pack records back to back into data payloads of exactly `max_data` bytes, except for the last one,
+    so that each write message of the sync stream is as large as the negotiated max data allows.
+
+    :param records: Encoded records, or parts of records such as from :func:`~adbwp.sync.data_records`
+    :type records: :class:`~collections.abc.Iterable`
+    :param max_data: (Optional) Maximum size of each data payload
+    :type max_data: :class:`~int`
+    :return: Iterator of data payloads
+    :rtype: :class:`~collections.abc.Iterator`
+    :raises ValueError: When max data is not positive
+    """
+    if max_data <= 0:
+        raise ValueError('Max data must be greater than zero; got {}'.format(max_data))
+
+    # Views of the records are collected and joined once per data payload, so contents are copied only once.
+    parts = []  # type: typing.List[memoryview]
+    size = 0
+    for record in records:
+        view = memoryview(record).cast('B')
+        while len(view) > max_data - size:
+            split = max_data - size
+            parts.append(view[:split])
+            yield b''.join(parts)
+            parts, size, view = [], 0, view[split:]
+        if view:
+            parts.append(view)
+            size += len(view)
+    if parts:
+        yield b''.join(parts)
+
+
+def send_file(path: hints.Str, mode: hints.Int, contents: hints.Buffer, mtime: hints.Int,
+              max_data: hints.Int = consts.MAXDATA) -> typing.Iterator[hints.Bytes]:
+    """
+    Create the data payloads of a SEND request that writes a file on the remote system: the request, the
+    contents in DATA records, and the DONE record, packed by :func:`~adbwp.sync.payloads`.
+
+    :param path: Path on the remote system
+    :type path: :class:`~str`
+    :param mode: File mode, e.g. 0o100644
+    :type mode: :class:`~int`
+    :param contents: File contents
+    :type contents: :class:`~bytes`, :class:`~bytearray`, :class:`~memoryview`, or :class:`~mmap.mmap`
+    :param mtime: Modification time of the file in seconds since the epoch
+    :type mtime: :class:`~int`
+    :param max_data: (Optional) Maximum size of each data payload
+    :type max_data: :class:`~int`
+    :return: Iterator of data payloads
+    :rtype: :class:`~collections.abc.Iterator`
+    :raises ValueError: When the path is longer than :attr:`~adbwp.consts.SYNC_DATA_MAX`
+    """
+    return payloads(itertools.chain((send_request(path, mode),), data_records(contents), (done(mtime),)), max_data)
+
+
+def send_file_v2(path: hints.Str, mode: hints.Int, chunks: typing.Iterable[hints.Buffer], mtime: hints.Int,
+                 flags: hints.Int = enums.SyncFlag.NONE,
+                 max_data: hints.Int = consts.MAXDATA) -> typing.Iterator[hints.Bytes]:
+    """
+    Create the data payloads of a SEND_V2 request that writes a file on the remote system: the request and
+    its setup, the contents compressed by the codec in DATA records, and the DONE record, packed by
+    :func:`~adbwp.sync.payloads`.
+
+    Contents are read, compressed, and packed lazily as the returned iterator is consumed.
+
+    :param path: Path on the remote system
+    :type path: :class:`~str`
+    :param mode: File mode, e.g. 0o100644
+    :type mode: :class:`~int`
+    :param chunks: File contents, e.g. blocks read from a file
+    :type chunks: :class:`~collections.abc.Iterable`
+    :param mtime: Modification time of the file in seconds since the epoch
+    :type mtime: :class:`~int`
+    :param flags: (Optional) Flags of the request; the registered codec they select compresses the contents,
+        which are sent uncompressed when they select none, and :attr:`~adbwp.enums.SyncFlag.DRY_RUN` asks the
+        remote system to discard the contents instead of writing the file
+    :type flags: :class:`~int`
+    :param max_data: (Optional) Maximum size of each data payload
+    :type max_data: :class:`~int`
+    :return: Iterator of data payloads
+    :rtype: :class:`~collections.abc.Iterator`
+    :raises ValueError: When the flags select an unknown codec or more than one
+    :raises ValueError: When the path is longer than :attr:`~adbwp.consts.SYNC_DATA_MAX`
+    """
+    codec = compression.from_flags(flags)
+    if codec is None:
+        records = itertools.chain.from_iterable(data_records(chunk) for chunk in chunks)
+    else:
+        records = compressed_data_records(chunks, codec)
+
+    request_ = send_v2_request(path, mode, flags)
+    return payloads(itertools.chain((request_,), records, (done(mtime),)), max_data)
+
+
+def _variable(sync_id: enums.SyncId, value: hints.Buffer) -> hints.Bytes:
+    """
+    Create a record of the given identifier followed by the length of the given value and the value.
+    """
+    with memoryview(value) as view:
+        view = view.cast('B')
+        _check_length(sync_id, len(view), error=ValueError)
+        return RECORD_STRUCT.pack(sync_id, len(view)) + view
+
+
+def _check_length(sync_id: enums.SyncId, length: hints.Int, available: typing.Optional[hints.Int] = None,
+                  error: typing.Type[Exception] = exceptions.UnpackError) -> hints.Bool:
+    """
+    Check that the length of a record value is within :attr:`~adbwp.consts.SYNC_DATA_MAX`, returning whether
+    or not the value is available.
+    """
+    if length > consts.SYNC_DATA_MAX:
+        raise error('{} record length must be at most {}; got {}'.format(sync_id.name, consts.SYNC_DATA_MAX, length))
+    return available is None or length <= available
+
+
+def _decode_str(view: memoryview) -> hints.Str:
+    """
+    Decode a path, name, or failure message.
+    """
+    return str(view, 'utf-8', 'replace')
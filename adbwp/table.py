@@ -0,0 +1,226 @@
+"""
+    adbwp.table
+    ~~~~~~~~~~~
+
+    Compact storage of large numbers of message headers.
+"""
+import array
+import sys
+import typing
+
+from . import enums, exceptions, header, hints
+
+__all__ = ['HeaderTable']
+
+
+#: Type code of an :class:`~array.array` of unsigned 32-bit integers on this platform.
+TYPECODE = 'I' if array.array('I').itemsize == 4 else 'L'
+
+
+#: Number of 32-bit words in each header.
+WORDS = 6
+
+
+#: Command values of messages that carry stream ids in their "arg0" and "arg1" words.
+STREAM_COMMANDS = frozenset((enums.Command.OPEN.value, enums.Command.OKAY.value,
+                             enums.Command.WRTE.value, enums.Command.CLSE.value))
+
+
+class HeaderTable:
+    """
+    Sequence of :class:`~adbwp.header.Header` values stored back to back as the six 32-bit words of
+    :attr:`~adbwp.header.HEADER_FORMAT` in a single :class:`~array.array`.
+
+    Each header takes 24 bytes instead of a tuple with six :class:`~int` objects. Indexing materializes a
+    :class:`~adbwp.header.Header` on access; slicing and filtering return new tables without materializing
+    any. Commands that are not a known :class:`~adbwp.enums.Command` are materialized as :class:`~int`.
+    """
+
+    __slots__ = ('_words',)
+
+    def __init__(self, headers: typing.Iterable[header.Header] = ()) -> None:
+        self._words = array.array(TYPECODE)
+        self.extend(headers)
+
+    def __len__(self) -> hints.Int:
+        return len(self._words) // WORDS
+
+    def __iter__(self) -> typing.Iterator[header.Header]:
+        words = self._words
+        for start in range(0, len(words), WORDS):
+            yield _header(words[start:start + WORDS])
+
+    def __eq__(self, other: typing.Any) -> hints.Bool:
+        if not isinstance(other, HeaderTable):
+            return NotImplemented
+        return self._words == other._words
+
+    def __repr__(self) -> hints.Str:
+        return '<{} with {} headers>'.format(type(self).__name__, len(self))
+
+    def __getitem__(self, index: typing.Union[hints.Int, slice]) -> typing.Union[header.Header, 'HeaderTable']:
+        """
+        Get the header at the given index, or a new table with the headers of the given slice.
+
+        :param index: Index of a header or slice of headers
+        :type index: :class:`~int` or :class:`~slice`
+        :return: Header at the index or table of the sliced headers
+        :rtype: :class:`~adbwp.header.Header` or :class:`~adbwp.table.HeaderTable`
+        :raises IndexError: When the index is out of range
+        """
+        if isinstance(index, slice):
+            table = HeaderTable()
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                table._words = self._words[start * WORDS:max(start, stop) * WORDS]  # pylint: disable=protected-access
+            else:
+                for i in range(start, stop, step):
+                    table._words.extend(self._words[i * WORDS:(i + 1) * WORDS])  # pylint: disable=protected-access
+            return table
+
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('Header table index out of range')
+        return _header(self._words[index * WORDS:(index + 1) * WORDS])
+
+    @property
+    def nbytes(self) -> hints.Int:
+        """
+        Number of bytes used to store the headers in the table.
+
+        :return: Size of the stored headers in bytes
+        :rtype: :class:`~int`
+        """
+        return len(self._words) * self._words.itemsize
+
+    def append(self, instance: header.Header) -> None:
+        """
+        Append the given :class:`~adbwp.header.Header` to the end of the table.
+
+        :param instance: Header to append
+        :type instance: :class:`~adbwp.header.Header`
+        :return: Nothing
+        :rtype: :class:`~NoneType`
+        :raises OverflowError: When a header value does not fit in an unsigned 32-bit word
+        """
+        self._words.extend(array.array(TYPECODE, instance))
+
+    def extend(self, headers: typing.Iterable[header.Header]) -> None:
+        """
+        Append all given :class:`~adbwp.header.Header` instances to the end of the table. The table is left
+        unchanged when any of them cannot be appended.
+
+        :param headers: Headers to append
+        :type headers: :class:`~collections.abc.Iterable`
+        :return: Nothing
+        :rtype: :class:`~NoneType`
+        :raises OverflowError: When a header value does not fit in an unsigned 32-bit word
+        """
+        words = self._words
+        size = len(words)
+        try:
+            for instance in headers:
+                words.extend(array.array(TYPECODE, instance))
+        except Exception:
+            del words[size:]
+            raise
+
+    def frombytes(self, buffer: hints.Buffer) -> None:
+        """
+        Append all headers serialized back to back in the given buffer to the end of the table.
+
+        :param buffer: Buffer containing headers packed back to back
+        :type buffer: :class:`~bytes`, :class:`~bytearray`, or :class:`~memoryview`
+        :return: Nothing
+        :rtype: :class:`~NoneType`
+        :raises UnpackError: When the buffer length is not a multiple of the header size
+        """
+        view = memoryview(buffer).cast('B')
+        if len(view) % header.BYTES:
+            raise exceptions.UnpackError('Buffer length must be a multiple of {}; got {}'.format(
+                header.BYTES, len(view)))
+
+        if sys.byteorder == 'little':
+            self._words.frombytes(view)
+        else:  # pragma: no cover
+            words = array.array(TYPECODE)
+            words.frombytes(view)
+            words.byteswap()
+            self._words.extend(words)
+
+    def tobytes(self) -> hints.Bytes:
+        """
+        Serialize all headers in the table back to back as in :func:`~adbwp.header.to_bytes`.
+
+        :return: Headers represented as bytes
+        :rtype: :class:`~bytes`
+        """
+        if sys.byteorder == 'big':  # pragma: no cover
+            words = array.array(TYPECODE, self._words)
+            words.byteswap()
+            return words.tobytes()
+        return self._words.tobytes()
+
+    def filter(self, command: typing.Optional[hints.Command] = None,
+               stream_id: typing.Optional[hints.Int] = None) -> 'HeaderTable':
+        """
+        Create a new table with the headers that match all given criteria.
+
+        :param command: (Optional) Command identifier headers must have
+        :type command: :class:`~adbwp.enums.Command` or :class:`~int`
+        :param stream_id: (Optional) Stream id either argument of OPEN, OKAY, WRTE, or CLSE headers must have
+        :type stream_id: :class:`~int`
+        :return: Table of matching headers in their original order
+        :rtype: :class:`~adbwp.table.HeaderTable`
+        """
+        words = self._words
+        rows = zip(range(0, len(words), WORDS), words[0::WORDS], words[1::WORDS], words[2::WORDS])
+
+        if command is not None:
+            rows = (row for row in rows if row[1] == command)
+        if stream_id is not None:
+            rows = (row for row in rows if row[1] in STREAM_COMMANDS and stream_id in (row[2], row[3]))
+
+        table = HeaderTable()
+        for start, *_ in rows:
+            table._words.extend(words[start:start + WORDS])  # pylint: disable=protected-access
+        return table
+
+    def truncate(self, size: hints.Int) -> None:
+        """
+        Remove the oldest headers so that at most `size` of the most recently appended remain.
+
+        Removing headers moves the remaining ones, so rolling logs should let the table grow past the
+        desired size and truncate it in batches.
+
+        :param size: Maximum number of headers to keep
+        :type size: :class:`~int`
+        :return: Nothing
+        :rtype: :class:`~NoneType`
+        :raises ValueError: When size is negative
+        """
+        if size < 0:
+            raise ValueError('Size must not be negative; got {}'.format(size))
+
+        remove = len(self) - size
+        if remove > 0:
+            del self._words[:remove * WORDS]
+
+    def clear(self) -> None:
+        """
+        Remove all headers from the table.
+
+        :return: Nothing
+        :rtype: :class:`~NoneType`
+        """
+        del self._words[:]
+
+
+def _header(words: typing.Sequence[hints.Int]) -> header.Header:
+    """
+    Create a :class:`~adbwp.header.Header` from the six words of a stored header.
+    """
+    command, *args = words
+    return header.new(header.COMMAND_BY_VALUE.get(command, command), *args)
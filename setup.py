@@ -39,6 +39,12 @@ setup(
     description='Android Debug Bridge (ADB) Wire Protocol',
     long_description=get_long_description(),
     packages=['adbwp'],
+    extras_require={
+        'brotli': ['brotli'],
+        'lz4': ['lz4'],
+        'numpy': ['numpy'],
+        'zstd': ['zstandard']
+    },
     classifiers=(
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
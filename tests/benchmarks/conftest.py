@@ -0,0 +1,39 @@
+"""
+    conftest
+    ~~~~~~~~
+
+    Shared fixtures for the benchmark suite.
+"""
+import os
+
+import pytest
+
+from adbwp import consts, enums, limits
+
+
+#: Data payload sizes benchmarked for every command; the largest one allowed for CONNECT and AUTH messages.
+COMMAND_PAYLOAD_SIZES = [0, consts.CONNECT_AUTH_MAXDATA]
+
+
+#: Data payload sizes additionally benchmarked for write messages, up to the largest allowed by newer versions.
+WRITE_PAYLOAD_SIZES = [16, 1024, 64 * 1024, consts.MAXDATA, consts.MAX_PAYLOAD]
+
+
+@pytest.fixture(scope='module', params=[(command, size) for command in enums.Command
+                                        for size in COMMAND_PAYLOAD_SIZES] +
+                [(enums.Command.WRTE, size) for size in WRITE_PAYLOAD_SIZES],
+                ids=lambda param: '{}-{}'.format(param[0].name, param[1]))
+def command_payload(request):
+    """
+    Fixture that yields every command with random data payloads of the sizes it is benchmarked with.
+    """
+    command, size = request.param
+    return command, os.urandom(size)
+
+
+@pytest.fixture(scope='module')
+def max_payload_limits():
+    """
+    Fixture that yields limits that allow data payloads up to :attr:`~adbwp.consts.MAX_PAYLOAD`.
+    """
+    return limits.new(max_data=consts.MAX_PAYLOAD)
@@ -0,0 +1,103 @@
+"""
+    test_aio_benchmark
+    ~~~~~~~~~~~~~~~~~~
+
+    Contains benchmarks for the :mod:`~adbwp.aio` module that receive messages from a loopback peer.
+"""
+import asyncio
+import os
+import socket
+import threading
+
+import pytest
+
+from adbwp import aio, message
+
+#: Number of messages sent by the loopback peer for each benchmark round.
+MESSAGE_COUNT = 256
+
+
+@pytest.fixture(scope='module', params=[1024, 64 * 1024, 256 * 1024])
+def payload_size(request):
+    """
+    Fixture that yields data payload sizes of the messages sent by the loopback peer.
+    """
+    return request.param
+
+
+@pytest.fixture(scope='module')
+def traffic(payload_size):
+    """
+    Fixture that yields serialized write messages sent by the loopback peer.
+    """
+    return message.to_bytes(message.write(1, 2, os.urandom(payload_size))) * MESSAGE_COUNT
+
+
+def receive(traffic, receiver):
+    """
+    Helper function that sends traffic from a loopback peer thread and waits for the receiver coroutine
+    to decode all of it.
+    """
+    left, right = socket.socketpair()
+    loop = asyncio.new_event_loop()
+    sender = threading.Thread(target=left.sendall, args=(traffic,))
+    sender.start()
+    try:
+        return loop.run_until_complete(receiver(right))
+    finally:
+        sender.join()
+        left.close()
+        loop.close()
+
+
+async def stream_reader_receiver(sock):
+    """
+    Receive all messages using :class:`~asyncio.StreamReader` and :func:`~adbwp.aio.read_message`.
+    """
+    reader, writer = await asyncio.open_connection(sock=sock)
+    try:
+        for _ in range(MESSAGE_COUNT):
+            await aio.read_message(reader)
+    finally:
+        writer.close()
+    return MESSAGE_COUNT
+
+
+def protocol_receiver(copy):
+    """
+    Create a coroutine function that receives all messages using :class:`~adbwp.aio.MessageProtocol`.
+    """
+    async def receiver(sock):
+        loop = asyncio.get_event_loop()
+        done = loop.create_future()
+        count = [0]
+
+        def callback(_):
+            count[0] += 1
+            if count[0] == MESSAGE_COUNT:
+                done.set_result(count[0])
+
+        transport, _ = await loop.create_connection(lambda: aio.MessageProtocol(callback, copy=copy), sock=sock)
+        try:
+            return await done
+        finally:
+            transport.close()
+    return receiver
+
+
+#: Marks receivers using :class:`~adbwp.aio.MessageProtocol`, which requires :class:`~asyncio.BufferedProtocol`.
+REQUIRES_BUFFERED_PROTOCOL = pytest.mark.skipif(not aio.BUFFERED_PROTOCOL_AVAILABLE,
+                                                reason='asyncio.BufferedProtocol requires Python 3.7+')
+
+
+@pytest.mark.parametrize('receiver', [
+    stream_reader_receiver,
+    pytest.param(protocol_receiver(copy=True), marks=REQUIRES_BUFFERED_PROTOCOL),
+    pytest.param(protocol_receiver(copy=False), marks=REQUIRES_BUFFERED_PROTOCOL)
+], ids=['stream_reader', 'protocol_copy', 'protocol_zero_copy'])
+def test_receive_messages(benchmark, traffic, receiver):
+    """
+    Benchmark receiving write messages from a loopback peer.
+    """
+    benchmark.extra_info['bytes'] = len(traffic)
+    assert benchmark.pedantic(receive, args=(traffic, receiver), rounds=5) == MESSAGE_COUNT
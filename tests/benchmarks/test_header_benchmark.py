@@ -0,0 +1,53 @@
+"""
+    test_header_benchmark
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Contains benchmarks for encoding and decoding headers with the :mod:`~adbwp.header` module.
+"""
+import pytest
+
+from adbwp import enums, header
+
+
+@pytest.fixture(scope='module', params=list(enums.Command), ids=lambda command: command.name)
+def random_header(request):
+    """
+    Fixture that yields a valid header for every command.
+    """
+    return header.new(request.param, 1, 2, 3, 4, header.magic(request.param))
+
+
+@pytest.fixture(scope='module')
+def header_bytes(random_header):
+    """
+    Fixture that yields the serialized header.
+    """
+    return header.to_bytes(random_header)
+
+
+def test_to_bytes(benchmark, random_header):
+    """
+    Benchmark :func:`~adbwp.header.to_bytes` for a single header.
+    """
+    benchmark(header.to_bytes, random_header)
+
+
+def test_from_bytes(benchmark, header_bytes):
+    """
+    Benchmark :func:`~adbwp.header.from_bytes` for a single header.
+    """
+    benchmark(header.from_bytes, header_bytes)
+
+
+def test_from_buffer(benchmark, header_bytes):
+    """
+    Benchmark :func:`~adbwp.header.from_buffer`, which also validates magic and data length, for a single header.
+    """
+    benchmark(header.from_buffer, header_bytes)
+
+
+def test_unpack_from(benchmark, header_bytes):
+    """
+    Benchmark :func:`~adbwp.header.unpack_from` for a single header.
+    """
+    benchmark(header.unpack_from, header_bytes)
@@ -0,0 +1,29 @@
+"""
+    test_host_benchmark
+    ~~~~~~~~~~~~~~~~~~~
+
+    Contains benchmarks for pipelined ADB server requests with the :mod:`~adbwp.host` module.
+"""
+from adbwp import host
+
+RESPONSES = host.okay('0029') * 1000
+
+
+def test_request(benchmark):
+    """
+    Benchmark creating a single request with :func:`~adbwp.host.request`.
+    """
+    benchmark(host.request, 'host:version')
+
+
+def test_decode_pipelined(benchmark):
+    """
+    Benchmark decoding the responses to 1000 pipelined "host:version" requests received at once.
+    """
+    def decode():
+        decoder = host.Decoder()
+        for _ in range(1000):
+            decoder.expect('host:version')
+        return decoder.feed(RESPONSES)
+
+    benchmark(decode)
@@ -0,0 +1,27 @@
+"""
+    test_identity_benchmark
+    ~~~~~~~~~~~~~~~~~~~~~~~
+
+    Contains benchmarks for parsing system identity strings with the :mod:`~adbwp.identity` module.
+"""
+from adbwp import enums, identity, message
+
+CONNECT = message.connect('', identity.banner({'ro.product.name': 'sailfish', 'ro.product.model': 'Pixel'},
+                                              ['shell_v2', 'cmd', 'stat_v2', 'ls_v2', 'delayed_ack', 'abb',
+                                               'abb_exec', 'sendrecv_v2', 'sendrecv_v2_brotli']),
+                          enums.SystemType.DEVICE)
+
+
+def test_from_message_cached(benchmark):
+    """
+    Benchmark :func:`~adbwp.identity.from_message` for a system identity string that was already parsed.
+    """
+    identity.from_message(CONNECT)
+    benchmark(identity.from_message, CONNECT)
+
+
+def test_from_bytes_uncached(benchmark):
+    """
+    Benchmark parsing a system identity string without the cache.
+    """
+    benchmark(identity._from_bytes.__wrapped__, CONNECT.data)  # pylint: disable=protected-access
@@ -0,0 +1,39 @@
+"""
+    test_import_benchmark
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Contains benchmarks for the cold start cost of importing the :mod:`~adbwp` package.
+"""
+import re
+import subprocess
+import sys
+
+import pytest
+
+#: Pattern of a ``python -X importtime`` line with the cumulative import time of a module in microseconds.
+IMPORT_TIME_PATTERN = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)$', re.MULTILINE)
+
+
+def import_time(statement):
+    """
+    Helper function that runs the given import statement in a new interpreter with ``-X importtime`` and
+    returns the cumulative import time of each top level module in microseconds.
+    """
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            stderr=subprocess.PIPE, check=True).stderr.decode()
+    return {name: int(cumulative) for cumulative, indent, name in IMPORT_TIME_PATTERN.findall(stderr) if not indent}
+
+
+@pytest.mark.parametrize('statement', [
+    'import adbwp',
+    'from adbwp import message',
+    'from adbwp import decoder'
+])
+def test_import_time(benchmark, statement):
+    """
+    Benchmark the cold start of a new interpreter that runs the given import statement and record the
+    cumulative import time of the :mod:`~adbwp` modules reported by ``python -X importtime``.
+    """
+    times = benchmark.pedantic(import_time, args=(statement,), rounds=10)
+    benchmark.extra_info['adbwp_import_us'] = sum(cumulative for name, cumulative in times.items()
+                                                  if name.split('.')[0] == 'adbwp')
@@ -0,0 +1,37 @@
+"""
+    test_message_benchmark
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Contains benchmarks for creating messages with the :mod:`~adbwp.message` module.
+"""
+from adbwp import header, message
+
+
+def test_new(benchmark, command_payload, max_payload_limits):
+    """
+    Benchmark :func:`~adbwp.message.new`, which checksums the data payload, for every command and payload size.
+    """
+    command, data = command_payload
+    benchmark.extra_info['bytes'] = len(data)
+    benchmark(message.new, command, 1, 2, data, max_payload_limits)
+
+
+def test_from_header(benchmark, command_payload, max_payload_limits):
+    """
+    Benchmark :func:`~adbwp.message.from_header`, which verifies the data payload checksum, for every
+    command and payload size.
+    """
+    command, data = command_payload
+    instance = message.new(command, 1, 2, data, max_payload_limits)
+    benchmark.extra_info['bytes'] = len(data)
+    benchmark(message.from_header, instance.header, data, max_payload_limits)
+
+
+def test_to_bytes(benchmark, command_payload, max_payload_limits):
+    """
+    Benchmark :func:`~adbwp.message.to_bytes` for every command and payload size.
+    """
+    command, data = command_payload
+    instance = message.new(command, 1, 2, data, max_payload_limits)
+    benchmark.extra_info['bytes'] = header.BYTES + len(data)
+    benchmark(message.to_bytes, instance)
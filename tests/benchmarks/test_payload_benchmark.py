@@ -0,0 +1,65 @@
+"""
+    test_payload_benchmark
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Contains benchmarks for the :mod:`~adbwp.payload` module.
+"""
+import os
+
+import pytest
+
+from adbwp import consts, payload
+
+
+@pytest.fixture(scope='module', params=[0, 16, 1024, 64 * 1024, consts.MAXDATA, consts.MAX_PAYLOAD])
+def random_payload(request):
+    """
+    Fixture that yields random data payloads from small control messages to large writes.
+    """
+    return os.urandom(request.param)
+
+
+@pytest.fixture(scope='module', params=[
+    payload.checksum,
+    payload.checksum_adler32,
+    pytest.param(payload.checksum_numpy, marks=pytest.mark.skipif(not payload.NUMPY_AVAILABLE,
+                                                                   reason='numpy is not installed'))
+])
+def checksum_function(request):
+    """
+    Fixture that yields all available checksum implementations.
+    """
+    return request.param
+
+
+def test_checksum(benchmark, checksum_function, random_payload):
+    """
+    Benchmark the checksum implementations across data payload sizes.
+    """
+    benchmark.extra_info['bytes'] = len(random_payload)
+    assert benchmark(checksum_function, random_payload) == sum(random_payload) & consts.COMMAND_MASK
+
+
+def test_checksum_builtin_sum(benchmark, random_payload):
+    """
+    Benchmark the original pure Python checksum as a baseline.
+    """
+    benchmark.extra_info['bytes'] = len(random_payload)
+    benchmark(lambda data: sum(data) & consts.COMMAND_MASK, random_payload)
+
+
+@pytest.fixture(scope='module', params=[bytes, bytearray, memoryview, lambda data: data.hex()],
+                ids=['bytes', 'bytearray', 'memoryview', 'str'])
+def random_payload_type(request, random_payload):
+    """
+    Fixture that yields the random data payload as every supported type.
+    """
+    return request.param(random_payload)
+
+
+def test_as_bytes(benchmark, random_payload_type):
+    """
+    Benchmark :func:`~adbwp.payload.as_bytes` across data payload types and sizes.
+    """
+    benchmark.extra_info['bytes'] = len(random_payload_type)
+    benchmark(payload.as_bytes, random_payload_type)
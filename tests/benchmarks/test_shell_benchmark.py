@@ -0,0 +1,31 @@
+"""
+    test_shell_benchmark
+    ~~~~~~~~~~~~~~~~~~~~
+
+    Contains benchmarks for decoding shell protocol packets with the :mod:`~adbwp.shell` module.
+"""
+import pytest
+
+from adbwp import consts, enums, shell
+
+
+@pytest.fixture(scope='module', params=[16, 1024, 64 * 1024])
+def output_payloads(request):
+    """
+    Fixture that yields 1 MiB of stdout and stderr packets of the given size packed into max data payloads.
+    """
+    data = b'x' * request.param
+    ids = (enums.ShellId.STDOUT, enums.ShellId.STDERR)
+    stream = b''.join(shell.packet(ids[i % 2], data) for i in range(1024 * 1024 // request.param))
+    return [stream[i:i + consts.MAXDATA] for i in range(0, len(stream), consts.MAXDATA)]
+
+
+def test_decode_output(benchmark, output_payloads):
+    """
+    Benchmark decoding 1 MiB of shell output with a :class:`~adbwp.shell.Decoder`.
+    """
+    def decode():
+        decoder = shell.Decoder()
+        return [decoder.feed(p) for p in output_payloads]
+
+    benchmark(decode)
@@ -0,0 +1,59 @@
+"""
+    test_sync_benchmark
+    ~~~~~~~~~~~~~~~~~~~
+
+    Contains benchmarks for encoding and decoding file transfers with the :mod:`~adbwp.sync` module.
+"""
+import itertools
+
+import pytest
+
+from adbwp import compression, consts, enums, sync
+
+CONTENTS = bytes(range(256)) * 4096
+
+
+@pytest.fixture(scope='module', params=[consts.MAXDATA, consts.MAX_PAYLOAD])
+def recv_payloads(request):
+    """
+    Fixture that yields the data payloads of a RECV response of 1 MiB packed to max data.
+    """
+    return list(sync.payloads(itertools.chain(sync.data_records(CONTENTS), (sync.done(),)), request.param))
+
+
+def test_send_file(benchmark):
+    """
+    Benchmark packing 1 MiB of file contents into max data payloads with :func:`~adbwp.sync.send_file`.
+    """
+    benchmark(lambda: list(sync.send_file('/sdcard/a', 0o100644, CONTENTS, 0)))
+
+
+def test_decode_recv(benchmark, recv_payloads):
+    """
+    Benchmark decoding the data payloads of a RECV response of 1 MiB with a :class:`~adbwp.sync.Decoder`.
+    """
+    def decode():
+        decoder = sync.Decoder()
+        decoder.expect(enums.SyncId.RECV)
+        return [decoder.feed(p) for p in recv_payloads]
+
+    benchmark(decode)
+
+
+@pytest.fixture(scope='module', params=sorted(compression.CODECS))
+def codec(request):
+    """
+    Fixture that yields each registered codec, skipping those that are not installed.
+    """
+    instance = compression.get(request.param)
+    if not instance.available:
+        pytest.skip('{} is not installed'.format(instance.module))
+    return instance
+
+
+def test_compressed_data_records(benchmark, codec):
+    """
+    Benchmark compressing 1 MiB of file contents read in 64 KiB chunks into DATA records.
+    """
+    chunks = [CONTENTS[i:i + consts.SYNC_DATA_MAX] for i in range(0, len(CONTENTS), consts.SYNC_DATA_MAX)]
+    benchmark(lambda: list(sync.compressed_data_records(chunks, codec)))
@@ -0,0 +1,83 @@
+"""
+    test_traffic_benchmark
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Contains end-to-end benchmarks that encode and decode realistic mixed traffic.
+"""
+import os
+import random
+
+import pytest
+
+from adbwp import decoder, enums, message
+
+#: Number of streams opened in the benchmarked traffic.
+STREAM_COUNT = 64
+
+
+#: Size of the chunks the serialized traffic is fed to a decoder in, like reads from a socket.
+CHUNK_SIZE = 64 * 1024
+
+
+@pytest.fixture(scope='module')
+def traffic_messages():
+    """
+    Fixture that yields a connection worth of messages: a connect handshake followed by streams that
+    each exchange a mix of small interactive writes and bulk transfers before closing.
+    """
+    rand = random.Random(0)
+    messages = [message.connect('serial', 'banner', enums.SystemType.HOST)]
+    for local_id in range(1, STREAM_COUNT + 1):
+        remote_id = local_id + 1000
+        messages.append(message.open(local_id, 'shell:logcat'))
+        messages.append(message.ready(remote_id, local_id))
+        for _ in range(rand.randint(1, 16)):
+            size = rand.choice([16, 128, 1024, 64 * 1024])
+            messages.append(message.write(remote_id, local_id, os.urandom(size)))
+            messages.append(message.ready(local_id, remote_id))
+        messages.append(message.close(local_id, remote_id))
+    return messages
+
+
+@pytest.fixture(scope='module')
+def traffic_bytes(traffic_messages):
+    """
+    Fixture that yields the traffic serialized back to back.
+    """
+    return b''.join(message.to_bytes(m) for m in traffic_messages)
+
+
+def test_encode(benchmark, traffic_messages, traffic_bytes):
+    """
+    Benchmark creating and serializing every message of the traffic.
+    """
+    def encode():
+        return b''.join(message.to_bytes(message.new(m.header.command, m.header.arg0, m.header.arg1, m.data))
+                        for m in traffic_messages)
+
+    benchmark.extra_info['bytes'] = len(traffic_bytes)
+    benchmark.extra_info['messages'] = len(traffic_messages)
+    assert benchmark(encode) == traffic_bytes
+
+
+def test_decode_decoder(benchmark, traffic_messages, traffic_bytes):
+    """
+    Benchmark decoding the traffic with a :class:`~adbwp.decoder.Decoder` fed in socket sized chunks.
+    """
+    def decode():
+        instance = decoder.Decoder()
+        return [m for i in range(0, len(traffic_bytes), CHUNK_SIZE)
+                for m in instance.feed(traffic_bytes[i:i + CHUNK_SIZE])]
+
+    benchmark.extra_info['bytes'] = len(traffic_bytes)
+    benchmark.extra_info['messages'] = len(traffic_messages)
+    assert benchmark(decode) == traffic_messages
+
+
+def test_decode_iter_from_buffer(benchmark, traffic_messages, traffic_bytes):
+    """
+    Benchmark decoding the traffic in place with :func:`~adbwp.message.iter_from_buffer`.
+    """
+    benchmark.extra_info['bytes'] = len(traffic_bytes)
+    benchmark.extra_info['messages'] = len(traffic_messages)
+    assert len(benchmark(lambda: list(message.iter_from_buffer(traffic_bytes)))) == len(traffic_messages)
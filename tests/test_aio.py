@@ -0,0 +1,231 @@
+"""
+    test_aio
+    ~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.aio` module.
+"""
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from adbwp import aio, consts, enums, exceptions, header, message
+
+
+#: Marks tests of :class:`~adbwp.aio.MessageProtocol`, which requires :class:`~asyncio.BufferedProtocol`.
+REQUIRES_BUFFERED_PROTOCOL = pytest.mark.skipif(not aio.BUFFERED_PROTOCOL_AVAILABLE,
+                                                reason='asyncio.BufferedProtocol requires Python 3.7+')
+
+
+class FakeStreamWriter:
+    """
+    Fake :class:`~asyncio.StreamWriter` that records written buffers and drain calls.
+    """
+
+    def __init__(self):
+        self.buffers = []
+        self.drains = 0
+
+    def writelines(self, buffers):
+        self.buffers.extend(buffers)
+
+    async def drain(self):
+        self.drains += 1
+
+
+def run(coro):
+    """
+    Helper function that runs the given coroutine to completion on a new event loop.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+async def read_chunks(*chunks):
+    """
+    Helper coroutine that feeds the given chunks into a stream reader, one per read, and reads a message.
+    """
+    reader = asyncio.StreamReader()
+    reader.feed_data(chunks[0])
+
+    async def feed():
+        for chunk in chunks[1:]:
+            await asyncio.sleep(0)
+            reader.feed_data(chunk)
+        reader.feed_eof()
+
+    task = asyncio.ensure_future(feed())
+    try:
+        return await aio.read_message(reader)
+    finally:
+        await task
+
+
+def feed_protocol(protocol, data, chunk_size):
+    """
+    Helper function that writes the given bytes into a protocol the same way an event loop does.
+    """
+    view = memoryview(data)
+    while view:
+        buffer = protocol.get_buffer(-1)
+        size = min(len(buffer), chunk_size, len(view))
+        buffer[:size] = view[:size]
+        protocol.buffer_updated(size)
+        view = view[size:]
+
+
+@pytest.fixture(scope='function')
+def random_message(random_local_id, random_remote_id, valid_payload):
+    """
+    Fixture that yields a write message with a data payload.
+    """
+    return message.write(random_local_id, random_remote_id, valid_payload)
+
+
+def test_read_message_reads_buffered_message(random_message):
+    """
+    Assert that :func:`~adbwp.aio.read_message` reads a message that is entirely buffered.
+    """
+    instance = run(read_chunks(message.to_bytes(random_message)))
+    assert instance == random_message
+    assert isinstance(instance.data, memoryview)
+
+
+def test_read_message_reads_partially_buffered_message(random_message):
+    """
+    Assert that :func:`~adbwp.aio.read_message` reads a message that arrives in multiple chunks.
+    """
+    chunk = message.to_bytes(random_message)
+    assert run(read_chunks(chunk[:10], chunk[10:header.BYTES + 1], chunk[header.BYTES + 1:])) == random_message
+
+
+def test_read_message_reads_message_without_payload(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.aio.read_message` reads a message without a data payload.
+    """
+    instance = message.ready(random_local_id, random_remote_id)
+    chunk = message.to_bytes(instance)
+    assert run(read_chunks(chunk[:1], chunk[1:])) == instance
+
+
+def test_read_message_raises_on_data_length_too_large(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.aio.read_message` raises a :class:`~adbwp.exceptions.UnpackError`
+    before reading a data payload larger than allowed.
+    """
+    instance = header.new(enums.Command.WRTE, random_local_id, random_remote_id, consts.MAXDATA + 1,
+                          0, header.magic(enums.Command.WRTE))
+    chunk = header.to_bytes(instance)
+    with pytest.raises(exceptions.UnpackError):
+        run(read_chunks(chunk[:1], chunk[1:]))
+
+
+def test_write_message_writes_buffers_and_drains(random_message):
+    """
+    Assert that :func:`~adbwp.aio.write_message` writes the message buffers and drains once.
+    """
+    writer = FakeStreamWriter()
+    run(aio.write_message(writer, random_message))
+    assert b''.join(writer.buffers) == message.to_bytes(random_message)
+    assert writer.drains == 1
+
+
+def test_write_messages_coalesces_before_drain(random_message, random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.aio.write_messages` writes all messages and drains once.
+    """
+    messages = [random_message, message.close(random_local_id, random_remote_id)]
+    writer = FakeStreamWriter()
+    run(aio.write_messages(writer, messages))
+    assert b''.join(writer.buffers) == b''.join(message.to_bytes(m) for m in messages)
+    assert writer.drains == 1
+
+
+@REQUIRES_BUFFERED_PROTOCOL
+@pytest.mark.parametrize('chunk_size', [1, 7, header.BYTES, 4096])
+def test_message_protocol_decodes_chunked_messages(random_message, random_local_id, random_remote_id, chunk_size):
+    """
+    Assert that :class:`~adbwp.aio.MessageProtocol` passes all messages to the callback regardless
+    of how received bytes are chunked.
+    """
+    messages = [random_message, message.ready(random_local_id, random_remote_id)] * 3
+    received = []
+    protocol = aio.MessageProtocol(received.append, size=64)
+    feed_protocol(protocol, b''.join(message.to_bytes(m) for m in messages), chunk_size)
+    assert received == messages
+    assert all(isinstance(m.data, bytes) for m in received)
+
+
+@REQUIRES_BUFFERED_PROTOCOL
+def test_message_protocol_passes_views_without_copy(random_message):
+    """
+    Assert that :class:`~adbwp.aio.MessageProtocol` passes data payloads as views of its receive buffer
+    when copying is disabled.
+    """
+    received = []
+    protocol = aio.MessageProtocol(lambda m: received.append((m, bytes(m.data))), copy=False)
+    feed_protocol(protocol, message.to_bytes(random_message), 4096)
+    (instance, data), = received
+    assert isinstance(instance.data, memoryview)
+    assert data == random_message.data
+
+
+@REQUIRES_BUFFERED_PROTOCOL
+def test_message_protocol_grows_buffer_for_large_message(random_local_id, random_remote_id):
+    """
+    Assert that :class:`~adbwp.aio.MessageProtocol` decodes a message larger than its receive buffer.
+    """
+    instance = message.write(random_local_id, random_remote_id, b'\xff' * consts.MAXDATA)
+    received = []
+    protocol = aio.MessageProtocol(received.append, size=header.BYTES)
+    feed_protocol(protocol, message.to_bytes(instance), 1000)
+    assert received == [instance]
+
+
+@REQUIRES_BUFFERED_PROTOCOL
+def test_message_protocol_raises_on_data_length_too_large(random_local_id, random_remote_id):
+    """
+    Assert that :class:`~adbwp.aio.MessageProtocol` raises a :class:`~adbwp.exceptions.UnpackError`
+    as soon as a header with a data length larger than allowed is received.
+    """
+    instance = header.new(enums.Command.WRTE, random_local_id, random_remote_id, consts.MAXDATA + 1,
+                          0, header.magic(enums.Command.WRTE))
+    with pytest.raises(exceptions.UnpackError):
+        feed_protocol(aio.MessageProtocol(lambda m: None), header.to_bytes(instance), 4096)
+
+
+@REQUIRES_BUFFERED_PROTOCOL
+def test_message_protocol_receives_from_socket(random_message):
+    """
+    Assert that :class:`~adbwp.aio.MessageProtocol` receives messages over a connected socket.
+    """
+    data = message.to_bytes(random_message) * 10
+    left, right = socket.socketpair()
+
+    async def receive():
+        done = asyncio.get_event_loop().create_future()
+        received = []
+
+        def callback(instance):
+            received.append(instance)
+            if len(received) == 10:
+                done.set_result(received)
+
+        transport, _ = await asyncio.get_event_loop().create_connection(
+            lambda: aio.MessageProtocol(callback), sock=right)
+        try:
+            return await done
+        finally:
+            transport.close()
+
+    sender = threading.Thread(target=left.sendall, args=(data,))
+    sender.start()
+    try:
+        assert run(receive()) == [random_message] * 10
+    finally:
+        sender.join()
+        left.close()
@@ -0,0 +1,129 @@
+"""
+    test_cache
+    ~~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.cache` module.
+"""
+import pytest
+
+from adbwp import cache, enums, exceptions, message
+
+
+def test_message_cache_get_returns_cached_instance(random_local_id, random_remote_id):
+    """
+    Assert that :meth:`~adbwp.cache.MessageCache.get` returns the same instance on a hit
+    and counts hits and misses.
+    """
+    instance = cache.MessageCache()
+    first = instance.get(enums.Command.OKAY, random_local_id, random_remote_id)
+    second = instance.get(enums.Command.OKAY, random_local_id, random_remote_id)
+    assert first is second
+    assert first == message.new(enums.Command.OKAY, random_local_id, random_remote_id)
+    assert instance.info() == cache.CacheInfo(hits=1, misses=1, maxsize=cache.MAXSIZE, currsize=1)
+
+
+def test_message_cache_to_bytes_returns_serialized_message(random_local_id, random_destination):
+    """
+    Assert that :meth:`~adbwp.cache.MessageCache.to_bytes` returns the serialized message.
+    """
+    instance = cache.MessageCache()
+    expected = message.to_bytes(message.new(enums.Command.OPEN, random_local_id, 0, random_destination))
+    assert instance.to_bytes(enums.Command.OPEN, random_local_id, 0, random_destination) == expected
+    assert instance.to_bytes(enums.Command.OPEN, random_local_id, 0, random_destination.encode()) == expected
+    assert instance.hits == 1
+
+
+def test_message_cache_template_patches_arguments(random_local_id, random_remote_id):
+    """
+    Assert that :meth:`~adbwp.cache.MessageCache.template` renders the serialized message with the
+    given arguments from a single cached template.
+    """
+    instance = cache.MessageCache()
+    for local_id in (random_local_id, random_local_id + 1):
+        expected = message.to_bytes(message.new(enums.Command.CLSE, local_id, random_remote_id))
+        assert instance.template(enums.Command.CLSE, local_id, random_remote_id) == expected
+    assert instance.info().currsize == 1
+    assert instance.misses == 1
+
+
+def test_message_cache_template_raises_on_integer_overflow(random_remote_id):
+    """
+    Assert that :meth:`~adbwp.cache.MessageCache.template` raises a :class:`~adbwp.exceptions.PackError`
+    when an argument is greater than 32-bits.
+    """
+    with pytest.raises(exceptions.PackError):
+        cache.MessageCache().template(enums.Command.CLSE, 2**32 + 1, random_remote_id)
+
+
+@pytest.mark.parametrize(('command', 'arg0', 'arg1'), [
+    (enums.Command.OPEN, 0, 0),
+    (enums.Command.OKAY, 0, 1),
+    (enums.Command.OKAY, 1, 0),
+    (enums.Command.CLSE, 1, 0),
+])
+def test_message_cache_template_validates_ids(command, arg0, arg1):
+    """
+    Assert that :meth:`~adbwp.cache.MessageCache.template` raises a :class:`~ValueError` on the same zero
+    stream ids as the builders of the :mod:`~adbwp.message` module, without caching a template.
+    """
+    instance = cache.MessageCache()
+    with pytest.raises(ValueError):
+        instance.template(command, arg0, arg1)
+    assert len(instance) == 0
+
+
+def test_message_cache_evicts_least_recently_used():
+    """
+    Assert that :class:`~adbwp.cache.MessageCache` evicts the least recently used entry when full.
+    """
+    instance = cache.MessageCache(maxsize=2)
+    instance.ready(1, 1)
+    instance.ready(2, 2)
+    instance.ready(1, 1)
+    instance.ready(3, 3)
+    instance.ready(1, 1)
+    assert instance.info() == cache.CacheInfo(hits=2, misses=3, maxsize=2, currsize=2)
+    instance.ready(2, 2)
+    assert instance.misses == 4
+
+
+def test_message_cache_bounds_messages_and_templates_together():
+    """
+    Assert that :class:`~adbwp.cache.MessageCache` never holds more than `maxsize` messages and templates.
+    """
+    instance = cache.MessageCache(maxsize=2)
+    instance.ready(1, 1)
+    instance.template(enums.Command.OKAY, 1, 1)
+    instance.template(enums.Command.CLSE, 1, 1)
+    assert instance.info().currsize == 2
+    instance.ready(1, 1)
+    assert instance.misses == 4
+
+
+def test_message_cache_builders_match_message_module(random_local_id, random_remote_id, random_destination):
+    """
+    Assert that the cached message builders create the same messages as the :mod:`~adbwp.message` module.
+    """
+    instance = cache.MessageCache()
+    assert instance.open(random_local_id, random_destination) == message.open(random_local_id, random_destination)
+    assert instance.ready(random_local_id, random_remote_id) == message.ready(random_local_id, random_remote_id)
+    assert instance.close(random_local_id, random_remote_id) == message.close(random_local_id, random_remote_id)
+
+
+def test_message_cache_builders_validate_arguments(random_local_id):
+    """
+    Assert that the cached message builders raise a :class:`~ValueError` on invalid arguments.
+    """
+    with pytest.raises(ValueError):
+        cache.MessageCache().ready(random_local_id, 0)
+
+
+def test_message_cache_clear_resets_entries_and_counters(random_local_id, random_remote_id):
+    """
+    Assert that :meth:`~adbwp.cache.MessageCache.clear` removes all entries and resets the counters.
+    """
+    instance = cache.MessageCache()
+    instance.ready(random_local_id, random_remote_id)
+    instance.template(enums.Command.OKAY, random_local_id, random_remote_id)
+    instance.clear()
+    assert instance.info() == cache.CacheInfo(hits=0, misses=0, maxsize=cache.MAXSIZE, currsize=0)
@@ -0,0 +1,165 @@
+"""
+    test_compression
+    ~~~~~~~~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.compression` module.
+"""
+import os
+import zlib
+
+import pytest
+
+from adbwp import compression, enums, identity
+
+CONTENTS = os.urandom(1024) + b'compressible ' * 10000
+
+
+def chunked(data, size=4096):
+    """
+    Helper function that splits data into chunks of the given size.
+    """
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.fixture(scope='function', params=sorted(compression.CODECS))
+def codec(request):
+    """
+    Fixture that yields each registered codec, skipping those that are not installed.
+    """
+    instance = compression.get(request.param)
+    if not instance.available:
+        pytest.skip('{} is not installed'.format(instance.module))
+    return instance
+
+
+@pytest.fixture(scope='function')
+def registry(monkeypatch):
+    """
+    Fixture that yields the codec registry, restored after the test.
+    """
+    codecs = dict(compression.CODECS)
+    monkeypatch.setattr(compression, 'CODECS', codecs)
+    return codecs
+
+
+def test_codec_round_trip(codec):
+    """
+    Assert that data compressed in chunks by a codec decompresses in chunks to the original data.
+    """
+    compressed = b''.join(compression.compress(chunked(CONTENTS), codec))
+    assert len(compressed) < len(CONTENTS)
+    assert b''.join(compression.decompress(chunked(compressed, 1000), codec)) == CONTENTS
+
+
+def test_codec_round_trip_empty(codec):
+    """
+    Assert that an empty stream round trips through a codec.
+    """
+    compressed = list(compression.compress([], codec))
+    assert b''.join(compression.decompress(compressed, codec)) == b''
+
+
+def test_compress_is_lazy(codec):
+    """
+    Assert that :func:`~adbwp.compression.compress` only consumes chunks as its output is consumed.
+    """
+    consumed = []
+
+    def chunks():
+        for chunk in chunked(CONTENTS):
+            consumed.append(chunk)
+            yield chunk
+
+    compressed = compression.compress(chunks(), codec)
+    assert not consumed
+    next(compressed)
+    assert consumed
+
+
+def test_zlib_codec_is_standard_zlib():
+    """
+    Assert that the zlib codec produces a stream the :mod:`zlib` module decompresses and has no sync flag.
+    """
+    codec = compression.get('zlib')
+    assert codec.flag is None and codec.available
+    assert zlib.decompress(b''.join(compression.compress([CONTENTS], codec))) == CONTENTS
+
+
+def test_get_raises_on_unknown_codec():
+    """
+    Assert that :func:`~adbwp.compression.get` raises a :class:`~ValueError` for names that are not registered.
+    """
+    with pytest.raises(ValueError):
+        compression.get('foo')
+
+
+@pytest.mark.parametrize(('flags', 'name'), [
+    (enums.SyncFlag.NONE, None),
+    (enums.SyncFlag.DRY_RUN, None),
+    (enums.SyncFlag.BROTLI, 'brotli'),
+    (enums.SyncFlag.LZ4 | enums.SyncFlag.DRY_RUN, 'lz4'),
+    (enums.SyncFlag.ZSTD, 'zstd')
+])
+def test_from_flags_returns_codec(flags, name):
+    """
+    Assert that :func:`~adbwp.compression.from_flags` returns the codec of the flags, ignoring dry run.
+    """
+    codec = compression.from_flags(flags)
+    assert (codec and codec.name) == name
+
+
+@pytest.mark.parametrize('flags', [enums.SyncFlag.BROTLI | enums.SyncFlag.LZ4, 0x08])
+def test_from_flags_raises_on_unknown_flags(flags):
+    """
+    Assert that :func:`~adbwp.compression.from_flags` raises a :class:`~ValueError` for flags of unknown codecs
+    or of more than one.
+    """
+    with pytest.raises(ValueError):
+        compression.from_flags(flags)
+
+
+def test_codec_requires_compressor_and_decompressor():
+    """
+    Assert that a :class:`~adbwp.compression.Codec` that does not implement both
+    :meth:`~adbwp.compression.Codec.compressor` and :meth:`~adbwp.compression.Codec.decompressor` cannot be
+    created.
+    """
+    class IncompleteCodec(compression.Codec):
+        name = 'incomplete'
+
+        def compressor(self):
+            return zlib.compressobj()
+
+    with pytest.raises(TypeError):
+        IncompleteCodec()
+
+
+def test_available_skips_codecs_not_installed(registry):
+    """
+    Assert that :func:`~adbwp.compression.available` only returns codecs whose module is installed.
+    """
+    class MissingCodec(compression.ZlibCodec):
+        name = 'missing'
+        module = 'adbwp_missing_module'
+
+    compression.register(MissingCodec())
+    names = [codec.name for codec in compression.available()]
+    assert 'zlib' in names
+    assert 'missing' not in names
+
+
+def test_negotiate_chooses_preferred_supported_codec(registry):
+    """
+    Assert that :func:`~adbwp.compression.negotiate` returns the first preferred codec the remote system
+    supports, and none without support for sync v2 requests.
+    """
+    class FakeCodec(compression.ZlibCodec):
+        name = 'fake'
+        flag = enums.SyncFlag.ZSTD
+        feature = identity.FEATURE_SENDRECV_V2_ZSTD
+
+    compression.register(FakeCodec())
+    features = {identity.FEATURE_SENDRECV_V2, identity.FEATURE_SENDRECV_V2_ZSTD}
+    assert compression.negotiate(features, ('zlib', 'fake')).name == 'fake'
+    assert compression.negotiate(features - {identity.FEATURE_SENDRECV_V2}, ('fake',)) is None
+    assert compression.negotiate({identity.FEATURE_SENDRECV_V2}, ('fake',)) is None
@@ -0,0 +1,515 @@
+"""
+    test_connection
+    ~~~~~~~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.connection` module.
+"""
+import pytest
+
+from adbwp import connection, consts, enums, limits, message
+
+
+@pytest.fixture(scope='function')
+def conn():
+    """
+    Fixture that yields a new :class:`~adbwp.connection.Connection`.
+    """
+    return connection.Connection()
+
+
+@pytest.fixture(scope='function')
+def open_stream(conn, random_remote_id):
+    """
+    Fixture that yields a locally opened stream the remote system replied to with OKAY.
+    """
+    stream = conn.open('shell:')
+    conn.receive(message.ready(random_remote_id, stream.local_id))
+    conn.outgoing()
+    return stream
+
+
+def test_open_sends_open_message(conn):
+    """
+    Assert that :meth:`~adbwp.connection.Connection.open` allocates a local id and queues an OPEN message.
+    """
+    stream = conn.open('shell:ls')
+    assert stream.state == enums.StreamState.OPENING
+    assert stream.local_id in conn
+    assert conn.outgoing() == [message.open(stream.local_id, 'shell:ls')]
+    assert conn.outgoing() == []
+
+
+def test_open_allocates_unique_ids(conn):
+    """
+    Assert that :meth:`~adbwp.connection.Connection.open` allocates a different local id for each stream.
+    """
+    ids = {conn.open('shell:').local_id for _ in range(100)}
+    assert len(ids) == len(conn) == 100
+    assert 0 not in ids
+
+
+def test_allocate_id_wraps_around_and_skips_ids_in_use(conn):
+    """
+    Assert that local ids wrap around after :attr:`~adbwp.connection.MAX_STREAM_ID` and skip ids in use.
+    """
+    conn.open('shell:')
+    conn._next_id = connection.MAX_STREAM_ID  # pylint: disable=protected-access
+    assert conn.open('shell:').local_id == connection.MAX_STREAM_ID
+    assert conn.open('shell:').local_id == 2
+
+
+def test_receive_ready_opens_stream(conn, random_remote_id):
+    """
+    Assert that an OKAY for an opening stream records the remote id and opens the stream.
+    """
+    stream = conn.open('shell:')
+    assert conn.receive(message.ready(random_remote_id, stream.local_id)) is stream
+    assert stream.state == enums.StreamState.OPEN
+    assert stream.remote_id == random_remote_id
+    assert stream.writable
+
+
+def test_write_buffers_until_stream_is_open(conn, random_remote_id):
+    """
+    Assert that data written to an opening stream is sent once the remote system replies with OKAY.
+    """
+    stream = conn.open('shell:')
+    conn.outgoing()
+    conn.write(stream.local_id, b'foo')
+    assert conn.outgoing() == []
+    assert stream.pending == 3
+
+    conn.receive(message.ready(random_remote_id, stream.local_id))
+    assert conn.outgoing() == [message.write(stream.local_id, random_remote_id, b'foo')]
+    assert stream.pending == 0
+
+
+def test_write_waits_for_ready_between_write_messages(conn, open_stream):
+    """
+    Assert that only one write message is outstanding per stream and that data written meanwhile is coalesced.
+    """
+    local_id, remote_id = open_stream.local_id, open_stream.remote_id
+    conn.write(local_id, b'foo')
+    conn.write(local_id, b'bar')
+    conn.write(local_id, 'baz')
+    assert conn.outgoing() == [message.write(local_id, remote_id, b'foo')]
+
+    conn.receive(message.ready(remote_id, local_id))
+    assert conn.outgoing() == [message.write(local_id, remote_id, b'barbaz')]
+
+
+def test_write_splits_data_into_max_data_payloads(random_remote_id):
+    """
+    Assert that written data is sent in data payloads of at most the negotiated max data.
+    """
+    conn = connection.Connection(limits.new(max_data=4))
+    stream = conn.open('ls')
+    conn.receive(message.ready(random_remote_id, stream.local_id))
+    conn.write(stream.local_id, b'foobar')
+    assert [m.data for m in conn.outgoing()[1:]] == [b'foob']
+    conn.receive(message.ready(random_remote_id, stream.local_id))
+    assert [m.data for m in conn.outgoing()] == [b'ar']
+
+
+def test_receive_write_buffers_data_and_replies_ready(conn, open_stream):
+    """
+    Assert that a WRTE is buffered on its stream and answered with OKAY.
+    """
+    local_id, remote_id = open_stream.local_id, open_stream.remote_id
+    conn.receive(message.write(remote_id, local_id, b'foo'))
+    conn.receive(message.write(remote_id, local_id, b'bar'))
+    assert open_stream.received == 6
+    assert open_stream.read() == b'foobar'
+    assert open_stream.read() == b''
+    assert conn.outgoing() == [message.ready(local_id, remote_id)] * 2
+
+
+def test_receive_open_creates_pending_stream(conn, random_remote_id):
+    """
+    Assert that an OPEN from the remote system creates a pending stream that can be accepted.
+    """
+    stream = conn.receive(message.open(random_remote_id, 'tcp:5037'))
+    assert stream.state == enums.StreamState.PENDING
+    assert stream.destination == 'tcp:5037'
+    assert stream.remote_id == random_remote_id
+    assert conn.outgoing() == []
+
+    conn.write(stream.local_id, b'foo')
+    assert conn.accept(stream.local_id) is stream
+    assert stream.state == enums.StreamState.OPEN
+    assert conn.outgoing() == [message.ready(stream.local_id, random_remote_id),
+                               message.write(stream.local_id, random_remote_id, b'foo')]
+
+
+def test_accept_raises_on_stream_not_pending(conn):
+    """
+    Assert that :meth:`~adbwp.connection.Connection.accept` raises a :class:`~ValueError` for a stream
+    that was not opened by the remote system.
+    """
+    stream = conn.open('shell:')
+    with pytest.raises(ValueError):
+        conn.accept(stream.local_id)
+
+
+def test_close_sends_close_and_removes_stream(conn, open_stream):
+    """
+    Assert that :meth:`~adbwp.connection.Connection.close` queues a CLSE and removes the stream.
+    """
+    conn.write(open_stream.local_id, b'foo')
+    conn.outgoing()
+    conn.write(open_stream.local_id, b'bar')
+    assert conn.close(open_stream.local_id) is open_stream
+    assert open_stream.state == enums.StreamState.CLOSED
+    assert open_stream.pending == 0
+    assert open_stream.local_id not in conn
+    assert conn.outgoing() == [message.close(open_stream.local_id, open_stream.remote_id)]
+
+
+def test_close_opening_stream_sends_nothing(conn):
+    """
+    Assert that closing a stream the remote system has not replied to yet queues no CLSE.
+    """
+    stream = conn.open('shell:')
+    conn.outgoing()
+    conn.close(stream.local_id)
+    assert conn.outgoing() == []
+
+
+def test_receive_close_closes_stream(conn, open_stream):
+    """
+    Assert that a CLSE from the remote system closes and removes the stream but keeps unread data.
+    """
+    local_id, remote_id = open_stream.local_id, open_stream.remote_id
+    conn.receive(message.write(remote_id, local_id, b'foo'))
+    assert conn.receive(message.close(remote_id, local_id)) is open_stream
+    assert open_stream.state == enums.StreamState.CLOSED
+    assert local_id not in conn
+    assert open_stream.read() == b'foo'
+
+
+def test_receive_close_rejects_opening_stream(conn):
+    """
+    Assert that a CLSE without a remote id closes a stream the remote system refused to open.
+    """
+    stream = conn.open('shell:')
+    conn.receive(message.close(0, stream.local_id))
+    assert stream.state == enums.StreamState.CLOSED
+
+
+@pytest.mark.parametrize('command', [enums.Command.OKAY, enums.Command.WRTE])
+def test_receive_for_unknown_stream_replies_close(conn, random_local_id, random_remote_id, command):
+    """
+    Assert that OKAY and WRTE messages for an unknown local id are answered with CLSE.
+    """
+    assert conn.receive(message.new(command, random_remote_id, random_local_id, b'foo')) is None
+    assert conn.outgoing() == [message.close(random_local_id, random_remote_id)]
+
+
+def test_receive_close_for_unknown_stream_is_ignored(conn, random_local_id, random_remote_id):
+    """
+    Assert that a CLSE for an unknown local id is ignored.
+    """
+    assert conn.receive(message.close(random_remote_id, random_local_id)) is None
+    assert conn.outgoing() == []
+
+
+def test_receive_ignores_connect(conn, random_serial, random_banner):
+    """
+    Assert that connect messages are not routed to any stream.
+    """
+    assert conn.receive(message.connect(random_serial, random_banner)) is None
+
+
+def test_write_raises_on_unknown_stream(conn, random_local_id):
+    """
+    Assert that :meth:`~adbwp.connection.Connection.write` raises a :class:`~ValueError` for an unknown local id.
+    """
+    with pytest.raises(ValueError):
+        conn.write(random_local_id, b'foo')
+
+
+def test_write_raises_on_closed_stream(conn, open_stream):
+    """
+    Assert that :meth:`~adbwp.connection.Connection.write` raises a :class:`~ValueError` for a stream
+    that is closed but not yet removed.
+    """
+    open_stream.state = enums.StreamState.CLOSED
+    with pytest.raises(ValueError):
+        conn.write(open_stream.local_id, b'foo')
+
+
+def test_connection_scales_to_many_streams(conn):
+    """
+    Assert that messages are routed to the right stream among tens of thousands of streams.
+    """
+    streams = [conn.open('shell:') for _ in range(20000)]
+    for stream in streams:
+        conn.receive(message.ready(stream.local_id + consts.MAXDATA, stream.local_id))
+    conn.outgoing()
+
+    target = streams[12345]
+    conn.receive(message.write(target.remote_id, target.local_id, b'foo'))
+    assert target.read() == b'foo'
+    assert conn.outgoing() == [message.ready(target.local_id, target.remote_id)]
+
+
+@pytest.fixture(scope='function')
+def windowed_conn():
+    """
+    Fixture that yields a new :class:`~adbwp.connection.Connection` with delayed acks enabled.
+    """
+    return connection.Connection(limits.new(max_data=4), window=8)
+
+
+def test_open_advertises_window(windowed_conn):
+    """
+    Assert that streams opened with delayed acks enabled advertise the window in the OPEN message.
+    """
+    stream = windowed_conn.open('ls')
+    assert windowed_conn.outgoing() == [message.open(stream.local_id, 'ls', window=8)]
+
+
+def test_delayed_ack_defaults_to_default_window():
+    """
+    Assert that enabling delayed acks without a window advertises :attr:`~adbwp.consts.DELAYED_ACK_WINDOW`
+    and that they stay disabled by default.
+    """
+    conn = connection.Connection(delayed_ack=True)
+    stream = conn.open('ls')
+    assert conn.window == consts.DELAYED_ACK_WINDOW
+    assert conn.outgoing() == [message.open(stream.local_id, 'ls', window=consts.DELAYED_ACK_WINDOW)]
+    assert connection.Connection().window is None
+    assert connection.Connection(window=8, delayed_ack=True).window == 8
+
+
+def test_windowed_write_fills_window_and_resumes_on_ack(windowed_conn, random_remote_id):
+    """
+    Assert that with delayed acks multiple write messages are in flight up to the window and more are sent
+    as bytes are acknowledged.
+    """
+    stream = windowed_conn.open('ls')
+    windowed_conn.receive(message.ready(random_remote_id, stream.local_id, 6))
+    windowed_conn.outgoing()
+    assert stream.window == 6
+
+    windowed_conn.write(stream.local_id, b'abcdefghij')
+    assert [m.data for m in windowed_conn.outgoing()] == [b'abcd', b'ef']
+    assert (stream.window, stream.in_flight, stream.pending) == (0, 6, 4)
+
+    windowed_conn.receive(message.ready(random_remote_id, stream.local_id, 5))
+    assert [m.data for m in windowed_conn.outgoing()] == [b'ghij']
+    assert (stream.window, stream.in_flight, stream.pending) == (1, 5, 0)
+
+
+def test_windowed_receive_acks_on_read(windowed_conn, random_remote_id):
+    """
+    Assert that with delayed acks received data is only acknowledged, with the number of bytes, once read.
+    """
+    stream = windowed_conn.open('ls')
+    windowed_conn.receive(message.ready(random_remote_id, stream.local_id, 8))
+    windowed_conn.outgoing()
+
+    windowed_conn.receive(message.write(random_remote_id, stream.local_id, b'foo'))
+    windowed_conn.receive(message.write(random_remote_id, stream.local_id, b'ba'))
+    assert windowed_conn.outgoing() == []
+    assert windowed_conn.read(stream.local_id) == b'fooba'
+    assert windowed_conn.outgoing() == [message.ready(stream.local_id, random_remote_id, 5)]
+    assert windowed_conn.read(stream.local_id) == b''
+    assert windowed_conn.outgoing() == []
+
+
+def test_windowed_accept_advertises_window(windowed_conn, random_remote_id):
+    """
+    Assert that accepting a stream opened with a window replies with the local window as acked bytes and
+    uses the remote window for writes.
+    """
+    stream = windowed_conn.receive(message.open(random_remote_id, 'ls', window=3))
+    windowed_conn.accept(stream.local_id)
+    windowed_conn.write(stream.local_id, b'foobar')
+    assert windowed_conn.outgoing() == [message.ready(stream.local_id, random_remote_id, 8),
+                                        message.write(stream.local_id, random_remote_id, b'foo')]
+
+
+def test_windowed_falls_back_without_remote_support(windowed_conn, random_remote_id):
+    """
+    Assert that streams fall back to one outstanding write message when the remote system replies without
+    acked bytes, and that received data is then acknowledged immediately.
+    """
+    stream = windowed_conn.open('ls')
+    windowed_conn.receive(message.ready(random_remote_id, stream.local_id))
+    windowed_conn.outgoing()
+    assert stream.window is None
+
+    windowed_conn.write(stream.local_id, b'foobar')
+    windowed_conn.receive(message.write(random_remote_id, stream.local_id, b'baz'))
+    assert windowed_conn.outgoing() == [message.write(stream.local_id, random_remote_id, b'foob'),
+                                        message.ready(stream.local_id, random_remote_id)]
+    assert windowed_conn.read(stream.local_id) == b'baz'
+    assert windowed_conn.outgoing() == []
+
+
+class FakeClock:
+    """
+    Clock that only advances when told to.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope='function')
+def clock():
+    """
+    Fixture that yields a :class:`~tests.test_connection.FakeClock` starting at zero.
+    """
+    return FakeClock()
+
+
+@pytest.fixture(scope='function')
+def coalescing_conn(clock):
+    """
+    Fixture that yields a new :class:`~adbwp.connection.Connection` that coalesces writes for one second.
+    """
+    return connection.Connection(limits.new(max_data=4), delay=1.0, clock=clock)
+
+
+@pytest.fixture(scope='function')
+def coalescing_stream(coalescing_conn, random_remote_id):
+    """
+    Fixture that yields a stream of a coalescing connection the remote system replied to with OKAY.
+    """
+    stream = coalescing_conn.open('ls')
+    coalescing_conn.receive(message.ready(random_remote_id, stream.local_id))
+    coalescing_conn.outgoing()
+    return stream
+
+
+def test_connection_raises_on_negative_delay():
+    """
+    Assert that :class:`~adbwp.connection.Connection` raises a :class:`~ValueError` for a negative delay.
+    """
+    with pytest.raises(ValueError):
+        connection.Connection(delay=-1)
+
+
+def test_coalesced_writes_are_held_until_deadline(coalescing_conn, coalescing_stream, clock):
+    """
+    Assert that small writes are held and sent as a single write message once their deadline passes.
+    """
+    coalescing_conn.write(coalescing_stream.local_id, b'a')
+    coalescing_conn.write(coalescing_stream.local_id, b'b')
+    assert coalescing_conn.outgoing() == []
+    assert coalescing_conn.next_deadline() == coalescing_stream.deadline == 1.0
+
+    clock.now = 0.5
+    coalescing_conn.poll()
+    assert coalescing_conn.outgoing() == []
+
+    clock.now = 1.0
+    coalescing_conn.poll()
+    assert coalescing_conn.outgoing() == [message.write(coalescing_stream.local_id, coalescing_stream.remote_id,
+                                                        b'ab')]
+    assert coalescing_stream.deadline is None
+    assert coalescing_conn.next_deadline() is None
+
+
+def test_coalesced_writes_send_full_payloads_immediately(coalescing_conn, coalescing_stream):
+    """
+    Assert that coalesced data is sent without waiting for the deadline once it fills a data payload, holding
+    the remainder.
+    """
+    coalescing_conn.write(coalescing_stream.local_id, b'abc')
+    coalescing_conn.write(coalescing_stream.local_id, b'def')
+    assert [m.data for m in coalescing_conn.outgoing()] == [b'abcd']
+    assert coalescing_stream.pending == 2
+
+    coalescing_conn.receive(message.ready(coalescing_stream.remote_id, coalescing_stream.local_id))
+    assert coalescing_conn.outgoing() == []
+    assert coalescing_stream.deadline == 1.0
+
+
+def test_flush_sends_held_data(coalescing_conn, coalescing_stream):
+    """
+    Assert that :meth:`~adbwp.connection.Connection.flush` sends held data without waiting for the deadline.
+    """
+    coalescing_conn.write(coalescing_stream.local_id, b'ab')
+    coalescing_conn.flush(coalescing_stream.local_id)
+    assert [m.data for m in coalescing_conn.outgoing()] == [b'ab']
+    assert coalescing_conn.next_deadline() is None
+
+
+def test_flush_all_streams(coalescing_conn, random_remote_id):
+    """
+    Assert that :meth:`~adbwp.connection.Connection.flush` without a local id sends held data of all streams.
+    """
+    streams = [coalescing_conn.open('ls') for _ in range(3)]
+    for stream in streams:
+        coalescing_conn.receive(message.ready(random_remote_id, stream.local_id))
+        coalescing_conn.write(stream.local_id, b'x')
+    coalescing_conn.outgoing()
+
+    coalescing_conn.flush()
+    assert sorted(m.header.arg0 for m in coalescing_conn.outgoing()) == [s.local_id for s in streams]
+
+
+def test_flush_before_ready_sends_on_ready(coalescing_conn, coalescing_stream):
+    """
+    Assert that data flushed while waiting for OKAY is sent as soon as it arrives, without waiting for the
+    deadline.
+    """
+    coalescing_conn.write(coalescing_stream.local_id, b'abcde')
+    coalescing_conn.outgoing()
+    coalescing_conn.flush(coalescing_stream.local_id)
+    assert coalescing_conn.outgoing() == []
+
+    coalescing_conn.receive(message.ready(coalescing_stream.remote_id, coalescing_stream.local_id))
+    assert [m.data for m in coalescing_conn.outgoing()] == [b'e']
+
+
+def test_deadline_passed_before_ready_sends_on_ready(coalescing_conn, coalescing_stream, clock):
+    """
+    Assert that held data whose deadline passed while waiting for OKAY is sent as soon as it arrives.
+    """
+    coalescing_conn.write(coalescing_stream.local_id, b'abcde')
+    coalescing_conn.outgoing()
+    clock.now = 2.0
+    coalescing_conn.poll()
+    assert coalescing_conn.outgoing() == []
+
+    coalescing_conn.receive(message.ready(coalescing_stream.remote_id, coalescing_stream.local_id))
+    assert [m.data for m in coalescing_conn.outgoing()] == [b'e']
+
+
+def test_next_deadline_skips_closed_streams(coalescing_conn, coalescing_stream, clock):
+    """
+    Assert that :meth:`~adbwp.connection.Connection.next_deadline` ignores streams closed with held data.
+    """
+    coalescing_conn.write(coalescing_stream.local_id, b'a')
+    clock.now = 0.5
+    other = coalescing_conn.open('ls')
+    coalescing_conn.receive(message.ready(coalescing_stream.remote_id + 1, other.local_id))
+    coalescing_conn.write(other.local_id, b'b')
+    assert coalescing_conn.next_deadline() == 1.0
+
+    coalescing_conn.close(coalescing_stream.local_id)
+    assert coalescing_conn.next_deadline() == 1.5
+
+
+def test_coalesced_windowed_writes(random_remote_id, clock):
+    """
+    Assert that with delayed acks only full data payloads are sent before the deadline.
+    """
+    conn = connection.Connection(limits.new(max_data=4), window=8, delay=1.0, clock=clock)
+    stream = conn.open('ls')
+    conn.receive(message.ready(random_remote_id, stream.local_id, 16))
+    conn.outgoing()
+
+    conn.write(stream.local_id, b'abcdefghij')
+    assert [m.data for m in conn.outgoing()] == [b'abcd', b'efgh']
+    clock.now = 1.0
+    conn.poll()
+    assert [m.data for m in conn.outgoing()] == [b'ij']
+    assert (stream.window, stream.in_flight) == (6, 10)
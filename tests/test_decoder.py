@@ -0,0 +1,120 @@
+"""
+    test_decoder
+    ~~~~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.decoder` module.
+"""
+import pytest
+
+from adbwp import consts, decoder, enums, exceptions, header, limits, message
+
+
+@pytest.fixture(scope='function')
+def random_messages(random_local_id, random_remote_id, valid_payload):
+    """
+    Fixture that yields a list of messages with and without data payloads.
+    """
+    return [message.ready(random_local_id, random_remote_id),
+            message.write(random_local_id, random_remote_id, valid_payload),
+            message.close(random_local_id, random_remote_id)]
+
+
+@pytest.fixture(scope='function')
+def random_messages_bytes(random_messages):
+    """
+    Fixture that yields the given messages serialized into a single :class:`~bytes`.
+    """
+    return b''.join(header.to_bytes(m.header) + m.data for m in random_messages)
+
+
+def test_decoder_feed_yields_complete_messages(random_messages, random_messages_bytes):
+    """
+    Assert that :meth:`~adbwp.decoder.Decoder.feed` yields all messages when given a chunk
+    that contains multiple complete messages.
+    """
+    instance = decoder.Decoder()
+    assert list(instance.feed(random_messages_bytes)) == random_messages
+    assert len(instance) == 0
+
+
+def test_decoder_feed_supports_single_byte_chunks(random_messages, random_messages_bytes):
+    """
+    Assert that :meth:`~adbwp.decoder.Decoder.feed` yields all messages when given one byte at a time.
+    """
+    instance = decoder.Decoder()
+    messages = []
+    for i in range(len(random_messages_bytes)):
+        messages.extend(instance.feed(random_messages_bytes[i:i + 1]))
+    assert messages == random_messages
+
+
+def test_decoder_feed_buffers_partial_message(random_messages_bytes):
+    """
+    Assert that :meth:`~adbwp.decoder.Decoder.feed` yields nothing and retains the bytes when given
+    an incomplete message.
+    """
+    instance = decoder.Decoder()
+    assert list(instance.feed(random_messages_bytes[:header.BYTES - 1])) == []
+    assert len(instance) == header.BYTES - 1
+
+
+def test_decoder_feed_grows_buffer_for_large_message(random_local_id, random_remote_id):
+    """
+    Assert that :meth:`~adbwp.decoder.Decoder.feed` can decode a message larger than its initial buffer.
+    """
+    instance = message.write(random_local_id, random_remote_id, b'\xff' * consts.MAXDATA)
+    chunk = header.to_bytes(instance.header) + instance.data
+    dec = decoder.Decoder(size=32)
+    assert list(dec.feed(chunk[:100])) == []
+    assert list(dec.feed(chunk[100:])) == [instance]
+
+
+def test_decoder_feed_yields_unconsumed_messages_on_next_call(random_messages, random_messages_bytes):
+    """
+    Assert that messages not consumed from the iterator returned by :meth:`~adbwp.decoder.Decoder.feed`
+    are yielded by the next call.
+    """
+    instance = decoder.Decoder()
+    instance.feed(random_messages_bytes)
+    assert list(instance.feed(b'')) == random_messages
+
+
+def test_decoder_feed_raises_on_data_length_too_large(random_local_id, random_remote_id):
+    """
+    Assert that :meth:`~adbwp.decoder.Decoder.feed` raises a :class:`~adbwp.exceptions.UnpackError`
+    as soon as a header with a data length larger than allowed is received.
+    """
+    instance = header.new(enums.Command.WRTE, random_local_id, random_remote_id, consts.MAXDATA + 1,
+                          0, header.magic(enums.Command.WRTE))
+    with pytest.raises(exceptions.UnpackError):
+        list(decoder.Decoder().feed(header.to_bytes(instance)))
+
+
+def test_decoder_feed_raises_on_checksum_mismatch(random_local_id, random_remote_id):
+    """
+    Assert that :meth:`~adbwp.decoder.Decoder.feed` raises a :class:`~adbwp.exceptions.ChecksumError`
+    when the data payload checksum does not match the header.
+    """
+    instance = header.new(enums.Command.WRTE, random_local_id, random_remote_id, 3, 0,
+                          header.magic(enums.Command.WRTE))
+    with pytest.raises(exceptions.ChecksumError):
+        list(decoder.Decoder().feed(header.to_bytes(instance) + b'foo'))
+
+
+def test_decoder_feed_uses_negotiated_limits(random_local_id, random_remote_id):
+    """
+    Assert that :meth:`~adbwp.decoder.Decoder.feed` accepts data payloads up to the negotiated max data.
+    """
+    negotiated = limits.new(max_data=consts.MAX_PAYLOAD)
+    instance = message.write(random_local_id, random_remote_id, bytes(consts.MAXDATA + 1), negotiated)
+    assert list(decoder.Decoder(limits=negotiated).feed(message.to_bytes(instance))) == [instance]
+
+
+def test_decoder_feed_raises_on_invalid_magic(random_local_id, random_remote_id):
+    """
+    Assert that :meth:`~adbwp.decoder.Decoder.feed` raises a :class:`~adbwp.exceptions.UnpackError`
+    as soon as a header with a magic that does not match its command is received.
+    """
+    instance = header.new(enums.Command.WRTE, random_local_id, random_remote_id, 3, 0, 0)
+    with pytest.raises(exceptions.UnpackError):
+        list(decoder.Decoder().feed(header.to_bytes(instance)))
@@ -20,6 +20,32 @@ def test_command_values_unchanged(enum_value, int_value):
     assert enum_value.value == enum_value == int_value
 
 
+@pytest.mark.parametrize('enum_value', list(enums.SyncId))
+def test_sync_id_values_match_names(enum_value):
+    """
+    Assert that the :class:`~adbwp.enums.SyncId` integer values are their names as little-endian words.
+    """
+    assert enum_value.value == int.from_bytes(enum_value.name.encode('ascii'), 'little')
+
+
+@pytest.mark.parametrize(('enum_value', 'int_value'), list(zip(enums.SyncFlag, (0, 1, 2, 4, 0x80000000))))
+def test_sync_flag_values_unchanged(enum_value, int_value):
+    """
+    Assert that the :class:`~adbwp.enums.SyncFlag` integer values remain unchanged. The goal of this
+    test is to guard against an _accidental_ value change as it will require the test to be modified to pass.
+    """
+    assert enum_value.value == enum_value == int_value
+
+
+@pytest.mark.parametrize(('enum_value', 'int_value'), list(zip(enums.ShellId, (0, 1, 2, 3, 4, 5, 255))))
+def test_shell_id_values_unchanged(enum_value, int_value):
+    """
+    Assert that the :class:`~adbwp.enums.ShellId` integer values remain unchanged. The goal of this
+    test is to guard against an _accidental_ value change as it will require the test to be modified to pass.
+    """
+    assert enum_value.value == enum_value == int_value
+
+
 @pytest.mark.parametrize(('enum_value', 'int_value'), list(zip(enums.AuthType, (1, 2, 3))))
 def test_auth_type_values_unchanged(enum_value, int_value):
     """
@@ -45,3 +71,22 @@ def test_system_type_str_returns_value(enum_value, str_value):
     and returns the individual enum value.
     """
     assert enum_value.value == str(enum_value) == str_value
+
+
+@pytest.mark.parametrize(('enum_value', 'str_value'), list(zip(enums.StreamState,
+                                                                ('opening', 'pending', 'open', 'closed'))))
+def test_stream_state_str_returns_value(enum_value, str_value):
+    """
+    Assert that :class:`~adbwp.enums.StreamState` defines :meth:`~adbwp.enums.StreamState.__str__`
+    and returns the individual enum value.
+    """
+    assert enum_value.value == str(enum_value) == str_value
+
+
+@pytest.mark.parametrize(('enum_value', 'str_value'), list(zip(enums.HostResponseType, ('status', 'data', 'stream'))))
+def test_host_response_type_str_returns_value(enum_value, str_value):
+    """
+    Assert that :class:`~adbwp.enums.HostResponseType` defines :meth:`~adbwp.enums.HostResponseType.__str__`
+    and returns the individual enum value.
+    """
+    assert enum_value.value == str(enum_value) == str_value
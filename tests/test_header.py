@@ -186,3 +186,116 @@ def test_header_converts_to_from_bytes(random_header, random_header_bytes):
     """
     instance_from_bytes = header.from_bytes(random_header_bytes)
     assert instance_from_bytes == random_header
+
+
+def test_header_to_buffer_packs_headers_contiguously(random_header):
+    """
+    Assert that :func:`~adbwp.header.to_buffer` packs headers back to back into the given buffer
+    and returns the offset after the last header.
+    """
+    buffer = bytearray(header.BYTES * 3 + 1)
+    offset = header.to_buffer([random_header] * 3, buffer, offset=1)
+    assert offset == len(buffer)
+    assert buffer[1:] == header.to_bytes(random_header) * 3
+
+
+def test_header_to_buffer_raises_on_buffer_too_small(random_header):
+    """
+    Assert that :func:`~adbwp.header.to_buffer` raises a :class:`~adbwp.exceptions.PackError` when
+    the buffer cannot hold all headers.
+    """
+    with pytest.raises(exceptions.PackError):
+        header.to_buffer([random_header] * 2, bytearray(header.BYTES))
+
+
+def test_header_iter_from_buffer_converts_contiguous_headers(random_header, random_header_bytes):
+    """
+    Assert that :func:`~adbwp.header.iter_from_buffer` yields all headers from a buffer of contiguous headers.
+    """
+    assert list(header.iter_from_buffer(random_header_bytes * 3)) == [random_header] * 3
+
+
+def test_header_iter_from_buffer_raises_on_partial_header(random_header_bytes):
+    """
+    Assert that :func:`~adbwp.header.iter_from_buffer` raises a :class:`~adbwp.exceptions.UnpackError`
+    when the buffer length is not a multiple of the header size.
+    """
+    with pytest.raises(exceptions.UnpackError):
+        header.iter_from_buffer(random_header_bytes + b'\0')
+
+
+def test_header_from_bytes_raises_on_unknown_command(random_header):
+    """
+    Assert that :func:`~adbwp.header.from_bytes` raises a :class:`~adbwp.exceptions.UnpackError` when
+    the command is not a known :class:`~adbwp.enums.Command`.
+    """
+    with pytest.raises(exceptions.UnpackError):
+        header.from_bytes(header.to_bytes(random_header._replace(command=0)))
+
+
+def test_header_from_buffer_converts_header_at_offset(command_type, random_arg0, random_arg1,
+                                                      random_data_checksum, command_type_magic):
+    """
+    Assert that :func:`~adbwp.header.from_buffer` converts the header at the given offset of a buffer and
+    converts the command to a :class:`~adbwp.enums.Command`.
+    """
+    instance = header.new(command_type, random_arg0, random_arg1, consts.CONNECT_AUTH_MAXDATA,
+                          random_data_checksum, command_type_magic)
+    instance_from_buffer = header.from_buffer(b'\0' + header.to_bytes(instance), 1)
+    assert instance_from_buffer == instance
+    assert isinstance(instance_from_buffer.command, enums.Command)
+
+
+def test_header_unpack_from_returns_plain_ints(random_header):
+    """
+    Assert that :func:`~adbwp.header.unpack_from` returns the header values as plain :class:`~int` values.
+    """
+    instance = random_header._replace(data_length=0)
+    values = header.unpack_from(header.to_bytes(instance))
+    assert values == tuple(instance)
+    assert all(type(value) is int for value in values)
+
+
+def test_header_from_buffer_raises_on_partial_header(random_header_bytes):
+    """
+    Assert that :func:`~adbwp.header.from_buffer` raises a :class:`~adbwp.exceptions.UnpackError` when
+    the buffer does not contain a complete header at the given offset.
+    """
+    with pytest.raises(exceptions.UnpackError):
+        header.from_buffer(random_header_bytes, 1)
+
+
+def test_header_from_buffer_raises_on_unknown_command(random_arg0, random_arg1):
+    """
+    Assert that :func:`~adbwp.header.from_buffer` raises a :class:`~adbwp.exceptions.UnpackError` when
+    the command is not a known :class:`~adbwp.enums.Command`.
+    """
+    instance = header.new(0, random_arg0, random_arg1, 0, 0, header.magic(0))
+    with pytest.raises(exceptions.UnpackError):
+        header.from_buffer(header.to_bytes(instance))
+
+
+def test_header_from_buffer_raises_on_invalid_magic(command_type, random_arg0, random_arg1):
+    """
+    Assert that :func:`~adbwp.header.from_buffer` raises a :class:`~adbwp.exceptions.UnpackError` when
+    the magic is not the XOR of the command.
+    """
+    instance = header.new(command_type, random_arg0, random_arg1, 0, 0, command_type)
+    with pytest.raises(exceptions.UnpackError):
+        header.from_buffer(header.to_bytes(instance))
+
+
+@pytest.mark.parametrize(('command', 'data_length', 'max_data'), [
+    (enums.Command.WRTE, consts.MAXDATA + 1, consts.MAXDATA),
+    (enums.Command.WRTE, consts.MAX_PAYLOAD + 1, consts.MAX_PAYLOAD),
+    (enums.Command.CNXN, consts.CONNECT_AUTH_MAXDATA + 1, consts.MAX_PAYLOAD),
+    (enums.Command.AUTH, consts.CONNECT_AUTH_MAXDATA + 1, consts.MAX_PAYLOAD)
+])
+def test_header_from_buffer_raises_on_data_length_too_large(command, data_length, max_data):
+    """
+    Assert that :func:`~adbwp.header.from_buffer` raises a :class:`~adbwp.exceptions.UnpackError` when
+    the data length exceeds the maximum allowed for the command.
+    """
+    instance = header.new(command, 1, 1, data_length, 0, header.magic(command))
+    with pytest.raises(exceptions.UnpackError):
+        header.from_buffer(header.to_bytes(instance), max_data=max_data)
@@ -0,0 +1,139 @@
+"""
+    test_host
+    ~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.host` module.
+"""
+import itertools
+
+import pytest
+
+from adbwp import enums, exceptions, host
+
+OKAY = enums.CommandResponse.OKAY
+FAIL = enums.CommandResponse.FAIL
+
+
+@pytest.fixture(scope='function')
+def decoder():
+    """
+    Fixture that yields a new :class:`~adbwp.host.Decoder`.
+    """
+    return host.Decoder()
+
+
+def split(data, size):
+    """
+    Helper function that splits data into chunks of the given size.
+    """
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_request_prefixes_length_in_hex():
+    """
+    Assert that :func:`~adbwp.host.request` prefixes the service with its length in four hexadecimal digits.
+    """
+    assert host.request('host:version') == b'000chost:version'
+    assert host.request(b'') == b'0000'
+
+
+def test_request_raises_on_long_service():
+    """
+    Assert that :func:`~adbwp.host.request` raises a :class:`~ValueError` when the length does not fit the prefix.
+    """
+    host.request('a' * host.MAX_LENGTH)
+    with pytest.raises(ValueError):
+        host.request('a' * (host.MAX_LENGTH + 1))
+
+
+@pytest.mark.parametrize(('serial', 'expected'), [
+    (None, b'0012host:transport-any'),
+    ('emulator-5554', b'001chost:transport:emulator-5554')
+])
+def test_transport_requests_device(serial, expected):
+    """
+    Assert that :func:`~adbwp.host.transport` requests a device by serial, or any device.
+    """
+    assert host.transport(serial) == expected
+
+
+def test_responses_encode_status_and_data():
+    """
+    Assert that :func:`~adbwp.host.okay` and :func:`~adbwp.host.fail` encode the status and length prefixed data.
+    """
+    assert host.okay() == b'OKAY'
+    assert host.okay('0029') == b'OKAY00040029'
+    assert host.fail('device not found') == b'FAIL0010device not found'
+
+
+@pytest.mark.parametrize('size', [1, 3, 4, 7, 1024])
+def test_feed_pipelined_responses(decoder, size):
+    """
+    Assert that the responses to pipelined requests are decoded in order however they are split.
+    """
+    decoder.expect('host:version')
+    decoder.expect('host:transport:foo', enums.HostResponseType.STATUS)
+    decoder.expect('host:devices')
+    decoder.expect('host:features', enums.HostResponseType.DATA)
+    stream = host.okay('0029') + host.fail('device not found') + host.okay(b'') + host.okay('shell_v2,cmd')
+
+    responses = list(itertools.chain.from_iterable(decoder.feed(p) for p in split(stream, size)))
+    assert responses == [host.Response('host:version', OKAY, b'0029'),
+                         host.Response('host:transport:foo', FAIL, b'device not found'),
+                         host.Response('host:devices', OKAY, b''),
+                         host.Response('host:features', OKAY, b'shell_v2,cmd')]
+    assert decoder.expected == []
+    assert len(decoder) == 0
+
+
+def test_feed_status_response(decoder):
+    """
+    Assert that an OKAY of a STATUS response is not followed by data.
+    """
+    decoder.expect('host:transport-any', enums.HostResponseType.STATUS)
+    decoder.expect('host:version')
+    assert decoder.feed(host.okay() + b'OKAY0004') == [host.Response('host:transport-any', OKAY, None)]
+    assert len(decoder) == 8
+    assert decoder.feed(b'0029') == [host.Response('host:version', OKAY, b'0029')]
+
+
+def test_feed_stream_response(decoder):
+    """
+    Assert that a STREAM response produces its OKAY and then each data payload until closed.
+    """
+    decoder.expect('host:track-devices', enums.HostResponseType.STREAM)
+    responses = decoder.feed(host.okay() + b'0000' + b'0014emulator-5554\tdevice')
+    assert responses == [host.Response('host:track-devices', OKAY, None),
+                         host.Response('host:track-devices', OKAY, b''),
+                         host.Response('host:track-devices', OKAY, b'emulator-5554\tdevice')]
+    assert decoder.expected == [('host:track-devices', enums.HostResponseType.STREAM)]
+
+
+def test_feed_stream_response_fails(decoder):
+    """
+    Assert that a FAIL ends a STREAM response.
+    """
+    decoder.expect('host:track-devices', enums.HostResponseType.STREAM)
+    assert decoder.feed(host.fail('no')) == [host.Response('host:track-devices', FAIL, b'no')]
+    assert decoder.expected == []
+
+
+def test_expect_raises_after_stream(decoder):
+    """
+    Assert that :meth:`~adbwp.host.Decoder.expect` raises a :class:`~ValueError` after a STREAM response.
+    """
+    decoder.expect('host:track-devices', enums.HostResponseType.STREAM)
+    with pytest.raises(ValueError):
+        decoder.expect('host:version')
+
+
+@pytest.mark.parametrize('data', [b'OKAY', b'NOPE', b'OKAYxyz1', b'FAIL+001'])
+def test_feed_raises_on_malformed_responses(decoder, data):
+    """
+    Assert that :meth:`~adbwp.host.Decoder.feed` raises an :class:`~adbwp.exceptions.UnpackError` for
+    unexpected responses, unknown statuses, and invalid length prefixes.
+    """
+    if data != b'OKAY':
+        decoder.expect('host:version')
+    with pytest.raises(exceptions.UnpackError):
+        decoder.feed(data)
@@ -0,0 +1,141 @@
+"""
+    test_identity
+    ~~~~~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.identity` module.
+"""
+import pytest
+
+from adbwp import enums, identity, message
+
+DEVICE_BANNER = (b'device::ro.product.name=sailfish;ro.product.model=Pixel;ro.product.device=sailfish;'
+                 b'features=shell_v2,cmd,stat_v2,delayed_ack\0')
+
+
+def test_from_bytes_parses_modern_banner():
+    """
+    Assert that :func:`~adbwp.identity.from_bytes` parses the properties and features of a modern banner.
+    """
+    instance = identity.from_bytes(DEVICE_BANNER)
+    assert instance.system_type == enums.SystemType.DEVICE
+    assert instance.serial == ''
+    assert instance.properties['ro.product.model'] == 'Pixel'
+    assert instance.features == frozenset((identity.FEATURE_SHELL_V2, identity.FEATURE_CMD,
+                                           identity.FEATURE_STAT_V2, identity.FEATURE_DELAYED_ACK))
+
+
+def test_from_bytes_parses_legacy_banner(random_serial, random_banner):
+    """
+    Assert that :func:`~adbwp.identity.from_bytes` parses a banner without properties.
+    """
+    instance = identity.from_bytes('host:{}:{}'.format(random_serial, random_banner))
+    assert instance.system_type == enums.SystemType.HOST
+    assert instance.serial == random_serial
+    assert instance.banner == random_banner
+    assert instance.properties == {}
+    assert instance.features == frozenset()
+
+
+@pytest.mark.parametrize('data', [b'', b'device', b'device:', b'\0'])
+def test_from_bytes_parses_truncated_strings(data):
+    """
+    Assert that :func:`~adbwp.identity.from_bytes` accepts strings with missing parts.
+    """
+    instance = identity.from_bytes(data)
+    assert instance.banner == ''
+    assert instance.features == frozenset()
+
+
+def test_from_bytes_keeps_unknown_system_type():
+    """
+    Assert that :func:`~adbwp.identity.from_bytes` keeps system types that are not known as strings.
+    """
+    assert identity.from_bytes(b'sideload::').system_type == 'sideload'
+
+
+def test_from_bytes_ignores_malformed_properties():
+    """
+    Assert that :func:`~adbwp.identity.from_bytes` ignores properties without a key or value separator and
+    empty features.
+    """
+    instance = identity.from_bytes(b'device::foo;=bar;baz=1:2;features=,cmd,')
+    assert dict(instance.properties) == {'baz': '1:2', 'features': ',cmd,'}
+    assert instance.features == frozenset(('cmd',))
+
+
+def test_from_bytes_caches_identities():
+    """
+    Assert that :func:`~adbwp.identity.from_bytes` returns the same instance for equal strings of any type.
+    """
+    instance = identity.from_bytes(DEVICE_BANNER)
+    assert identity.from_bytes(bytearray(DEVICE_BANNER)) is instance
+    assert identity.from_bytes(memoryview(DEVICE_BANNER)) is instance
+
+
+def test_properties_are_read_only():
+    """
+    Assert that the properties of a cached :class:`~adbwp.identity.SystemIdentity` cannot be modified.
+    """
+    with pytest.raises(TypeError):
+        identity.from_bytes(DEVICE_BANNER).properties['features'] = ''
+
+
+def test_identities_are_hashable():
+    """
+    Assert that a :class:`~adbwp.identity.SystemIdentity` is hashable and equal identities parsed from
+    separate strings can be used as the same key.
+    """
+    instance = identity.from_bytes(DEVICE_BANNER)
+    other = identity.from_bytes(DEVICE_BANNER + b'\0')
+    assert other is not instance
+    assert hash(other) == hash(instance)
+    assert {instance: True}[other]
+
+
+def test_supports_checks_all_features():
+    """
+    Assert that :meth:`~adbwp.identity.SystemIdentity.supports` is true only when all features are advertised.
+    """
+    instance = identity.from_bytes(DEVICE_BANNER)
+    assert instance.supports()
+    assert instance.supports(identity.FEATURE_SHELL_V2, identity.FEATURE_DELAYED_ACK)
+    assert not instance.supports(identity.FEATURE_SHELL_V2, identity.FEATURE_SENDRECV_V2)
+
+
+def test_from_message_parses_connect_message(random_serial):
+    """
+    Assert that :func:`~adbwp.identity.from_message` parses the data payload of a connect message.
+    """
+    banner = identity.banner({'ro.product.name': 'x'}, [identity.FEATURE_LS_V2, identity.FEATURE_CMD])
+    instance = identity.from_message(message.connect(random_serial, banner, enums.SystemType.DEVICE))
+    assert instance.system_type == enums.SystemType.DEVICE
+    assert instance.serial == random_serial
+    assert instance.banner == 'ro.product.name=x;features=cmd,ls_v2'
+    assert instance.features == frozenset((identity.FEATURE_LS_V2, identity.FEATURE_CMD))
+
+
+def test_from_message_raises_on_non_connect_message(random_local_id):
+    """
+    Assert that :func:`~adbwp.identity.from_message` raises a :class:`~ValueError` when given a message that is
+    not a connect message.
+    """
+    with pytest.raises(ValueError):
+        identity.from_message(message.open(random_local_id, 'shell:'))
+
+
+def test_banner_without_features():
+    """
+    Assert that :func:`~adbwp.identity.banner` omits the features property when there are none.
+    """
+    assert identity.banner() == ''
+    assert identity.banner({'a': '1', 'b': '2'}) == 'a=1;b=2'
+
+
+@pytest.mark.parametrize('properties', [{'': 'x'}, {'a=b': 'x'}, {'a;b': 'x'}, {'a': 'x;y'}])
+def test_banner_raises_on_separators(properties):
+    """
+    Assert that :func:`~adbwp.identity.banner` raises a :class:`~ValueError` when a property cannot be parsed
+    back.
+    """
+    with pytest.raises(ValueError):
+        identity.banner(properties)
@@ -0,0 +1,60 @@
+"""
+    test_init
+    ~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp` package.
+"""
+import subprocess
+import sys
+
+import pytest
+
+import adbwp
+from adbwp import header, message
+
+
+def run_python(code):
+    """
+    Helper function that runs the given code in a new interpreter so imports are not already cached.
+    """
+    return subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, check=True).stdout.decode()
+
+
+def test_import_does_not_import_submodules():
+    """
+    Assert that importing :mod:`~adbwp` does not import the :mod:`~adbwp.header` and :mod:`~adbwp.message`
+    submodules or :mod:`typing`.
+    """
+    output = run_python('import sys, adbwp; print(sorted(m for m in sys.modules '
+                        'if m.startswith("adbwp.") or m == "typing"))')
+    assert output.strip() == "['adbwp.exceptions']"
+
+
+@pytest.mark.parametrize(('name', 'expected'), [
+    ('header', header),
+    ('message', message),
+    ('Header', header.Header),
+    ('Message', message.Message)
+])
+def test_lazy_attributes_import_on_access(name, expected):
+    """
+    Assert that lazily imported package attributes resolve to their submodule values.
+    """
+    assert getattr(adbwp, name) is expected
+    assert name in dir(adbwp)
+
+
+def test_star_import_includes_lazy_attributes():
+    """
+    Assert that a wildcard import of :mod:`~adbwp` includes the lazily imported attributes.
+    """
+    assert run_python('from adbwp import *; print(Header.__name__, Message.__name__, UnpackError.__name__)') == \
+        'Header Message UnpackError\n'
+
+
+def test_getattr_raises_on_unknown_attribute():
+    """
+    Assert that accessing an unknown package attribute raises an :class:`~AttributeError`.
+    """
+    with pytest.raises(AttributeError):
+        adbwp.unknown  # pylint: disable=pointless-statement,no-member
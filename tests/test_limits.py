@@ -0,0 +1,86 @@
+"""
+    test_limits
+    ~~~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.limits` module.
+"""
+import pytest
+
+from adbwp import consts, enums, header, limits, message
+
+
+def test_new_supports_default_values():
+    """
+    Assert that :func:`~adbwp.limits.new` returns a :class:`~adbwp.limits.Limits` with the protocol defaults.
+    """
+    instance = limits.new()
+    assert instance.version == consts.VERSION
+    assert instance.max_data == consts.MAXDATA
+    assert instance == limits.DEFAULT
+
+
+def test_new_raises_on_non_positive_max_data():
+    """
+    Assert that :func:`~adbwp.limits.new` raises a :class:`~ValueError` when given a max data of zero.
+    """
+    with pytest.raises(ValueError):
+        limits.new(max_data=0)
+
+
+def test_max_data_length_fixed_for_connect_and_auth(command_type):
+    """
+    Assert that :meth:`~adbwp.limits.Limits.max_data_length` returns :attr:`~adbwp.consts.CONNECT_AUTH_MAXDATA`
+    for connect and auth messages and the negotiated max data otherwise.
+    """
+    instance = limits.new(max_data=consts.MAX_PAYLOAD)
+    expected = consts.CONNECT_AUTH_MAXDATA if command_type in (enums.Command.CNXN, enums.Command.AUTH) \
+        else consts.MAX_PAYLOAD
+    assert instance.max_data_length(command_type) == expected
+
+
+@pytest.mark.parametrize(('local', 'remote', 'expected'), [
+    (limits.new(max_data=consts.MAX_PAYLOAD), limits.new(consts.VERSION_SKIP_CHECKSUM, consts.MAX_PAYLOAD),
+     limits.new(consts.VERSION, consts.MAX_PAYLOAD)),
+    (limits.new(consts.VERSION_SKIP_CHECKSUM, consts.MAX_PAYLOAD), limits.new(consts.VERSION, consts.MAXDATA),
+     limits.new(consts.VERSION, consts.MAXDATA)),
+    (None, limits.new(consts.VERSION_SKIP_CHECKSUM, consts.MAX_PAYLOAD), limits.DEFAULT)
+])
+def test_from_message_negotiates_lower_values(random_serial, random_banner, local, remote, expected):
+    """
+    Assert that :func:`~adbwp.limits.from_message` negotiates the lower of the local and remote values.
+    """
+    instance = message.connect(random_serial, random_banner, enums.SystemType.DEVICE, remote)
+    assert limits.from_message(instance, local) == expected
+
+
+def test_from_header_raises_on_non_connect_header(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.limits.from_header` raises a :class:`~ValueError` when given a header
+    that is not for a connect message.
+    """
+    with pytest.raises(ValueError):
+        limits.from_header(header.new(enums.Command.OKAY, random_local_id, random_remote_id))
+
+
+@pytest.mark.parametrize(('version', 'expected'), [
+    (consts.VERSION, True),
+    (consts.VERSION_SKIP_CHECKSUM, False),
+    (consts.VERSION_SKIP_CHECKSUM + 1, False)
+])
+def test_checksum_disabled_from_skip_checksum_version(version, expected):
+    """
+    Assert that :attr:`~adbwp.limits.Limits.checksum` is false only for versions of at least
+    :attr:`~adbwp.consts.VERSION_SKIP_CHECKSUM`.
+    """
+    assert limits.new(version).checksum is expected
+
+
+def test_checksum_enabled_unless_both_ends_skip_checksum(random_serial, random_banner):
+    """
+    Assert that limits negotiated with a remote system that skips checksums still use them unless
+    the local end opts in.
+    """
+    remote = message.connect(random_serial, random_banner, enums.SystemType.DEVICE,
+                             limits.new(consts.VERSION_SKIP_CHECKSUM))
+    assert limits.from_message(remote).checksum
+    assert not limits.from_message(remote, limits.new(consts.VERSION_SKIP_CHECKSUM)).checksum
@@ -6,7 +6,7 @@
 """
 import pytest
 
-from adbwp import consts, enums, header, message, payload
+from adbwp import consts, enums, exceptions, header, limits, message, payload
 
 
 def test_new_computes_header_data_length_based_on_data_payload(command_type, valid_payload_bytes):
@@ -366,3 +366,260 @@ def test_close_raises_on_zero_remote_id(random_local_id):
     """
     with pytest.raises(ValueError):
         message.close(random_local_id, 0)
+
+
+def test_to_buffers_returns_header_and_payload_view(random_local_id, random_remote_id, valid_payload_bytes):
+    """
+    Assert that :func:`~adbwp.message.to_buffers` returns the serialized header followed by a
+    :class:`~memoryview` of the data payload.
+    """
+    instance = message.write(random_local_id, random_remote_id, valid_payload_bytes)
+    buffers = message.to_buffers(instance)
+    assert len(buffers) == 2
+    assert buffers[0] == header.to_bytes(instance.header)
+    assert isinstance(buffers[1], memoryview)
+    assert buffers[1].obj is instance.data
+
+
+def test_to_buffers_omits_empty_payload(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.message.to_buffers` only returns the serialized header for a message
+    without a data payload.
+    """
+    instance = message.ready(random_local_id, random_remote_id)
+    assert message.to_buffers(instance) == [header.to_bytes(instance.header)]
+
+
+def test_to_bytes_returns_header_and_payload(random_local_id, random_remote_id, valid_payload_bytes):
+    """
+    Assert that :func:`~adbwp.message.to_bytes` returns the serialized header followed by the data payload.
+    """
+    instance = message.write(random_local_id, random_remote_id, valid_payload_bytes)
+    assert message.to_bytes(instance) == header.to_bytes(instance.header) + valid_payload_bytes
+
+
+def test_iter_from_buffer_yields_messages_with_payload_views(random_local_id, random_remote_id, valid_payload_bytes):
+    """
+    Assert that :func:`~adbwp.message.iter_from_buffer` yields all messages in the buffer with data payloads
+    that are :class:`~memoryview` slices of it.
+    """
+    messages = [message.ready(random_local_id, random_remote_id),
+                message.write(random_local_id, random_remote_id, valid_payload_bytes)]
+    buffer = b''.join(message.to_bytes(m) for m in messages)
+    instances = list(message.iter_from_buffer(buffer))
+    assert instances == messages
+    assert isinstance(instances[1].data, memoryview)
+    assert instances[1].data.obj is buffer
+
+
+def test_iter_from_buffer_supports_mmap(tmpdir, random_local_id, random_remote_id, valid_payload_bytes):
+    """
+    Assert that :func:`~adbwp.message.iter_from_buffer` decodes messages from a :class:`~mmap.mmap`.
+    """
+    import mmap
+
+    instance = message.write(random_local_id, random_remote_id, valid_payload_bytes)
+    path = tmpdir.join('capture.bin')
+    path.write_binary(message.to_bytes(instance) * 2)
+    with path.open('rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        instances = list(message.iter_from_buffer(buffer))
+        assert instances == [instance] * 2
+        del instances
+
+
+def test_iter_from_buffer_offset_stops_at_trailing_partial_message(random_local_id, random_remote_id):
+    """
+    Assert that :attr:`~adbwp.message.BufferIterator.offset` is the offset of a trailing partial message
+    once the iterator is exhausted.
+    """
+    chunk = message.to_bytes(message.write(random_local_id, random_remote_id, b'foobar'))
+    iterator = message.iter_from_buffer(chunk + chunk[:-1])
+    assert len(list(iterator)) == 1
+    assert iterator.offset == len(chunk)
+    assert len(list(message.iter_from_buffer(chunk * 2, iterator.offset))) == 1
+
+
+def test_iter_from_buffer_raises_on_data_length_too_large(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.message.iter_from_buffer` raises a :class:`~adbwp.exceptions.UnpackError`
+    on a header with a data length larger than allowed.
+    """
+    instance = header.new(enums.Command.WRTE, random_local_id, random_remote_id, consts.MAXDATA + 1,
+                          0, header.magic(enums.Command.WRTE))
+    with pytest.raises(exceptions.UnpackError):
+        list(message.iter_from_buffer(header.to_bytes(instance)))
+
+
+@pytest.mark.parametrize('max_data', [1, 3, 4096])
+def test_write_stream_splits_buffer_into_payload_views(random_local_id, random_remote_id, max_data):
+    """
+    Assert that :func:`~adbwp.message.write_stream` splits a buffer into write messages with data payloads
+    that are :class:`~memoryview` slices of at most the given size.
+    """
+    data = bytes(range(256)) * 40
+    instances = list(message.write_stream(random_local_id, random_remote_id, data, max_data=max_data))
+    assert b''.join(instance.data for instance in instances) == data
+    assert all(instance.header.command == enums.Command.WRTE for instance in instances)
+    assert all(0 < len(instance.data) <= max_data for instance in instances)
+    assert all(instance.data.obj is data for instance in instances)
+    assert all(instance.header.data_checksum == payload.checksum(instance.data) for instance in instances)
+
+
+def test_write_stream_reads_file_object(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.message.write_stream` reads a binary file object one data payload at a time.
+    """
+    import io
+
+    data = bytes(range(256)) * 40
+    instances = list(message.write_stream(random_local_id, random_remote_id, io.BytesIO(data), max_data=1000))
+    assert [len(instance.data) for instance in instances] == [1000] * 10 + [240]
+    assert b''.join(instance.data for instance in instances) == data
+
+
+def test_write_stream_splits_iterable_of_chunks(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.message.write_stream` splits each chunk of an iterable and skips empty chunks.
+    """
+    chunks = (chunk for chunk in [b'foobar', b'', 'baz', bytearray(b'qux')])
+    instances = list(message.write_stream(random_local_id, random_remote_id, chunks, max_data=4))
+    assert [bytes(instance.data) for instance in instances] == [b'foob', b'ar', b'baz', b'qux']
+
+
+def test_write_stream_yields_nothing_for_empty_data(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.message.write_stream` does not create messages for empty data.
+    """
+    assert list(message.write_stream(random_local_id, random_remote_id, b'')) == []
+
+
+def test_write_stream_raises_on_invalid_max_data(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.message.write_stream` raises a :class:`~ValueError` when given a max data
+    that is not positive or greater than :attr:`~adbwp.consts.MAXDATA`.
+    """
+    with pytest.raises(ValueError):
+        message.write_stream(random_local_id, random_remote_id, b'foo', max_data=0)
+    with pytest.raises(ValueError):
+        message.write_stream(random_local_id, random_remote_id, b'foo', max_data=consts.MAXDATA + 1)
+
+
+def test_write_accepts_payload_up_to_negotiated_max_data(random_local_id, random_remote_id,
+                                                         bytes_larger_than_maxdata):
+    """
+    Assert that :func:`~adbwp.message.write` and :func:`~adbwp.message.from_header` validate data payloads
+    against the negotiated max data instead of :attr:`~adbwp.consts.MAXDATA`.
+    """
+    negotiated = limits.new(max_data=consts.MAX_PAYLOAD)
+    instance = message.write(random_local_id, random_remote_id, bytes_larger_than_maxdata, negotiated)
+    assert message.from_header(instance.header, instance.data, negotiated) == instance
+    with pytest.raises(ValueError):
+        message.from_header(instance.header, instance.data)
+    with pytest.raises(ValueError):
+        message.write(random_local_id, random_remote_id, b'foobar', limits.new(max_data=3))
+
+
+def test_max_data_defaults_to_maxdata():
+    """
+    Assert that :func:`~adbwp.message.max_data` returns the negotiated max data, or
+    :attr:`~adbwp.consts.MAXDATA` without limits.
+    """
+    assert message.max_data() == consts.MAXDATA
+    assert message.max_data(limits.new(max_data=consts.MAX_PAYLOAD)) == consts.MAX_PAYLOAD
+
+
+def test_write_stream_defaults_to_negotiated_max_data(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.message.write_stream` splits data payloads by the negotiated max data.
+    """
+    negotiated = limits.new(max_data=consts.MAX_PAYLOAD)
+    instances = list(message.write_stream(random_local_id, random_remote_id, bytes(consts.MAX_PAYLOAD + 1),
+                                          limits=negotiated))
+    assert [len(instance.data) for instance in instances] == [consts.MAX_PAYLOAD, 1]
+
+
+def test_connect_advertises_limits(random_serial, random_banner):
+    """
+    Assert that :func:`~adbwp.message.connect` advertises the given limits in the header arguments.
+    """
+    instance = message.connect(random_serial, random_banner, limits=limits.new(max_data=consts.MAX_PAYLOAD))
+    assert instance.header.arg0 == consts.VERSION
+    assert instance.header.arg1 == consts.MAX_PAYLOAD
+
+
+def test_write_skips_checksum_for_negotiated_version(random_local_id, random_remote_id, valid_payload_bytes):
+    """
+    Assert that :func:`~adbwp.message.write` sets a zero data checksum when limits skip checksums.
+    """
+    negotiated = limits.new(consts.VERSION_SKIP_CHECKSUM)
+    instance = message.write(random_local_id, random_remote_id, valid_payload_bytes, negotiated)
+    assert instance.header.data_checksum == 0
+
+
+def test_from_header_skips_checksum_verification_for_negotiated_version(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.message.from_header` does not raise a :class:`~adbwp.exceptions.ChecksumError`
+    for a mismatched data checksum when limits skip checksums.
+    """
+    instance = header.new(enums.Command.WRTE, random_local_id, random_remote_id, 3, 0,
+                          header.magic(enums.Command.WRTE))
+    with pytest.raises(exceptions.ChecksumError):
+        message.from_header(instance, b'foo')
+    negotiated = limits.new(consts.VERSION_SKIP_CHECKSUM)
+    assert message.from_header(instance, b'foo', negotiated).data == b'foo'
+
+
+def test_open_assigns_window_to_arg1(random_local_id, random_destination):
+    """
+    Assert that :func:`~adbwp.message.open` advertises the receive window in "arg1".
+    """
+    assert message.open(random_local_id, random_destination).header.arg1 == 0
+    assert message.open(random_local_id, random_destination, window=consts.DELAYED_ACK_WINDOW).header.arg1 == \
+        consts.DELAYED_ACK_WINDOW
+
+
+@pytest.mark.parametrize('window', [-1, consts.COMMAND_MASK + 1])
+def test_open_raises_on_invalid_window(random_local_id, random_destination, window):
+    """
+    Assert that :func:`~adbwp.message.open` raises a :class:`~ValueError` when the window is not an
+    unsigned 32-bit integer.
+    """
+    with pytest.raises(ValueError):
+        message.open(random_local_id, random_destination, window=window)
+
+
+@pytest.mark.parametrize('acked', [0, 1, consts.MAXDATA, consts.COMMAND_MASK])
+def test_ready_with_acked_bytes_round_trips(random_local_id, random_remote_id, acked):
+    """
+    Assert that :func:`~adbwp.message.ready` packs acked bytes into a 4-byte data payload that
+    :func:`~adbwp.message.acked_bytes` unpacks.
+    """
+    instance = message.ready(random_local_id, random_remote_id, acked)
+    assert len(instance.data) == 4
+    assert message.acked_bytes(instance) == acked
+
+
+def test_acked_bytes_returns_none_without_data_payload(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.message.acked_bytes` returns :data:`None` for a ready message without acked bytes.
+    """
+    assert message.acked_bytes(message.ready(random_local_id, random_remote_id)) is None
+
+
+def test_ready_raises_on_invalid_acked_bytes(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.message.ready` raises a :class:`~ValueError` when acked bytes is negative.
+    """
+    with pytest.raises(ValueError):
+        message.ready(random_local_id, random_remote_id, -1)
+
+
+def test_acked_bytes_raises_on_invalid_data_payload(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.message.acked_bytes` raises a :class:`~adbwp.exceptions.UnpackError` when the
+    data payload is not 4 bytes and a :class:`~ValueError` for messages that are not ready messages.
+    """
+    with pytest.raises(exceptions.UnpackError):
+        message.acked_bytes(message.new(enums.Command.OKAY, random_local_id, random_remote_id, b'foo'))
+    with pytest.raises(ValueError):
+        message.acked_bytes(message.close(random_local_id, random_remote_id))
@@ -0,0 +1,115 @@
+"""
+    test_metrics
+    ~~~~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.metrics` module.
+"""
+import pytest
+
+from adbwp import enums, exceptions, header, message, metrics, payload
+
+
+@pytest.fixture(scope='function', params=[False, True], ids=['untimed', 'timed'])
+def recorder(request):
+    """
+    Fixture that yields an installed :class:`~adbwp.metrics.Recorder` and uninstalls it afterwards.
+    """
+    instance = metrics.Recorder(timed=request.param)
+    metrics.install(instance)
+    yield instance
+    metrics.uninstall()
+
+
+def test_install_returns_previous_sink():
+    """
+    Assert that :func:`~adbwp.metrics.install` and :func:`~adbwp.metrics.uninstall` return the sink they replace.
+    """
+    first, second = metrics.Sink(), metrics.Sink()
+    assert metrics.install(first) is None
+    assert metrics.install(second) is first
+    assert metrics.uninstall() is second
+    assert metrics.SINK is None
+
+
+def test_header_to_bytes_records_command(recorder, random_header):
+    """
+    Assert that :func:`~adbwp.header.to_bytes` records the header command and size.
+    """
+    header.to_bytes(random_header)
+    key = (metrics.HEADER_TO_BYTES, random_header.command)
+    assert recorder.counts[key] == 1
+    assert recorder.bytes[key] == header.BYTES
+
+
+def test_header_from_bytes_records_command(recorder, random_header, random_header_bytes):
+    """
+    Assert that :func:`~adbwp.header.from_bytes` records the header command and size.
+    """
+    header.from_bytes(random_header_bytes)
+    assert recorder.counts[(metrics.HEADER_FROM_BYTES, random_header.command)] == 1
+
+
+def test_header_from_buffer_records_command(recorder, random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.header.from_buffer` records the header command and size.
+    """
+    data = message.to_bytes(message.ready(random_local_id, random_remote_id))
+    recorder.clear()
+    header.from_buffer(data)
+    assert recorder.counts == {(metrics.HEADER_FROM_BUFFER, enums.Command.OKAY): 1}
+
+
+def test_message_from_header_records_command_and_bytes(recorder, random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.message.from_header` records messages and data payload bytes per command
+    and that the data payload checksum is recorded too.
+    """
+    instance = message.write(random_local_id, random_remote_id, b'foobar')
+    recorder.clear()
+    message.from_header(instance.header, instance.data)
+    message.from_header(instance.header, instance.data)
+    assert recorder.counts[(metrics.MESSAGE_FROM_HEADER, enums.Command.WRTE)] == 2
+    assert recorder.bytes[(metrics.MESSAGE_FROM_HEADER, enums.Command.WRTE)] == 12
+    assert recorder.bytes[(metrics.PAYLOAD_CHECKSUM, None)] == 12
+
+
+def test_message_from_header_records_checksum_failure(recorder, random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.message.from_header` records a checksum failure for the message command.
+    """
+    instance = header.new(enums.Command.WRTE, random_local_id, random_remote_id, 3, 0,
+                          header.magic(enums.Command.WRTE))
+    with pytest.raises(exceptions.ChecksumError):
+        message.from_header(instance, b'foo')
+    assert recorder.checksum_failures == {enums.Command.WRTE: 1}
+
+
+def test_recorder_histograms_only_when_timed(recorder):
+    """
+    Assert that :class:`~adbwp.metrics.Recorder` records duration histograms only when timed.
+    """
+    payload.checksum(b'foo')
+    histogram = recorder.histograms[metrics.PAYLOAD_CHECKSUM]
+    assert sum(histogram.values()) == (1 if recorder.timed else 0)
+
+
+def test_recorder_clear_resets_counters(recorder):
+    """
+    Assert that :meth:`~adbwp.metrics.Recorder.clear` resets all counters and histograms.
+    """
+    payload.checksum(b'foo')
+    recorder.clear()
+    assert not recorder.counts
+    assert not recorder.bytes
+    assert not recorder.histograms
+
+
+def test_uninstalled_sink_records_nothing(random_header):
+    """
+    Assert that a sink receives no measurements once it is uninstalled.
+    """
+    recorder = metrics.Recorder()
+    metrics.install(recorder)
+    metrics.uninstall()
+    header.to_bytes(random_header)
+    assert not recorder.counts
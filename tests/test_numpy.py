@@ -0,0 +1,91 @@
+"""
+    test_numpy
+    ~~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.numpy` module.
+"""
+import os
+
+import pytest
+
+from adbwp import header, message
+
+numpy = pytest.importorskip('numpy')
+adbwp_numpy = pytest.importorskip('adbwp.numpy')
+
+
+@pytest.fixture(scope='function')
+def random_messages(random_local_id, random_remote_id):
+    """
+    Fixture that yields a list of messages with and without data payloads, ending with an empty one.
+    """
+    return [message.connect('serial', 'banner'),
+            message.write(random_local_id, random_remote_id, os.urandom(1)),
+            message.ready(random_remote_id, random_local_id),
+            message.write(random_local_id, random_remote_id, os.urandom(4096)),
+            message.write(random_remote_id, random_local_id, b'\xff' * 1000),
+            message.close(random_local_id, random_remote_id)]
+
+
+@pytest.fixture(scope='function')
+def random_messages_bytes(random_messages):
+    """
+    Fixture that yields the given messages serialized back to back.
+    """
+    return b''.join(message.to_bytes(m) for m in random_messages)
+
+
+def test_from_buffer_loads_header_fields_and_offsets(random_messages, random_messages_bytes):
+    """
+    Assert that :func:`~adbwp.numpy.from_buffer` loads the header fields and offset of each message.
+    """
+    headers = adbwp_numpy.from_buffer(random_messages_bytes)
+    assert headers.dtype == adbwp_numpy.DTYPE
+    assert [header.new(*row[:-1]) for row in headers.tolist()] == [m.header for m in random_messages]
+
+    offsets = numpy.cumsum([0] + [header.BYTES + len(m.data) for m in random_messages])[:-1]
+    assert headers['offset'].tolist() == offsets.tolist()
+
+
+def test_from_buffer_ignores_trailing_partial_message(random_messages, random_messages_bytes):
+    """
+    Assert that :func:`~adbwp.numpy.from_buffer` ignores a trailing partial message.
+    """
+    assert len(adbwp_numpy.from_buffer(random_messages_bytes[:-1])) == len(random_messages) - 1
+    assert len(adbwp_numpy.from_buffer(random_messages_bytes + b'\0')) == len(random_messages)
+
+
+def test_from_buffer_returns_empty_array_for_empty_buffer():
+    """
+    Assert that :func:`~adbwp.numpy.from_buffer` returns an empty array when the buffer has no messages.
+    """
+    assert len(adbwp_numpy.from_buffer(b'')) == 0
+
+
+def test_checksums_match_header_checksums(random_messages, random_messages_bytes):
+    """
+    Assert that :func:`~adbwp.numpy.checksums` computes the checksum of each data payload, including
+    empty ones at the end of the buffer.
+    """
+    headers = adbwp_numpy.from_buffer(random_messages_bytes)
+    assert adbwp_numpy.checksums(random_messages_bytes, headers).tolist() == \
+        [m.header.data_checksum for m in random_messages]
+
+
+def test_checksums_supports_payload_at_end_of_buffer(random_messages, random_messages_bytes):
+    """
+    Assert that :func:`~adbwp.numpy.checksums` sums a data payload that ends at the end of the buffer.
+    """
+    buffer = random_messages_bytes[:-header.BYTES]
+    headers = adbwp_numpy.from_buffer(buffer)
+    assert adbwp_numpy.verify_checksums(buffer, headers).all()
+
+
+def test_verify_checksums_flags_corrupt_payloads(random_messages_bytes):
+    """
+    Assert that :func:`~adbwp.numpy.verify_checksums` is false only for messages with corrupt data payloads.
+    """
+    buffer = bytearray(random_messages_bytes)
+    headers = adbwp_numpy.from_buffer(buffer)
+    buffer[int(headers['offset'][3]) + header.BYTES] ^= 0xff
+    assert adbwp_numpy.verify_checksums(buffer, headers).tolist() == [True, True, True, False, True, True]
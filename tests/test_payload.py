@@ -4,11 +4,50 @@
 
     Contains tests for the :mod:`~adbwp.payload` module.
 """
+import os
+
 import pytest
 
 from adbwp import consts, payload
 
 
+@pytest.fixture(scope='session', params=[
+    0,
+    1,
+    payload.ADLER32_CHUNK_SIZE - 1,
+    payload.ADLER32_CHUNK_SIZE + 1,
+    payload.CHECKSUM_SMALL_PAYLOAD,
+    consts.MAXDATA,
+    consts.MAXDATA * 4 + 3
+])
+def payload_size(request):
+    """
+    Fixture that yields data payload sizes around the boundaries of the checksum backends.
+    """
+    return request.param
+
+
+@pytest.fixture(scope='session', params=[os.urandom, lambda size: b'\xff' * size])
+def sized_payload(request, payload_size):
+    """
+    Fixture that yields random and all-ones data payloads of the given size.
+    """
+    return request.param(payload_size)
+
+
+@pytest.fixture(scope='session', params=[
+    payload.checksum,
+    payload.checksum_adler32,
+    pytest.param(payload.checksum_numpy, marks=pytest.mark.skipif(not payload.NUMPY_AVAILABLE,
+                                                                   reason='numpy is not installed'))
+])
+def checksum_function(request):
+    """
+    Fixture that yields all available checksum implementations.
+    """
+    return request.param
+
+
 def test_checksum_computes_sum_bitwse_and_mask(valid_payload_bytes):
     """
     Assert that :func:`~adbwp.payload.checksum` computes the expected value.
@@ -16,6 +55,39 @@ def test_checksum_computes_sum_bitwse_and_mask(valid_payload_bytes):
     assert payload.checksum(valid_payload_bytes) == sum(valid_payload_bytes) & consts.COMMAND_MASK
 
 
+def test_checksum_backends_match_sum(checksum_function, sized_payload):
+    """
+    Assert that all checksum implementations compute the same value as summing the bytes.
+    """
+    expected = sum(sized_payload) & consts.COMMAND_MASK
+    assert checksum_function(sized_payload) == expected
+    assert checksum_function(memoryview(sized_payload)) == expected
+    assert checksum_function(bytearray(sized_payload)) == expected
+
+
+def test_checksum_supports_non_byte_memoryview(sized_payload):
+    """
+    Assert that :func:`~adbwp.payload.checksum` sums the bytes of a :class:`~memoryview` with a
+    multi-byte item format.
+    """
+    data = sized_payload[:len(sized_payload) // 4 * 4]
+    assert payload.checksum(memoryview(data).cast('I')) == sum(data) & consts.COMMAND_MASK
+
+
+@pytest.mark.parametrize('function', [
+    payload.checksum,
+    payload.checksum_adler32,
+    pytest.param(payload.checksum_numpy, marks=pytest.mark.skipif(not payload.NUMPY_AVAILABLE,
+                                                                   reason='numpy is not installed'))
+])
+def test_checksum_supports_non_contiguous_memoryview(function, sized_payload):
+    """
+    Assert that checksum implementations sum the bytes of a non-contiguous :class:`~memoryview`.
+    """
+    view = memoryview(sized_payload)[::2]
+    assert function(view) == sum(sized_payload[::2]) & consts.COMMAND_MASK
+
+
 def test_null_terminate_adds_zero_byte(valid_payload, valid_payload_bytes):
     """
     Assert that :func:`~adbwp.payload.null_terminate` adds a zero-byte to the end of the data payload.
@@ -0,0 +1,161 @@
+"""
+    test_shell
+    ~~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.shell` module.
+"""
+import itertools
+
+import pytest
+
+from adbwp import consts, enums, exceptions, message, shell
+
+
+@pytest.fixture(scope='function')
+def decoder():
+    """
+    Fixture that yields a new :class:`~adbwp.shell.Decoder`.
+    """
+    return shell.Decoder()
+
+
+def split(data, size):
+    """
+    Helper function that splits data into chunks of the given size.
+    """
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def merged(packets):
+    """
+    Helper function that joins the parts of consecutive packets with the same identifier.
+    """
+    return [(shell_id, b''.join(p.data for p in group))
+            for shell_id, group in itertools.groupby(packets, key=lambda p: p.shell_id)]
+
+
+def test_packet_encodes_header():
+    """
+    Assert that :func:`~adbwp.shell.packet` encodes the identifier and little-endian length before the data.
+    """
+    assert shell.packet(enums.ShellId.STDOUT, b'foo') == b'\x01\x03\x00\x00\x00foo'
+    assert shell.close_stdin() == b'\x04\x00\x00\x00\x00'
+
+
+def test_window_size_change_encodes_null_terminated_size():
+    """
+    Assert that :func:`~adbwp.shell.window_size_change` encodes the size as adbd parses it.
+    """
+    assert shell.window_size_change(24, 80) == b'\x05\x0a\x00\x00\x0024x80,0x0\0'
+
+
+@pytest.mark.parametrize('status', [-1, 256])
+def test_exit_status_raises_on_invalid_status(status):
+    """
+    Assert that :func:`~adbwp.shell.exit_status` raises a :class:`~ValueError` for statuses out of range.
+    """
+    with pytest.raises(ValueError):
+        shell.exit_status(status)
+
+
+def test_feed_returns_views_of_payload(decoder):
+    """
+    Assert that packets contained in a single data payload are views over it.
+    """
+    data = shell.packet(enums.ShellId.STDOUT, b'out') + shell.packet(enums.ShellId.STDERR, b'err')
+    packets = decoder.feed(data)
+    assert [(p.shell_id, p.data.tobytes()) for p in packets] == [(enums.ShellId.STDOUT, b'out'),
+                                                                 (enums.ShellId.STDERR, b'err')]
+    assert all(p.data.obj is data for p in packets)
+
+
+@pytest.mark.parametrize('size', [1, 2, 5, 7, 64])
+def test_feed_packets_spanning_payloads(decoder, size):
+    """
+    Assert that packets split across data payloads at any offset are produced without buffering their data.
+    """
+    stream = b''.join((shell.packet(enums.ShellId.STDOUT, b'stdout data'), shell.packet(enums.ShellId.STDERR, b''),
+                       shell.packet(enums.ShellId.STDERR, b'stderr data'), shell.exit_status(3)))
+    packets = list(itertools.chain.from_iterable(decoder.feed(p) for p in split(stream, size)))
+    assert merged(packets) == [(enums.ShellId.STDOUT, b'stdout data'), (enums.ShellId.STDERR, b'stderr data'),
+                               (enums.ShellId.EXIT, b'\x03')]
+    assert decoder.exit_status == 3
+    assert len(decoder) == 0
+
+
+def test_feed_buffers_only_headers(decoder):
+    """
+    Assert that the decoder buffers partial headers and control packets, but not stream data.
+    """
+    data = shell.packet(enums.ShellId.STDOUT, b'x' * 100)
+    assert decoder.feed(data[:3]) == []
+    assert len(decoder) == 3
+    middle = data[3:50]
+    packets = decoder.feed(middle)
+    assert [p.data.tobytes() for p in packets] == [b'x' * 45]
+    assert packets[0].data.obj is middle
+    assert len(decoder) == 0
+    rest = data[50:]
+    assert [p.data.obj for p in decoder.feed(rest)] == [rest]
+
+
+def test_feed_completes_split_control_packet_without_copying_payload(decoder):
+    """
+    Assert that a control packet split between data payloads is completed from the start of the next one and
+    the stream packets that follow it are views over that payload.
+    """
+    data = shell.exit_status(7) + shell.packet(enums.ShellId.STDOUT, b'after exit')
+    assert decoder.feed(data[:3]) == []
+    rest = data[3:]
+    packets = decoder.feed(rest)
+    assert merged(packets) == [(enums.ShellId.EXIT, b'\x07'), (enums.ShellId.STDOUT, b'after exit')]
+    assert packets[1].data.obj is rest
+    assert decoder.exit_status == 7
+    assert len(decoder) == 0
+
+
+def test_feed_messages_from_message_module(decoder):
+    """
+    Assert that packets are decoded from the data payloads of write messages.
+    """
+    payloads = list(shell.stdin_payloads(b'input' * 10, 16))
+    assert all(len(p) <= 16 for p in payloads)
+    messages = [message.write(1, 2, p) for p in payloads]
+    packets = list(itertools.chain.from_iterable(decoder.feed(m.data) for m in messages))
+    assert merged(packets) == [(enums.ShellId.STDIN, b'input' * 10)]
+
+
+def test_stdin_payloads_raises_on_small_max_data():
+    """
+    Assert that :func:`~adbwp.shell.stdin_payloads` raises a :class:`~ValueError` when max data cannot hold data.
+    """
+    with pytest.raises(ValueError):
+        list(shell.stdin_payloads(b'a', 5))
+
+
+def test_feed_raises_on_unknown_identifier(decoder):
+    """
+    Assert that :meth:`~adbwp.shell.Decoder.feed` raises an :class:`~adbwp.exceptions.UnpackError` for unknown
+    packet identifiers.
+    """
+    with pytest.raises(exceptions.UnpackError):
+        decoder.feed(b'\x07\x00\x00\x00\x00')
+
+
+def test_feed_raises_on_oversized_control_packet(decoder):
+    """
+    Assert that :meth:`~adbwp.shell.Decoder.feed` raises an :class:`~adbwp.exceptions.UnpackError` for control
+    packets too long to buffer.
+    """
+    header = shell.HEADER_STRUCT.pack(enums.ShellId.EXIT, shell.CONTROL_DATA_MAX + 1)
+    with pytest.raises(exceptions.UnpackError):
+        decoder.feed(header)
+
+
+def test_feed_stream_packets_are_not_limited(decoder):
+    """
+    Assert that stream packets may be longer than any data payload.
+    """
+    data = shell.packet(enums.ShellId.STDOUT, b'x' * (2 * consts.MAXDATA))
+    packets = list(itertools.chain.from_iterable(decoder.feed(p) for p in split(data, consts.MAXDATA)))
+    assert merged(packets) == [(enums.ShellId.STDOUT, b'x' * (2 * consts.MAXDATA))]
@@ -0,0 +1,113 @@
+"""
+    test_sock
+    ~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.sock` module.
+"""
+import socket
+
+import pytest
+
+from adbwp import message, sock
+
+
+class PartialSendSocket:
+    """
+    Fake socket that sends at most a few bytes per :meth:`~socket.socket.sendmsg` call.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.received = bytearray()
+        self.calls = 0
+
+    def sendmsg(self, buffers):
+        self.calls += 1
+        data = b''.join(buffers)[:self.limit]
+        self.received.extend(data)
+        return len(data)
+
+
+class SendAllSocket:
+    """
+    Fake socket that does not support :meth:`~socket.socket.sendmsg`.
+    """
+
+    def __init__(self):
+        self.received = bytearray()
+
+    def sendall(self, data):
+        self.received.extend(data)
+
+
+@pytest.fixture(scope='function')
+def random_messages(random_local_id, random_remote_id, valid_payload):
+    """
+    Fixture that yields a list of messages with and without data payloads.
+    """
+    return [message.open(random_local_id, 'shell:'),
+            message.write(random_local_id, random_remote_id, valid_payload),
+            message.close(random_local_id, random_remote_id)]
+
+
+@pytest.fixture(scope='function')
+def random_messages_bytes(random_messages):
+    """
+    Fixture that yields the given messages serialized into a single :class:`~bytes`.
+    """
+    return b''.join(message.to_bytes(m) for m in random_messages)
+
+
+def test_send_message_sends_serialized_message(random_local_id, random_remote_id, valid_payload):
+    """
+    Assert that :func:`~adbwp.sock.send_message` sends the serialized message over a socket.
+    """
+    instance = message.write(random_local_id, random_remote_id, valid_payload)
+    expected = message.to_bytes(instance)
+    left, right = socket.socketpair()
+    with left, right:
+        assert sock.send_message(left, instance) == len(expected)
+        assert right.recv(len(expected) + 1) == expected
+
+
+def test_send_messages_sends_serialized_messages(random_messages, random_messages_bytes):
+    """
+    Assert that :func:`~adbwp.sock.send_messages` sends all messages in a single call.
+    """
+    fake = PartialSendSocket(limit=len(random_messages_bytes))
+    assert sock.send_messages(fake, random_messages) == len(random_messages_bytes)
+    assert fake.received == random_messages_bytes
+    assert fake.calls == 1
+
+
+def test_send_messages_resumes_after_partial_send(random_messages, random_messages_bytes):
+    """
+    Assert that :func:`~adbwp.sock.send_messages` continues sending after a partial send.
+    """
+    fake = PartialSendSocket(limit=5)
+    assert sock.send_messages(fake, random_messages) == len(random_messages_bytes)
+    assert fake.received == random_messages_bytes
+
+
+def test_send_messages_resumes_after_partial_send_of_non_byte_memoryview(random_local_id, random_remote_id):
+    """
+    Assert that :func:`~adbwp.sock.send_messages` advances by bytes, not items, after a partial send of a
+    data payload :class:`~memoryview` with a multi-byte item format.
+    """
+    data = bytes(range(256)) * 4
+    instance = message.write(random_local_id, random_remote_id, data)
+    instance = instance._replace(data=memoryview(data).cast('I'))
+    expected = message.to_bytes(message.write(random_local_id, random_remote_id, data))
+    fake = PartialSendSocket(limit=7)
+    assert sock.send_messages(fake, [instance]) == len(expected)
+    assert fake.received == expected
+
+
+def test_send_messages_falls_back_to_sendall(random_messages, random_messages_bytes):
+    """
+    Assert that :func:`~adbwp.sock.send_messages` uses :meth:`~socket.socket.sendall` when
+    :meth:`~socket.socket.sendmsg` is not available.
+    """
+    fake = SendAllSocket()
+    assert sock.send_messages(fake, random_messages) == len(random_messages_bytes)
+    assert fake.received == random_messages_bytes
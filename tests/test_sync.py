@@ -0,0 +1,330 @@
+"""
+    test_sync
+    ~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.sync` module.
+"""
+import itertools
+import os
+
+import pytest
+
+from adbwp import compression, consts, enums, exceptions, sync
+
+
+@pytest.fixture(scope='function')
+def decoder():
+    """
+    Fixture that yields a new :class:`~adbwp.sync.Decoder`.
+    """
+    return sync.Decoder()
+
+
+def split(data, size):
+    """
+    Helper function that splits data into chunks of the given size.
+    """
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_request_encodes_path():
+    """
+    Assert that :func:`~adbwp.sync.request` encodes the identifier, length, and path.
+    """
+    assert sync.request(enums.SyncId.STAT, '/sdcard') == b'STAT\x07\x00\x00\x00/sdcard'
+
+
+def test_send_request_appends_mode():
+    """
+    Assert that :func:`~adbwp.sync.send_request` appends the file mode in decimal to the path.
+    """
+    assert sync.send_request('/a', 0o100644) == b'SEND\x08\x00\x00\x00/a,33188'
+
+
+def test_request_raises_on_non_request_id():
+    """
+    Assert that :func:`~adbwp.sync.request` raises a :class:`~ValueError` for identifiers that are not requests.
+    """
+    with pytest.raises(ValueError):
+        sync.request(enums.SyncId.DATA, '/a')
+
+
+@pytest.mark.parametrize('encode', [
+    lambda value: sync.request(enums.SyncId.RECV, value),
+    sync.data,
+    sync.fail,
+    lambda value: sync.dent(0, 0, 0, value)
+])
+def test_encode_raises_on_values_over_sync_data_max(encode):
+    """
+    Assert that records with values longer than :attr:`~adbwp.consts.SYNC_DATA_MAX` cannot be created.
+    """
+    encode(b'a' * consts.SYNC_DATA_MAX)
+    with pytest.raises(ValueError):
+        encode(b'a' * (consts.SYNC_DATA_MAX + 1))
+
+
+@pytest.mark.parametrize('size', [1, 2, consts.SYNC_DATA_MAX])
+def test_data_records_splits_without_copying(size):
+    """
+    Assert that :func:`~adbwp.sync.data_records` yields record headers and views of the contents.
+    """
+    contents = bytes(range(256)) * 3
+    parts = list(sync.data_records(contents, size))
+    assert all(isinstance(chunk, memoryview) and chunk.obj is contents for chunk in parts[1::2])
+    assert b''.join(parts) == b''.join(sync.data(chunk) for chunk in split(contents, size))
+
+
+@pytest.mark.parametrize('size', [0, consts.SYNC_DATA_MAX + 1])
+def test_data_records_raises_on_invalid_size(size):
+    """
+    Assert that :func:`~adbwp.sync.data_records` raises a :class:`~ValueError` for chunk sizes out of range.
+    """
+    with pytest.raises(ValueError):
+        list(sync.data_records(b'a', size))
+
+
+@pytest.mark.parametrize('max_data', [1, 7, 8, 64, 4096])
+def test_payloads_packs_records_to_max_data(max_data):
+    """
+    Assert that :func:`~adbwp.sync.payloads` packs records into data payloads of exactly the max data, except
+    for the last one.
+    """
+    records = [sync.request(enums.SyncId.STAT, '/a'), sync.data(b'x' * 100), sync.done(5)]
+    packed = list(sync.payloads(records, max_data))
+    assert b''.join(packed) == b''.join(records)
+    assert all(len(p) == max_data for p in packed[:-1])
+    assert 0 < len(packed[-1]) <= max_data
+
+
+def test_payloads_raises_on_non_positive_max_data():
+    """
+    Assert that :func:`~adbwp.sync.payloads` raises a :class:`~ValueError` when max data is not positive.
+    """
+    with pytest.raises(ValueError):
+        list(sync.payloads([sync.okay()], 0))
+
+
+def test_send_file_round_trip(decoder):
+    """
+    Assert that the data payloads of :func:`~adbwp.sync.send_file` decode to the request, data, and done
+    records as received by the remote end.
+    """
+    contents = bytes(range(256)) * 1024
+    packed = list(sync.send_file('/sdcard/a', 0o100644, contents, 1234, consts.MAXDATA))
+    assert len(packed) == 2
+
+    records = list(itertools.chain.from_iterable(decoder.feed(p) for p in packed))
+    assert records[0] == sync.Request(enums.SyncId.SEND, '/sdcard/a,33188')
+    assert b''.join(r.data for r in records[1:-1]) == contents
+    assert all(len(r.data) <= consts.SYNC_DATA_MAX for r in records[1:-1])
+    assert records[-1] == sync.Done(1234)
+    assert len(decoder) == 0
+
+
+def test_feed_returns_views_of_payload(decoder):
+    """
+    Assert that DATA records contained in a single data payload are views over it.
+    """
+    data = sync.data(b'foo') + sync.data(b'bar')
+    records = decoder.feed(data)
+    assert [r.data.tobytes() for r in records] == [b'foo', b'bar']
+    assert all(r.data.obj is data for r in records)
+
+
+def test_feed_completes_split_header_without_copying_payload(decoder):
+    """
+    Assert that a DATA record whose header is split between data payloads is produced as a view over the
+    next one, buffering only the start of the header.
+    """
+    decoder.expect(enums.SyncId.RECV)
+    stream = sync.data(b'x' * 100) + sync.done()
+    assert decoder.feed(stream[:5]) == []
+    assert len(decoder) == 5
+
+    rest = stream[5:]
+    records = decoder.feed(rest)
+    assert records[0].data.obj is rest
+    assert records[0].data.tobytes() == b'x' * 100
+    assert records[1:] == [sync.Done(0)]
+    assert len(decoder) == 0
+
+
+@pytest.mark.parametrize('size', [1, 3, 8, 13])
+def test_feed_records_spanning_payloads(decoder, size):
+    """
+    Assert that records split across data payloads at any offset are decoded once complete.
+    """
+    decoder.expect(enums.SyncId.LIST)
+    decoder.expect(enums.SyncId.RECV)
+    stream = b''.join((sync.dent(0o40755, 4096, 1, 'dir'), sync.dent(0o100644, 3, 2, 'file'), sync.list_done(),
+                       sync.data(b'contents'), sync.done()))
+
+    records = list(itertools.chain.from_iterable(decoder.feed(p) for p in split(stream, size)))
+    data = [r for r in records if isinstance(r, sync.Data)]
+    assert [r for r in records if not isinstance(r, sync.Data)] == [
+        sync.Dent(0o40755, 4096, 1, 'dir'), sync.Dent(0o100644, 3, 2, 'file'), sync.Done(0), sync.Done(0)]
+    assert b''.join(r.data for r in data) == b'contents'
+    assert all(r.data for r in data)
+    assert records.index(data[0]) == 3
+    assert decoder.expected == []
+    assert len(decoder) == 0
+
+
+def test_feed_data_spanning_payloads_is_not_buffered(decoder):
+    """
+    Assert that the parts of a DATA record spanning data payloads are produced as views over each of them.
+    """
+    record = sync.data(b'x' * 100)
+    first, second = record[:50], record[50:]
+    assert [r.data.obj for r in decoder.feed(first)] == [first]
+    assert len(decoder) == 0
+    assert [r.data.obj for r in decoder.feed(second)] == [second]
+    assert decoder.feed(sync.done()) == [sync.Done(0)]
+
+
+def test_feed_stat_response(decoder):
+    """
+    Assert that a STAT response is decoded in response to a STAT request.
+    """
+    decoder.expect(enums.SyncId.STAT)
+    assert decoder.feed(sync.stat(0o100644, 2 ** 32 + 5, 99)) == [sync.Stat(0o100644, 5, 99)]
+    assert decoder.expected == []
+
+
+def test_feed_send_responses(decoder):
+    """
+    Assert that OKAY and FAIL complete the responses of pipelined SEND requests in order.
+    """
+    decoder.expect(enums.SyncId.SEND)
+    decoder.expect(enums.SyncId.SEND)
+    assert decoder.feed(sync.okay() + sync.fail('read-only')) == [sync.Okay(), sync.Fail('read-only')]
+    assert decoder.expected == []
+
+
+def test_feed_requests_without_expected_response(decoder):
+    """
+    Assert that records received without an expected response are decoded as requests.
+    """
+    requests = sorted(sync.REQUESTS - set(sync.V2_REQUESTS))
+    data = b''.join(sync.request(sync_id, '/a') for sync_id in requests)
+    assert decoder.feed(data) == [sync.Request(sync_id, '/a') for sync_id in requests]
+
+
+def test_expect_raises_on_request_without_response(decoder):
+    """
+    Assert that :meth:`~adbwp.sync.Decoder.expect` raises a :class:`~ValueError` for requests without a response.
+    """
+    with pytest.raises(ValueError):
+        decoder.expect(enums.SyncId.QUIT)
+
+
+@pytest.mark.parametrize(('expected', 'data'), [
+    (None, b'ABCD\x00\x00\x00\x00'),
+    (None, sync.okay()),
+    (enums.SyncId.STAT, sync.data(b'a')),
+    (enums.SyncId.LIST, sync.okay()),
+    (enums.SyncId.SEND, sync.done()),
+    (enums.SyncId.RECV, sync.request(enums.SyncId.STAT, '/a')),
+    (None, b'DATA\x01\x00\x01\x00')
+])
+def test_feed_raises_on_unexpected_records(decoder, expected, data):
+    """
+    Assert that :meth:`~adbwp.sync.Decoder.feed` raises an :class:`~adbwp.exceptions.UnpackError` for unknown,
+    unexpected, or oversized records.
+    """
+    if expected is not None:
+        decoder.expect(expected)
+    with pytest.raises(exceptions.UnpackError):
+        decoder.feed(data)
+
+
+def test_send_v2_request_appends_setup():
+    """
+    Assert that :func:`~adbwp.sync.send_v2_request` encodes the request followed by its setup record.
+    """
+    assert sync.send_v2_request('/a', 0o644, enums.SyncFlag.LZ4) == (b'SND2\x02\x00\x00\x00/a' b'SND2' +
+                                                                      (0o644).to_bytes(4, 'little') +
+                                                                      b'\x02\x00\x00\x00')
+
+
+def test_v2_requests_round_trip(decoder):
+    """
+    Assert that SEND_V2 and RECV_V2 requests and their setup records decode as received by the remote end,
+    even when split across data payloads.
+    """
+    stream = sync.recv_v2_request('/b', enums.SyncFlag.ZSTD) + sync.send_v2_request('/a', 0o644, 0x80000001)
+    records = list(itertools.chain.from_iterable(decoder.feed(p) for p in split(stream, 5)))
+    assert records == [sync.Request(enums.SyncId.RCV2, '/b'), sync.Setup(enums.SyncId.RCV2, 0, 4),
+                       sync.Request(enums.SyncId.SND2, '/a'), sync.Setup(enums.SyncId.SND2, 0o644, 0x80000001)]
+
+
+def test_feed_raises_on_missing_setup(decoder):
+    """
+    Assert that a record other than the setup record after a SEND_V2 request raises an
+    :class:`~adbwp.exceptions.UnpackError`.
+    """
+    with pytest.raises(exceptions.UnpackError):
+        decoder.feed(sync.request(enums.SyncId.SND2, '/a') + sync.done())
+
+
+def test_feed_v2_responses(decoder):
+    """
+    Assert that responses to SEND_V2 and RECV_V2 requests decode as those to SEND and RECV requests.
+    """
+    decoder.expect(enums.SyncId.SND2)
+    decoder.expect(enums.SyncId.RCV2)
+    records = decoder.feed(sync.okay() + sync.data(b'a') + sync.done())
+    assert records == [sync.Okay(), sync.Data(memoryview(b'a')), sync.Done(0)]
+    assert decoder.expected == []
+
+
+def test_compressed_data_records_fill_sync_data_max():
+    """
+    Assert that :func:`~adbwp.sync.compressed_data_records` emits full DATA records of a single compressed
+    stream.
+    """
+    contents = os.urandom(3 * consts.SYNC_DATA_MAX)
+    codec = compression.get('zlib')
+    records = list(sync.compressed_data_records(split(contents, 1000), codec))
+    assert [len(r) for r in records[:-1]] == [consts.SYNC_DATA_MAX + sync.RECORD_STRUCT.size] * (len(records) - 1)
+
+    decoded = sync.Decoder()
+    decoded.expect(enums.SyncId.RCV2)
+    chunks = [r.data for r in decoded.feed(b''.join(records))]
+    assert b''.join(compression.decompress(chunks, codec)) == contents
+
+
+@pytest.mark.parametrize('flags', [0, 0x80000000, 0x80000004])
+def test_send_file_v2_round_trip(monkeypatch, flags):
+    """
+    Assert that the data payloads of :func:`~adbwp.sync.send_file_v2` decode to the request, setup, data, and
+    done records as received by the remote end, and the data to the contents.
+    """
+    class FakeCodec(compression.ZlibCodec):
+        name = 'zstd'
+        flag = enums.SyncFlag.ZSTD
+
+    monkeypatch.setitem(compression.CODECS, 'zstd', FakeCodec())
+    contents = b'compressible ' * 20000
+    packed = list(sync.send_file_v2('/a', 0o644, split(contents, 4096), 7, flags, 8192))
+    assert all(len(p) == 8192 for p in packed[:-1])
+
+    decoder = sync.Decoder()
+    records = list(itertools.chain.from_iterable(decoder.feed(p) for p in packed))
+    assert records[:2] == [sync.Request(enums.SyncId.SND2, '/a'), sync.Setup(enums.SyncId.SND2, 0o644, flags)]
+    assert records[-1] == sync.Done(7)
+
+    chunks = [r.data for r in records[2:-1]]
+    selected = compression.from_flags(records[1].flags)
+    assert (selected is not None) == bool(flags & enums.SyncFlag.ZSTD)
+    assert b''.join(compression.decompress(chunks, selected) if selected else chunks) == contents
+
+
+def test_send_file_v2_raises_on_unknown_codec_flags():
+    """
+    Assert that :func:`~adbwp.sync.send_file_v2` raises a :class:`~ValueError` for flags that select no registered
+    codec.
+    """
+    with pytest.raises(ValueError):
+        sync.send_file_v2('/a', 0o644, [b'a'], 0, 0x40)
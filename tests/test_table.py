@@ -0,0 +1,169 @@
+"""
+    test_table
+    ~~~~~~~~~~
+
+    Contains tests for the :mod:`~adbwp.table` module.
+"""
+import pytest
+
+from adbwp import enums, exceptions, header, message, table
+
+
+@pytest.fixture(scope='function')
+def random_headers(random_local_id, random_remote_id):
+    """
+    Fixture that yields a list of headers for two streams and a connect message.
+    """
+    return [message.connect('serial', 'banner').header,
+            message.open(random_local_id, 'shell:').header,
+            message.ready(random_remote_id, random_local_id).header,
+            message.write(random_local_id, random_remote_id, b'foo').header,
+            message.open(random_local_id + 1, 'sync:').header,
+            message.close(random_local_id, random_remote_id).header]
+
+
+def test_header_table_materializes_appended_headers(random_headers):
+    """
+    Assert that :class:`~adbwp.table.HeaderTable` returns equal headers, with commands converted to
+    :class:`~adbwp.enums.Command`, for each appended header.
+    """
+    instance = table.HeaderTable()
+    for item in random_headers:
+        instance.append(item)
+    assert len(instance) == len(random_headers)
+    assert list(instance) == random_headers
+    assert instance[1] == random_headers[1]
+    assert instance[-1] == random_headers[-1]
+    assert all(isinstance(item.command, enums.Command) for item in instance)
+
+
+@pytest.mark.parametrize('value', [-1, 2**32])
+def test_header_table_unchanged_after_failed_append(random_headers, value):
+    """
+    Assert that a header with a value that does not fit in a 32-bit word leaves the table unchanged
+    when appended or extended, so later headers stay aligned.
+    """
+    instance = table.HeaderTable(random_headers)
+    invalid = header.new(enums.Command.WRTE, 1, value)
+    with pytest.raises(OverflowError):
+        instance.append(invalid)
+    with pytest.raises(OverflowError):
+        instance.extend([random_headers[0], invalid])
+    assert list(instance) == list(random_headers)
+    assert instance.nbytes == len(random_headers) * header.BYTES
+
+
+def test_header_table_uses_header_size_per_header(random_headers):
+    """
+    Assert that :class:`~adbwp.table.HeaderTable` stores each header in :attr:`~adbwp.header.BYTES` bytes.
+    """
+    assert table.HeaderTable(random_headers).nbytes == len(random_headers) * header.BYTES
+
+
+def test_header_table_raises_on_index_out_of_range(random_headers):
+    """
+    Assert that :class:`~adbwp.table.HeaderTable` raises a :class:`~IndexError` when the index is out of range.
+    """
+    instance = table.HeaderTable(random_headers)
+    with pytest.raises(IndexError):
+        instance[len(random_headers)]  # pylint: disable=pointless-statement
+    with pytest.raises(IndexError):
+        instance[-len(random_headers) - 1]  # pylint: disable=pointless-statement
+
+
+@pytest.mark.parametrize('index', [slice(1, 4), slice(None, None, 2), slice(None, None, -1), slice(4, 1)])
+def test_header_table_slice_returns_table(random_headers, index):
+    """
+    Assert that slicing a :class:`~adbwp.table.HeaderTable` returns a table with the sliced headers.
+    """
+    sliced = table.HeaderTable(random_headers)[index]
+    assert isinstance(sliced, table.HeaderTable)
+    assert list(sliced) == random_headers[index]
+
+
+def test_header_table_filter_by_command(random_headers):
+    """
+    Assert that :meth:`~adbwp.table.HeaderTable.filter` keeps headers with the given command.
+    """
+    filtered = table.HeaderTable(random_headers).filter(command=enums.Command.OPEN)
+    assert list(filtered) == [h for h in random_headers if h.command == enums.Command.OPEN]
+
+
+def test_header_table_filter_by_stream_id(random_headers, random_local_id):
+    """
+    Assert that :meth:`~adbwp.table.HeaderTable.filter` keeps stream headers with the given stream id
+    as either argument.
+    """
+    filtered = table.HeaderTable(random_headers).filter(stream_id=random_local_id)
+    assert list(filtered) == random_headers[1:4] + random_headers[5:]
+
+
+def test_header_table_filter_by_command_and_stream_id(random_headers, random_local_id):
+    """
+    Assert that :meth:`~adbwp.table.HeaderTable.filter` keeps headers that match all given criteria.
+    """
+    filtered = table.HeaderTable(random_headers).filter(enums.Command.WRTE, random_local_id)
+    assert list(filtered) == [random_headers[3]]
+
+
+def test_header_table_converts_to_from_bytes(random_headers):
+    """
+    Assert that :meth:`~adbwp.table.HeaderTable.tobytes` serializes headers in wire format and
+    :meth:`~adbwp.table.HeaderTable.frombytes` loads them back.
+    """
+    instance = table.HeaderTable(random_headers)
+    data = instance.tobytes()
+    assert data == b''.join(header.to_bytes(h) for h in random_headers)
+
+    loaded = table.HeaderTable()
+    loaded.frombytes(memoryview(data))
+    assert loaded == instance
+
+
+def test_header_table_frombytes_raises_on_partial_header():
+    """
+    Assert that :meth:`~adbwp.table.HeaderTable.frombytes` raises a :class:`~adbwp.exceptions.UnpackError`
+    when the buffer length is not a multiple of the header size.
+    """
+    with pytest.raises(exceptions.UnpackError):
+        table.HeaderTable().frombytes(b'\0' * (header.BYTES + 1))
+
+
+def test_header_table_materializes_unknown_command_as_int():
+    """
+    Assert that :class:`~adbwp.table.HeaderTable` materializes unknown commands as plain :class:`~int` values.
+    """
+    instance = table.HeaderTable()
+    instance.frombytes(b'\0' * header.BYTES)
+    assert instance[0] == header.new(0)
+    assert type(instance[0].command) is int
+
+
+def test_header_table_truncate_keeps_most_recent(random_headers):
+    """
+    Assert that :meth:`~adbwp.table.HeaderTable.truncate` removes the oldest headers.
+    """
+    instance = table.HeaderTable(random_headers)
+    instance.truncate(len(random_headers) + 1)
+    assert list(instance) == random_headers
+    instance.truncate(2)
+    assert list(instance) == random_headers[-2:]
+    instance.truncate(0)
+    assert len(instance) == 0
+
+
+def test_header_table_truncate_raises_on_negative_size():
+    """
+    Assert that :meth:`~adbwp.table.HeaderTable.truncate` raises a :class:`~ValueError` when given a negative size.
+    """
+    with pytest.raises(ValueError):
+        table.HeaderTable().truncate(-1)
+
+
+def test_header_table_clear_removes_all_headers(random_headers):
+    """
+    Assert that :meth:`~adbwp.table.HeaderTable.clear` removes all headers.
+    """
+    instance = table.HeaderTable(random_headers)
+    instance.clear()
+    assert len(instance) == 0